@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+"""
+Compile translated XLIFF files into route-split runtime bundles.
+
+The customer frontend loads the complete messages.<lang>.xlf of a locale, so
+every page pays for every string in the catalog. This post-translation stage
+splits each locale's targets into small JSON chunks by feature, based on the
+`sourcefile` entries of each trans-unit's location context-group:
+
+    src/app/features/deposit/deposit.component.html  ->  chunk "deposit"
+    src/app/shared/header/header.component.html      ->  chunk "shared"
+
+Strings used by several chunks (and strings without a location) go into the
+"common" chunk, which the app loads up front; feature chunks are loaded
+lazily with their route. Chunks are named after a hash of their content, so
+they can be cached forever:
+
+    <out>/fr/deposit.3f2a9c1e.json     {"<unit id>": "<translation>", ...}
+    <out>/manifest.json                locale -> chunk -> file, hash, sizes
+
+Messages are in the format Angular's loadTranslations() expects: XLIFF
+placeholders such as <x id="INTERPOLATION"/> become {$INTERPOLATION}.
+Untranslated units are left out, so the app falls back to the source text.
+
+Usage:
+    python compile_xlf_bundles.py
+    python compile_xlf_bundles.py -i ../casino-customer-f/src/locale/messages.fr.xlf -o dist/i18n
+    python compile_xlf_bundles.py --max-chunk-kb 20
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import re
+import sys
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+from xml.etree import ElementTree as ET
+
+XLIFF_NS = "urn:oasis:names:tc:xliff:document:1.2"
+
+# Chunk that holds shared strings and strings without a location
+COMMON_CHUNK = 'common'
+
+# Route directories whose sub-directories are the features (src/app/features/<feature>/...)
+FEATURE_DIRS = ('features', 'pages', 'routes', 'modules')
+
+MANIFEST_VERSION = 1
+
+
+def chunk_for(sourcefile: str) -> str:
+    """
+    Chunk a source file's strings belong to.
+
+    Args:
+        sourcefile: Path from a location context, e.g. src/app/features/lobby/lobby.component.html
+
+    Returns:
+        Chunk name (lower-case, file-name safe)
+    """
+    parts = sourcefile.replace('\\', '/').split('/')
+    if 'app' in parts:
+        parts = parts[parts.index('app') + 1:]
+    dirs = parts[:-1]
+    if not dirs:
+        return COMMON_CHUNK
+    name = dirs[1] if dirs[0] in FEATURE_DIRS and len(dirs) > 1 else dirs[0]
+    return re.sub(r'[^a-z0-9_-]+', '-', name.lower()).strip('-') or COMMON_CHUNK
+
+
+def locale_code(xliff_path: Path) -> str:
+    """Locale code of a locale file name (messages.fr.xlf -> fr)."""
+    parts = xliff_path.name.split('.')
+    return parts[-2] if len(parts) >= 3 else xliff_path.stem
+
+
+def runtime_message(target: ET.Element) -> str:
+    """
+    Convert a <target> element to an Angular runtime message.
+
+    Args:
+        target: <target> element
+
+    Returns:
+        Message text with <x id="NAME"/> placeholders as {$NAME}
+    """
+    parts = [target.text or '']
+    for child in target:
+        if child.tag.endswith('}x') or child.tag == 'x':
+            parts.append(f"{{${child.get('id')}}}")
+        else:
+            # Paired tags (<g>, <ph>...) are not produced by Angular; keep their text
+            parts.append(runtime_message(child))
+        parts.append(child.tail or '')
+    return ''.join(parts)
+
+
+class BundleCompiler:
+    """Splits locale files into per-feature chunks and writes them with a manifest"""
+
+    def __init__(self, output_dir: Path, min_strings: int = 5):
+        """
+        Initialize the compiler.
+
+        Args:
+            output_dir: Directory for the locale chunk directories and manifest.json
+            min_strings: Feature chunks with fewer strings are folded into the common
+                chunk (saves requests for tiny features)
+        """
+        self.output_dir = output_dir
+        self.min_strings = min_strings
+
+    @staticmethod
+    def read_units(xliff_path: Path) -> Dict[str, dict]:
+        """
+        Read the trans-units of a locale file.
+
+        Args:
+            xliff_path: Locale file
+
+        Returns:
+            Unit id -> {'message': runtime message or None if untranslated, 'chunks': set of chunks}
+        """
+        units = {}
+        for trans_unit in ET.parse(xliff_path).getroot().iter(f'{{{XLIFF_NS}}}trans-unit'):
+            unit_id = trans_unit.get('id')
+            target = trans_unit.find(f'{{{XLIFF_NS}}}target')
+            if not unit_id:
+                continue
+            message = runtime_message(target).strip() if target is not None else ''
+            chunks = {
+                chunk_for(context.text or '')
+                for context in trans_unit.iter(f'{{{XLIFF_NS}}}context')
+                if context.get('context-type') == 'sourcefile'
+            }
+            units[unit_id] = {'message': message or None, 'chunks': chunks}
+        return units
+
+    def assign_chunks(self, locales: Dict[str, Dict[str, dict]]) -> Dict[str, str]:
+        """
+        Decide the chunk of every unit (the same for all locales, so routes load the same chunk names).
+
+        Args:
+            locales: Locale code -> units as returned by read_units
+
+        Returns:
+            Unit id -> chunk name
+        """
+        locations: Dict[str, Set[str]] = defaultdict(set)
+        for units in locales.values():
+            for unit_id, unit in units.items():
+                locations[unit_id] |= unit['chunks']
+
+        assignment = {
+            unit_id: next(iter(chunks)) if len(chunks) == 1 else COMMON_CHUNK
+            for unit_id, chunks in locations.items()
+        }
+        sizes: Dict[str, int] = defaultdict(int)
+        for chunk in assignment.values():
+            sizes[chunk] += 1
+        for unit_id, chunk in assignment.items():
+            if sizes[chunk] < self.min_strings:
+                assignment[unit_id] = COMMON_CHUNK
+        return assignment
+
+    def compile(self, files: List[Path]) -> dict:
+        """
+        Compile locale files into chunks and write the manifest.
+
+        Chunk files that are no longer referenced are removed.
+
+        Args:
+            files: Locale files (messages.<locale>.xlf)
+
+        Returns:
+            The manifest
+        """
+        locales = {locale_code(path): self.read_units(path) for path in files}
+        assignment = self.assign_chunks(locales)
+
+        manifest = {'version': MANIFEST_VERSION, 'locales': {}, 'untranslated': {}}
+        for locale, units in sorted(locales.items()):
+            chunks: Dict[str, Dict[str, str]] = defaultdict(dict)
+            for unit_id, unit in units.items():
+                if unit['message'] is not None:
+                    chunks[assignment[unit_id]][unit_id] = unit['message']
+            manifest['untranslated'][locale] = sum(1 for unit in units.values() if unit['message'] is None)
+
+            locale_dir = self.output_dir / locale
+            locale_dir.mkdir(parents=True, exist_ok=True)
+            entries = {}
+            for chunk, messages in sorted(chunks.items()):
+                data = json.dumps(messages, ensure_ascii=False, sort_keys=True, separators=(',', ':')).encode('utf-8')
+                content_hash = hashlib.sha256(data).hexdigest()[:8]
+                path = locale_dir / f"{chunk}.{content_hash}.json"
+                if not path.exists():
+                    path.write_bytes(data)
+                entries[chunk] = {
+                    'file': f"{locale}/{path.name}",
+                    'hash': content_hash,
+                    'strings': len(messages),
+                    'bytes': len(data),
+                    'gzip_bytes': len(gzip.compress(data, mtime=0)),
+                }
+            manifest['locales'][locale] = entries
+
+            # Drop chunk files of earlier builds
+            current = {Path(entry['file']).name for entry in entries.values()}
+            for old in locale_dir.glob('*.json'):
+                if old.name not in current and re.fullmatch(r'[a-z0-9_-]+\.[0-9a-f]{8}\.json', old.name):
+                    old.unlink()
+
+        self.write_manifest(manifest)
+        return manifest
+
+    @property
+    def manifest_path(self) -> Path:
+        return self.output_dir / 'manifest.json'
+
+    def read_manifest(self) -> Optional[dict]:
+        """The manifest of the previous build (None if there is none)."""
+        try:
+            with open(self.manifest_path, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def write_manifest(self, manifest: dict):
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        with open(self.manifest_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2, sort_keys=True)
+            f.write('\n')
+
+
+def _kb(size: int) -> str:
+    return f"{size / 1024:.1f} KB"
+
+
+def print_report(manifest: dict, previous: Optional[dict] = None, max_chunk_kb: Optional[float] = None) -> int:
+    """
+    Print chunk and locale sizes (gzip sizes are what the browser downloads).
+
+    Args:
+        manifest: Manifest of this build
+        previous: Manifest of the previous build, for size changes per locale
+        max_chunk_kb: Payload budget per chunk (gzipped); chunks above it are flagged
+
+    Returns:
+        Number of chunks over the budget
+    """
+    over_budget = 0
+    for locale, entries in sorted(manifest['locales'].items()):
+        print(f"\n{locale}:")
+        print(f"  {'chunk':<24} {'strings':>8} {'size':>10} {'gzip':>10}")
+        for chunk, entry in sorted(entries.items(), key=lambda item: -item[1]['gzip_bytes']):
+            flag = ''
+            if max_chunk_kb is not None and entry['gzip_bytes'] > max_chunk_kb * 1024:
+                flag = '  ⚠ over budget'
+                over_budget += 1
+            print(f"  {chunk:<24} {entry['strings']:>8} {_kb(entry['bytes']):>10} {_kb(entry['gzip_bytes']):>10}{flag}")
+
+        total = sum(entry['gzip_bytes'] for entry in entries.values())
+        line = (f"  {'total':<24} {sum(e['strings'] for e in entries.values()):>8} "
+                f"{_kb(sum(e['bytes'] for e in entries.values())):>10} {_kb(total):>10}")
+        if previous and locale in previous.get('locales', {}):
+            before = sum(entry['gzip_bytes'] for entry in previous['locales'][locale].values())
+            line += f"  ({'+' if total >= before else '-'}{_kb(abs(total - before))} gzip)"
+        print(line)
+        if manifest['untranslated'].get(locale):
+            print(f"  {manifest['untranslated'][locale]} untranslated units left out (source text is used)")
+    return over_budget
+
+
+def main():
+    """Main entry point for CLI usage"""
+    script_dir = Path(__file__).parent
+    locale_dir = script_dir.parent / 'casino-customer-f' / 'src' / 'locale'
+
+    parser = argparse.ArgumentParser(
+        description='Compile translated XLIFF files into route-split runtime bundles',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__.split('Usage:', 1)[1]
+    )
+    parser.add_argument(
+        '-i', '--input',
+        type=Path,
+        nargs='+',
+        help=f'Locale files (default: all messages.*.xlf in {locale_dir})'
+    )
+    parser.add_argument(
+        '-o', '--output',
+        type=Path,
+        default=script_dir.parent / 'casino-customer-f' / 'src' / 'assets' / 'i18n',
+        help='Output directory for the chunks and manifest.json (default: casino-customer-f/src/assets/i18n)'
+    )
+    parser.add_argument(
+        '--min-strings',
+        type=int,
+        default=5,
+        help='Fold feature chunks with fewer strings into the common chunk (default: 5)'
+    )
+    parser.add_argument(
+        '--max-chunk-kb',
+        type=float,
+        help='Payload budget per chunk in KB (gzipped); exit with status 1 if a chunk exceeds it'
+    )
+    args = parser.parse_args()
+
+    files = args.input or sorted(locale_dir.glob('messages.*.xlf'))
+    missing = [path for path in files if not path.exists()]
+    if missing or not files:
+        print(f"Error: Locale files not found: {', '.join(map(str, missing)) or locale_dir}")
+        sys.exit(1)
+
+    compiler = BundleCompiler(args.output, min_strings=args.min_strings)
+    previous = compiler.read_manifest()
+    try:
+        manifest = compiler.compile(files)
+    except ET.ParseError as e:
+        print(f"Error: Could not parse locale file: {e}")
+        sys.exit(1)
+
+    print(f"✓ Compiled {len(files)} locale files into {args.output}")
+    over_budget = print_report(manifest, previous, args.max_chunk_kb)
+    print(f"\nManifest: {compiler.manifest_path}")
+    if over_budget:
+        print(f"⚠ {over_budget} chunks are over the {args.max_chunk_kb:g} KB budget")
+    sys.exit(1 if over_budget else 0)
+
+
+if __name__ == '__main__':
+    main()
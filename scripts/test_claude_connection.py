@@ -3,11 +3,39 @@
 Test Claude AI (Anthropic) API Connection
 
 This script tests if your Anthropic API key is working correctly.
-Usage: python test_claude_connection.py
+With --probe it also measures time-to-first-token, latency percentiles,
+tokens/sec and rate-limit headroom, and writes a JSON report that
+translate_xlf.py uses to pick concurrency and batch size defaults.
+
+Usage:
+    python test_claude_connection.py
+    python test_claude_connection.py --probe --models claude-haiku-4-5-20251001
 """
 
+import argparse
 import os
 import sys
+import time
+from pathlib import Path
+
+from xlf_probe import rate_limit_headers, run_probe, save_report, translation_prompt
+
+parser = argparse.ArgumentParser(description='Test Claude AI (Anthropic) API connection and optionally probe latency/throughput')
+parser.add_argument('--probe', action='store_true',
+                    help='After the connection test, probe latency/throughput and write a JSON report')
+parser.add_argument('--models', default='claude-haiku-4-5-20251001',
+                    help='Comma-separated models to probe (default: claude-haiku-4-5-20251001)')
+parser.add_argument('--batch-sizes', default='10,20',
+                    help='Comma-separated batch sizes to probe (default: 10,20)')
+parser.add_argument('--concurrency', default='1,2,4,8',
+                    help='Comma-separated concurrency levels to probe (default: 1,2,4,8)')
+parser.add_argument('--requests', type=int, default=8,
+                    help='Requests per model/batch size/concurrency level (default: 8)')
+parser.add_argument('--language', default='French',
+                    help='Target language of the probe requests (default: French)')
+parser.add_argument('--output', type=Path, default=Path(__file__).parent / 'probe-anthropic.json',
+                    help='Probe report path (default: scripts/probe-anthropic.json)')
+args = parser.parse_args()
 
 # Test imports
 print("Testing imports...")
@@ -80,3 +108,61 @@ except Exception as e:
     print("  3. Network connectivity issues")
     print("  4. API key has been revoked")
     sys.exit(1)
+
+
+def probe_request(model, texts):
+    """Send one streamed batch translation request and time it."""
+    system, user = translation_prompt(texts, args.language)
+    start = time.perf_counter()
+    ttft = None
+    output_tokens = 0
+    try:
+        stream = client.messages.create(
+            model=model,
+            max_tokens=2000,
+            temperature=0.3,
+            system=system,
+            messages=[
+                {"role": "user", "content": user}
+            ],
+            stream=True
+        )
+        headers = rate_limit_headers(stream.response.headers)
+        for event in stream:
+            if ttft is None and event.type == 'content_block_delta':
+                ttft = time.perf_counter() - start
+            if event.type == 'message_delta':
+                output_tokens = event.usage.output_tokens
+        status = 'ok'
+    except Exception as e:
+        response = getattr(e, 'response', None)
+        headers = rate_limit_headers(getattr(response, 'headers', None))
+        status = 'rate_limited' if getattr(e, 'status_code', None) == 429 else 'error'
+    return {
+        'status': status,
+        'ttft': ttft,
+        'latency': time.perf_counter() - start,
+        'output_tokens': output_tokens,
+        'headers': headers
+    }
+
+
+if args.probe:
+    print("\nProbing latency and throughput...")
+    report = run_probe(
+        provider='anthropic',
+        api_key=api_key,
+        request_fn=probe_request,
+        models=[m.strip() for m in args.models.split(',') if m.strip()],
+        batch_sizes=[int(b) for b in args.batch_sizes.split(',')],
+        concurrency_levels=[int(c) for c in args.concurrency.split(',')],
+        num_requests=args.requests,
+        target_language=args.language
+    )
+    save_report(report, args.output)
+
+    print("\nRecommended settings:")
+    for model, settings in report['recommended'].items():
+        print(f"  {model}: --concurrency {settings['concurrency']} "
+              f"--batch-size {settings['batch_size']} --delay {settings['delay']}")
+    print(f"\n✓ Probe report written to: {args.output}")
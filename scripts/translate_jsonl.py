@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Translate JSONL records (CMS copy, bonus descriptions, email templates) without XLIFF.
+
+Reads one JSON record per line from a file or stdin and writes one result per
+line as soon as all of its languages are translated. Records go through the
+same engine as XLIFF files: translation memory, deduplication, batching,
+concurrency, auto-tuning, hedging, validation and the circuit breaker (see
+xlf_stream.py).
+
+Input:
+    {"id": "bonus-12", "text": "Get <b>50</b> free spins", "languages": ["French", "German"]}
+    {"id": "mail-3", "text": "Your withdrawal was approved"}
+
+Output (in completion order, other input fields are kept):
+    {"id": "bonus-12", "text": "...", "languages": [...], "translations": {"French": "...", "German": "..."}}
+
+Results go to stdout (or --output); progress and messages go to stderr, so the
+script can sit in a pipe:
+
+    cms-export --jsonl | python translate_jsonl.py -l French -l German --memory tm.json > translated.jsonl
+    python translate_jsonl.py -i emails.jsonl -o emails.translated.jsonl -l Polish --auto-tune
+"""
+
+import argparse
+import contextlib
+import json
+import sys
+from pathlib import Path
+
+from translate_xlf import add_translator_arguments, build_translator
+from xlf_stream import StreamTranslator
+
+
+def main():
+    """Main entry point for CLI usage"""
+    parser = argparse.ArgumentParser(
+        description='Translate JSONL records through the XLIFF translation engine',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__.split('Input:', 1)[1]
+    )
+
+    parser.add_argument(
+        '-i', '--input',
+        type=Path,
+        help='JSONL input file (default: stdin)'
+    )
+
+    parser.add_argument(
+        '-o', '--output',
+        type=Path,
+        help='JSONL output file (default: stdout)'
+    )
+
+    parser.add_argument(
+        '-l', '--language',
+        action='append',
+        default=[],
+        help='Target language of records without "languages" (repeatable)'
+    )
+
+    parser.add_argument(
+        '--window',
+        type=int,
+        default=1000,
+        help='Maximum number of records read ahead or being translated; bounds memory use (default: 1000)'
+    )
+
+    parser.add_argument(
+        '--linger',
+        type=float,
+        default=0.5,
+        help='Seconds a string may wait for its batch to fill up before it is sent (default: 0.5)'
+    )
+
+    add_translator_arguments(parser)
+
+    args = parser.parse_args()
+    if args.profile or args.profile_cpu:
+        parser.error('--profile is not supported for streams; profile runs of translate_xlf.py')
+    if args.prioritize or args.priority_file or args.time_budget is not None or args.max_cost is not None:
+        parser.error('priorities and budgets are not supported for streams')
+
+    output = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    source = open(args.input, encoding='utf-8') if args.input else sys.stdin
+    # stdout may carry the results: every message goes to stderr
+    with contextlib.redirect_stdout(sys.stderr):
+        translator = build_translator(args)
+        stream = StreamTranslator(translator, args.language, window=args.window, linger=args.linger)
+        interrupted = False
+        try:
+            for result in stream.translate_records(source):
+                output.write(json.dumps(result, ensure_ascii=False) + '\n')
+                output.flush()
+        except KeyboardInterrupt:
+            interrupted = True
+            print("\n⚠ Translation interrupted by user!")
+        finally:
+            translator.memory.save()
+            if args.output:
+                output.close()
+            if args.input:
+                source.close()
+
+        stats = stream.stats
+        print(f"✓ {stats['records']} records: {stats['translated']} strings translated, "
+              f"{stats['reused']} reused from memory, {stats['duplicates']} duplicates, {stats['errors']} errors")
+
+    sys.exit(1 if interrupted or stats['errors'] else 0)
+
+
+if __name__ == '__main__':
+    main()
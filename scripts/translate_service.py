@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""
+Local translation service with warm caches and pooled connections.
+
+Every translate_xlf.py invocation pays the same startup costs: SDK imports,
+client construction, TLS handshakes and reloading the translation memory. This
+script keeps one translator hot in a long-running process and exposes it over
+HTTP on localhost or a Unix socket, so the frontend build, the locale scripts
+and content tools can share its connections, translation memory and rate
+budget (provider windows, auto-tuning, cool-downs).
+
+API (JSON in, JSON out):
+    GET  /status            uptime, providers, memory size, request counters
+    POST /translate         {"texts": [...], "language": "French"}
+                            -> {"translations": [...]}
+    POST /translate-file    {"input": "messages.fr.xlf", "language": "French",
+                             "output": null, "skip_existing": true}
+                            -> translation statistics
+
+    POST bodies must be sent as application/json, and requests with an Origin
+    header (from web pages open in a browser) are rejected.
+
+Usage:
+    python translate_service.py --memory translation-memory.json --auto-tune
+    python translate_service.py --socket /tmp/xlf-translate.sock
+
+    curl -s localhost:8765/translate -H 'Content-Type: application/json' \\
+        -d '{"texts": ["Deposit"], "language": "French"}'
+    curl -s --unix-socket /tmp/xlf-translate.sock http://localhost/status
+"""
+
+import argparse
+import json
+import os
+import socketserver
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from translate_xlf import XLIFFTranslator, add_translator_arguments, build_translator
+
+
+class TranslationService:
+    """Request handling on top of one shared, warm translator"""
+
+    def __init__(self, translator: XLIFFTranslator, save_frequency: int = 5):
+        """
+        Initialize the service.
+
+        Args:
+            translator: Translator shared by all requests
+            save_frequency: Save translated files every N batches
+        """
+        self.translator = translator
+        self.save_frequency = save_frequency
+        self.started = time.time()
+        self.counters = {'translate': 0, 'texts': 0, 'translate_file': 0, 'errors': 0}
+        self.active_files: List[str] = []
+        self._lock = threading.Lock()
+        self._file_locks: Dict[Path, threading.Lock] = {}
+
+    def _count(self, name: str, amount: int = 1):
+        with self._lock:
+            self.counters[name] += amount
+
+    def status(self) -> dict:
+        """Service state for GET /status."""
+        translator = self.translator
+        with self._lock:
+            counters = dict(self.counters)
+            active_files = list(self.active_files)
+        return {
+            'uptime': round(time.time() - self.started, 1),
+            'providers': translator.pool.stats(),
+            'memory_entries': len(translator.memory),
+            'requests': counters,
+            'active_files': active_files,
+            'auto_tune': translator.tuner.summary() if translator.tuner is not None else None,
+            'hedging': translator.hedger.summary() if translator.hedger is not None else None,
+            'cassette': translator.cassette.summary() if translator.cassette is not None else None,
+        }
+
+    def translate(self, body: dict) -> dict:
+        """
+        Translate a list of strings (POST /translate).
+
+        Args:
+            body: {"texts": [...], "language": "French"}
+
+        Returns:
+            {"translations": [...]}
+        """
+        texts = body.get('texts')
+        language = body.get('language')
+        if not isinstance(texts, list) or not all(isinstance(t, str) for t in texts) or not language:
+            raise ValueError("Expected {\"texts\": [strings], \"language\": name}")
+
+        self._count('translate')
+        self._count('texts', len(texts))
+        translations = self.translator.translate_texts(texts, language)
+        self.translator.memory.save()
+        return {'translations': translations}
+
+    def translate_file(self, body: dict) -> dict:
+        """
+        Translate an XLIFF file (POST /translate-file).
+
+        Requests for the same file are handled one at a time; different files
+        are translated concurrently through the shared provider pool.
+
+        Args:
+            body: {"input": path, "language": name, "output": optional path,
+                "skip_existing": optional bool}
+
+        Returns:
+            Translation statistics
+        """
+        if not body.get('input') or not body.get('language'):
+            raise ValueError("Expected {\"input\": path, \"language\": name}")
+        input_file = Path(body['input']).resolve()
+        if input_file.suffix != '.xlf' or not input_file.exists():
+            raise ValueError(f"Input file not found or not an .xlf file: {input_file}")
+        output_file = Path(body['output']).resolve() if body.get('output') else None
+        if output_file is not None and output_file.suffix != '.xlf':
+            # The output and its unit state sidecar would overwrite whatever file the path names
+            raise ValueError(f"Output file is not an .xlf file: {output_file}")
+
+        target = output_file or input_file
+        with self._lock:
+            file_lock = self._file_locks.setdefault(target, threading.Lock())
+        self._count('translate_file')
+
+        with file_lock:
+            with self._lock:
+                self.active_files.append(str(target))
+            try:
+                return self.translator.translate_file(
+                    input_file=input_file,
+                    target_language=body['language'],
+                    output_file=output_file,
+                    skip_existing=body.get('skip_existing', True),
+                    save_frequency=self.save_frequency
+                )
+            finally:
+                with self._lock:
+                    self.active_files.remove(str(target))
+
+    def handle(self, method: str, path: str, body: dict) -> Tuple[int, dict]:
+        """
+        Route one request.
+
+        Returns:
+            Tuple of (HTTP status, JSON response)
+        """
+        routes = {
+            ('GET', '/status'): lambda: self.status(),
+            ('POST', '/translate'): lambda: self.translate(body),
+            ('POST', '/translate-file'): lambda: self.translate_file(body),
+        }
+        route = routes.get((method, path.rstrip('/') or '/'))
+        if route is None:
+            return 404, {'error': f"Unknown endpoint {method} {path}"}
+
+        try:
+            return 200, route()
+        except ValueError as e:
+            return 400, {'error': str(e)}
+        except Exception as e:
+            self._count('errors')
+            return 502, {'error': f"{type(e).__name__}: {e}"}
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    """JSON over HTTP; the service instance is attached to the server"""
+
+    protocol_version = 'HTTP/1.1'  # Keep-alive, so clients can reuse their connection
+
+    def _respond(self, status: int, payload: dict):
+        data = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        self._respond(*self.server.service.handle('GET', self.path, {}))
+
+    def do_POST(self):
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+        except ValueError:
+            self._respond(400, {'error': "Invalid Content-Length"})
+            return
+        # Read the body even for rejected requests, so it is not taken for the next request on the connection
+        data = self.rfile.read(length)
+
+        # Browsers send cross-site "simple" requests (text/plain, forms) without a preflight and
+        # always mark them with an Origin; local clients send JSON and no Origin
+        if self.headers.get('Origin') is not None:
+            self._respond(403, {'error': "Cross-origin requests are not accepted"})
+            return
+        if self.headers.get_content_type() != 'application/json':
+            self._respond(415, {'error': "Expected Content-Type: application/json"})
+            return
+        try:
+            body = json.loads(data or b'{}')
+        except ValueError as e:
+            self._respond(400, {'error': f"Invalid JSON: {e}"})
+            return
+        self._respond(*self.server.service.handle('POST', self.path, body))
+
+    def address_string(self) -> str:
+        # Unix socket clients have no (host, port) address
+        return self.client_address[0] if isinstance(self.client_address, tuple) else 'unix'
+
+
+class _UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def main():
+    """Main entry point for CLI usage"""
+    parser = argparse.ArgumentParser(
+        description='Run a local translation service that keeps the translator warm',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__.split('API (JSON in, JSON out):', 1)[1]
+    )
+
+    parser.add_argument(
+        '--host',
+        default='127.0.0.1',
+        help='Address to listen on (default: 127.0.0.1, local only)'
+    )
+
+    parser.add_argument(
+        '--port',
+        type=int,
+        default=8765,
+        help='Port to listen on (default: 8765)'
+    )
+
+    parser.add_argument(
+        '--socket',
+        type=Path,
+        help='Listen on this Unix socket instead of TCP'
+    )
+
+    parser.add_argument(
+        '--save-frequency',
+        type=int,
+        default=5,
+        help='Save translated files every N batches (default: 5)'
+    )
+
+    add_translator_arguments(parser)
+
+    args = parser.parse_args()
+    if args.profile or args.profile_cpu:
+        # Concurrent file jobs would share one profiler and mix their phases
+        parser.error('--profile is not supported by the service; profile single runs of translate_xlf.py')
+    if args.prioritize or args.priority_file or args.time_budget is not None or args.max_cost is not None:
+        # The budget clock and spend would run across all requests, deferring every file once used up
+        parser.error('priorities and budgets are not supported by the service; use them with translate_xlf.py '
+                     'or translate_all_locales.py')
+
+    service = TranslationService(build_translator(args), save_frequency=args.save_frequency)
+
+    if args.socket:
+        if args.socket.exists():
+            os.unlink(args.socket)
+        server = _UnixHTTPServer(str(args.socket), _RequestHandler)
+        address = f"unix:{args.socket}"
+    else:
+        server = ThreadingHTTPServer((args.host, args.port), _RequestHandler)
+        address = f"http://{args.host}:{args.port}"
+    server.service = service
+
+    print(f"✓ Translation service listening on {address}")
+    print(f"Model: {', '.join(p.label for p in service.translator.pool.providers)}")
+    print(f"Translation memory: {len(service.translator.memory)} entries")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nShutting down...")
+    finally:
+        server.server_close()
+        service.translator.memory.save()
+        if args.socket and args.socket.exists():
+            os.unlink(args.socket)
+
+    sys.exit(0)
+
+
+if __name__ == '__main__':
+    main()
@@ -3,8 +3,28 @@
 XLIFF Translation Script using OpenAI API
 
 This script translates XLIFF (.xlf) files from source language to target language
-using OpenAI's GPT models. Features include:
+using OpenAI's GPT models (or Anthropic's Claude models, see translate_xlf_claude.py).
+Features include:
 - Auto-resume capability (tracks progress via target elements)
+- Edit-aware retranslation of slightly changed source strings
+- Translation memory with exact and fuzzy (MinHash) reuse
+- Concurrent batch dispatch, tuned from a probe report or adapted live (--auto-tune)
+- Load balancing and failover across several providers, keys and models (--provider)
+- Hedged requests that cut the tail latency of slow batches (--hedge-percentile)
+- Local OpenAI-compatible servers for offline drafts (--base-url)
+- Sharded runs across several workers with a checked merge (--shard, --merge-shards)
+- Priority order with a time budget or cost limit (--prioritize, --time-budget, --max-cost)
+- Dry-run planning of requests, tokens, cost and time (--plan)
+- Per-phase timing, peak memory and cProfile dumps of a run (--profile, --profile-cpu)
+- Validation of placeholders, tags, ICU structure and length, requeueing only failing units
+- TMX import to seed the translation memory with approved translations (--tmx, xlf_tmx.py)
+- Circuit breaker that pauses, probes and aborts runs on error spikes (--breaker-threshold)
+- Locality-aware batches of strings from the same component (--batch-order)
+- ICU plural/select messages translated string by string, with the target language's plural forms
+- Quality scan that re-translates only suspect existing targets (--quality-scan, --glossary)
+- Streaming JSONL mode for content outside XLIFF files (translate_jsonl.py, xlf_stream.py)
+- Units without a <target> translated too; locale files synced from messages.xlf (xlf_sync.py)
+- Per-unit provenance (origin, model, prompt hash, time) and targeted re-runs (--retranslate-where)
 - Real-time progress bars (batch and item level)
 - Automatic periodic saving
 - Batch processing for efficiency
@@ -17,72 +37,221 @@ Usage:
 
 Features:
     - Automatically skips already-translated items (resume on crash)
+    - Detects changed source strings and updates their targets with minimal edits
     - Saves progress every 5 batches (configurable)
     - Shows dual progress bars (batches + individual translations)
     - Safe Ctrl+C interruption (saves before exit)
 """
 
 import argparse
+import contextlib
+import copy
+import difflib
 import os
 import sys
 from pathlib import Path
-from typing import Optional, List, Tuple
+from typing import Dict, NamedTuple, Optional, List, Tuple
+import math
 import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from xml.etree import ElementTree as ET
 
-try:
-    from openai import OpenAI
-except ImportError:
-    print("Error: openai package not installed. Install with: pip install openai")
-    sys.exit(1)
-
 try:
     from tqdm import tqdm
 except ImportError:
     print("Error: tqdm package not installed. Install with: pip install tqdm")
     sys.exit(1)
 
+from xlf_autotune import AutoTuner
+from xlf_breaker import CircuitBreaker
+from xlf_cassette import Cassette
+from xlf_compose import BatchComposer
+from xlf_hedge import Hedger
+from xlf_icu import IcuLeaf, IcuMessage
+from xlf_memory import MemoryMatch, TranslationMemory
+from xlf_probe import load_recommendation
+from xlf_profile import RunProfiler
+from xlf_provenance import ProvenanceSelector, parse_selector, prompt_hash, provenance_of, timestamp
+from xlf_quality import Glossary, QualityScanner
+from xlf_schedule import UnitScheduler, load_priority_rules, parse_duration
+from xlf_sync import add_target
+from xlf_shard import MergePlan, ShardResult, parse_shard, plan_merge, shard_of, unit_key
+from xlf_providers import Completion, LocalProvider, OpenAIProvider, Provider, ProviderPool, is_rate_limited, provider_from_spec
+from xlf_tmx import format_counts, import_tmx
+from xlf_unit_state import UnitStateStore
+from xlf_validate import Problem, UnitValidator
+
+
+# Rough size of a typical UI string, used to turn --batch-size into an auto-tune token budget
+AUTO_TUNE_TOKENS_PER_UNIT = 20
+
+
+class _BatchResponse(NamedTuple):
+    """Parsed response of one batch request"""
+    completion: Completion
+    translations: List[str]
+    # Model that answered (with hedging, not necessarily the one the batch was sent to first)
+    model: str
+
+    @property
+    def tokens(self) -> int:
+        return self.completion.input_tokens + self.completion.output_tokens
+
+
+class _BatchResult(NamedTuple):
+    """Translations of one batch, as returned by the worker thread"""
+    translations: List[str]
+    # Validation problems per unit
+    problems: List[List[Problem]]
+    # The response had the wrong number of items
+    mismatched: bool
+    # Model that produced the translations
+    model: str
+
 
 class XLIFFTranslator:
     """Handles translation of XLIFF files using OpenAI API"""
 
+    # Provider used when no providers are passed explicitly
+    PROVIDER = OpenAIProvider
+
     # XML namespace for XLIFF
     XLIFF_NS = "urn:oasis:names:tc:xliff:document:1.2"
 
+    # Upper bound for auto-tuned batches (long numbered lists parse less reliably)
+    MAX_BATCH_ITEMS = 50
+
+    # How often a rate-limited batch (or, with several providers, a failed batch)
+    # is put back in the queue before it counts as failed
+    MAX_RETRIES = 3
+
+    # (temperature, max_tokens) per request kind
+    REQUEST_PARAMS = {
+        'translate': (0.3, 2000),
+        'edit': (0.0, 1000),  # Edits should be as deterministic as possible
+    }
+
     def __init__(
         self,
         api_key: Optional[str] = None,
-        model: str = "gpt-3.5-turbo",
+        model: Optional[str] = None,
         batch_size: int = 10,
-        delay: float = 1.0
+        delay: float = 1.0,
+        edit_threshold: Optional[float] = 0.75,
+        memory: Optional[TranslationMemory] = None,
+        fuzzy_threshold: float = 0.5,
+        reuse_threshold: float = 0.7,
+        cassette: Optional[Cassette] = None,
+        concurrency: int = 1,
+        tuner: Optional[AutoTuner] = None,
+        providers: Optional[List[Provider]] = None,
+        hedger: Optional[Hedger] = None,
+        hedge_providers: Optional[List[Provider]] = None,
+        scheduler: Optional[UnitScheduler] = None,
+        profiler: Optional[RunProfiler] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        validate: bool = True,
+        max_length_ratio: float = 3.0,
+        batch_order: str = 'locality',
+        split_icu: bool = True,
+        quality_scan: bool = False,
+        quality_threshold: float = 1.0,
+        glossary: Optional[Glossary] = None,
+        retranslate_where: Optional[List[ProvenanceSelector]] = None
     ):
         """
         Initialize the translator.
 
         Args:
-            api_key: OpenAI API key (if None, reads from OPENAI_API_KEY env var)
-            model: OpenAI model to use (gpt-3.5-turbo, gpt-4, etc.)
+            api_key: API key (if None, reads from the provider's env var, e.g. OPENAI_API_KEY)
+            model: Model to use (default: the provider's default, e.g. gpt-3.5-turbo)
             batch_size: Number of translations to process in one API call
             delay: Delay in seconds between API calls to avoid rate limits
+            edit_threshold: Minimum similarity (0..1) between old and new source for a
+                stale unit to be updated with a minimal edit instead of a full
+                translation (None disables edit-aware retranslation)
+            memory: Translation memory to reuse and extend (defaults to an in-memory one)
+            fuzzy_threshold: Minimum similarity (0..1) for a memory match to be sent
+                to the model as a reference example
+            reuse_threshold: Minimum similarity (0..1) for a memory match to be reused
+                without calling the model (only if the difference can be substituted locally)
+            cassette: Optional record/replay cassette wrapped around the API client
+                (in replay mode no API key is needed)
+            concurrency: Number of batches sent to each provider in parallel
+            tuner: Optional auto-tuner that adapts batch size and concurrency during
+                the run (batch_size and concurrency are then only used as estimates)
+            providers: Providers to balance batches across (default: one PROVIDER
+                built from api_key, model and cassette)
+            hedger: Optional hedger that re-sends slow batches to a second provider
+            hedge_providers: Providers only used for hedged requests (default: hedges
+                go to another provider of the pool, or the same one if it is the only one)
+            scheduler: Optional scheduler that orders units by priority and stops
+                dispatching when its time budget or cost limit is reached
+            profiler: Optional profiler that times the phases of each translate_file
+                run and writes a profile report next to the output file
+            breaker: Optional circuit breaker that pauses, probes and aborts a run
+                when the rate of failed or mismatched batches spikes (each
+                translate_file run uses a fresh copy of it)
+            validate: Check each translation against its source (placeholders, tags,
+                ICU structure, length) and requeue the units that fail
+            max_length_ratio: Maximum length ratio between translation and source
+                for validation (0 disables the length check)
+            batch_order: 'locality' to batch strings of the same component and similar
+                strings together, 'document' to batch them in file order
+            split_icu: Translate the leaf strings of ICU plural/select messages as
+                separate units and reassemble the messages locally
+            quality_scan: Scan the existing translations of each file with local
+                heuristics and re-translate the suspect ones
+            quality_threshold: Score from which the quality scan treats a translation as suspect
+            glossary: Optional agreed term translations, added to the prompt and
+                checked by the quality scan
+            retranslate_where: Re-translate the existing translations whose recorded
+                provenance matches any of these selectors (see xlf_provenance)
         """
-        self.api_key = api_key or os.getenv("OPENAI_API_KEY")
-        if not self.api_key:
-            raise ValueError(
-                "OpenAI API key not provided. Set OPENAI_API_KEY environment variable "
-                "or pass api_key parameter"
-            )
-
-        self.client = OpenAI(api_key=self.api_key)
-        self.model = model
+        if providers is None:
+            providers = [self.PROVIDER(api_key=api_key, model=model, cassette=cassette)]
+
+        self.pool = ProviderPool(
+            providers,
+            initial_limit=concurrency,
+            max_limit=tuner.max_concurrency if tuner is not None else concurrency,
+            adaptive=tuner is not None,
+            hedge_providers=hedge_providers
+        )
+        self.provider = self.pool.primary
+        self.client = self.provider.client
+        self.api_key = self.provider.api_key
+        self.model = self.provider.model
+        self.cassette = cassette
         self.batch_size = batch_size
         self.delay = delay
+        self.concurrency = max(1, concurrency)
+        self.tuner = tuner
+        self.hedger = hedger
+        self.scheduler = scheduler
+        self.profiler = profiler
+        self.breaker = breaker
+        self.validator = UnitValidator(max_length_ratio) if validate else None
+        self.composer = BatchComposer() if batch_order == 'locality' else None
+        self.split_icu = split_icu
+        self.quality_scan = quality_scan
+        self.quality_threshold = quality_threshold
+        self.max_length_ratio = max_length_ratio
+        self.glossary = glossary
+        self.retranslate_where = retranslate_where or []
+        self._prompt_hashes: Optional[Dict[str, str]] = None
+        self.edit_threshold = edit_threshold
+        self.memory = memory if memory is not None else TranslationMemory()
+        self.fuzzy_threshold = fuzzy_threshold
+        self.reuse_threshold = reuse_threshold
 
         # Register namespace to preserve xmlns in output
         ET.register_namespace('', self.XLIFF_NS)
 
     def translate_text(self, text: str, target_language: str) -> str:
         """
-        Translate a single text using OpenAI API.
+        Translate a single text using the primary provider.
 
         Args:
             text: Text to translate
@@ -92,38 +261,33 @@ class XLIFFTranslator:
             Translated text
         """
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": f"You are a professional translator. Translate the given text to {target_language}. "
-                                   f"Preserve any HTML tags, placeholders, or special formatting. "
-                                   f"Only return the translation, no explanations."
-                    },
-                    {
-                        "role": "user",
-                        "content": text
-                    }
-                ],
+            return self.provider.complete(
+                f"You are a professional translator. Translate the given text to {target_language}. "
+                f"Preserve any HTML tags, placeholders, or special formatting. "
+                f"Only return the translation, no explanations.",
+                text,
                 temperature=0.3,  # Lower temperature for more consistent translations
                 max_tokens=500
-            )
-
-            translation = response.choices[0].message.content.strip()
-            return translation
+            ).text
 
         except Exception as e:
             print(f"Error translating text '{text[:50]}...': {e}")
             return text  # Return original on error
 
-    def translate_batch(self, texts: List[str], target_language: str) -> List[str]:
+    def translate_batch(
+        self,
+        texts: List[str],
+        target_language: str,
+        examples: Optional[List[Tuple[str, str]]] = None
+    ) -> List[str]:
         """
         Translate multiple texts in a single API call for efficiency.
 
         Args:
             texts: List of texts to translate
             target_language: Target language
+            examples: Optional (source, translation) pairs of similar strings from
+                the translation memory, used as reference for terminology and style
 
         Returns:
             List of translated texts
@@ -131,58 +295,266 @@ class XLIFFTranslator:
         if not texts:
             return []
 
+        temperature, max_tokens = self.REQUEST_PARAMS['translate']
+        try:
+            completion = self.provider.complete(
+                *self._translation_prompt(texts, target_language, examples),
+                temperature=temperature,
+                max_tokens=max_tokens
+            )
+        except Exception as e:
+            print(f"Error in batch translation: {e}")
+            return texts  # Return originals on error
+
+        return self._complete_translations(self._parse_numbered_response(completion.text), texts)
+
+    def translate_texts(self, texts: List[str], target_language: str) -> List[str]:
+        """
+        Translate loose strings (not from an XLIFF file) through the memory and provider pool.
+
+        Exact memory matches are reused, the rest is sent in batches with fuzzy
+        matches as reference examples, and new translations are added to the memory.
+        API errors are raised.
+
+        Args:
+            texts: Texts to translate
+            target_language: Target language
+
+        Returns:
+            List of translated texts
+        """
+        results = {}
+        pending = []
+        for text in dict.fromkeys(texts):
+            hit = self.memory.exact(text, target_language)
+            if hit is not None:
+                results[text] = hit
+            else:
+                pending.append(text)
+
+        temperature, max_tokens = self.REQUEST_PARAMS['translate']
+        for start in range(0, len(pending), self.batch_size):
+            chunk = pending[start:start + self.batch_size]
+            examples = {}
+            for text in chunk:
+                for match in self.memory.fuzzy(text, target_language, threshold=self.fuzzy_threshold):
+                    examples.setdefault(match.source, match.target)
+
+            provider = self.pool.acquire()
+            while provider is None:
+                time.sleep(max(0.05, self.pool.next_available_in()))
+                provider = self.pool.acquire()
+
+            system, user = self._translation_prompt(chunk, target_language, list(examples.items())[:10])
+            response = self._send_batch(provider, system, user, temperature, max_tokens, len(chunk), 1)
+            for text, translation in zip(chunk, self._complete_translations(response.translations, chunk)):
+                results[text] = translation
+                if translation != text:
+                    self.memory.add(text, translation, target_language)
+
+        return [results[text] for text in texts]
+
+    @staticmethod
+    def _translation_prompt(
+        texts: List[str],
+        target_language: str,
+        examples: Optional[List[Tuple[str, str]]] = None,
+        context: Optional[List[str]] = None,
+        forms: Optional[Dict[int, str]] = None,
+        terms: Optional[List[Tuple[str, str]]] = None
+    ) -> Tuple[str, str]:
+        """
+        Build the system prompt and numbered user message for a translation batch.
+
+        Args:
+            texts: List of texts to translate
+            target_language: Target language
+            examples: Optional (source, translation) reference pairs
+            context: Optional names of the components the texts are used in
+            forms: Optional plural form each item must take, by item number
+            terms: Optional (term, translation) glossary entries to use
+
+        Returns:
+            Tuple of (system_prompt, user_message)
+        """
         # Create a numbered list for batch translation
         numbered_texts = "\n".join([f"{i+1}. {text}" for i, text in enumerate(texts)])
 
-        try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": f"You are a professional translator. Translate each numbered item to {target_language}. "
-                                   f"Preserve any HTML tags, placeholders, or special formatting. "
-                                   f"Return only the translations in the same numbered format, one per line."
-                    },
-                    {
-                        "role": "user",
-                        "content": numbered_texts
-                    }
-                ],
-                temperature=0.3,
-                max_tokens=2000
+        reference = ""
+        if context:
+            reference += f"\nThe strings are used in: {', '.join(context)}."
+        if examples:
+            reference += (
+                "\nExisting approved translations of similar strings (reuse their terminology and style):\n"
+                + "\n".join(f"- {source} => {target}" for source, target in examples)
+            )
+        if terms:
+            reference += (
+                "\nUse these translations for terms:\n"
+                + "\n".join(f"- {term} => {translation}" for term, translation in terms)
+            )
+        if forms:
+            reference += (
+                "\nSome items are plural forms of the same message and must be translated in the given "
+                "form (<x id=\"ICU_COUNT\"/> stands for the number):\n"
+                + "\n".join(f"- Item {number}: {form}" for number, form in sorted(forms.items()))
             )
 
-            translation_text = response.choices[0].message.content.strip()
-
-            # Parse the numbered response
-            translations = []
-            for line in translation_text.split('\n'):
-                line = line.strip()
-                if line:
-                    # Remove number prefix (e.g., "1. ", "2. ")
-                    if '. ' in line:
-                        translation = line.split('. ', 1)[1]
-                        translations.append(translation)
-                    else:
-                        translations.append(line)
+        system = (
+            f"You are a professional translator. Translate each numbered item to {target_language}. "
+            f"Preserve any HTML tags, placeholders, or special formatting. "
+            f"Return only the translations in the same numbered format, one per line."
+            f"{reference}"
+        )
+        return system, numbered_texts
+
+    def prompt_hashes(self) -> Dict[str, str]:
+        """
+        Hashes of the current prompt templates, recorded with each translation.
+
+        Only the fixed instructions are hashed, not the texts, examples or terms
+        of a batch, so the hash changes when the prompt is changed.
+
+        Returns:
+            Dictionary of request kind ('translate', 'edit') -> prompt hash
+        """
+        if self._prompt_hashes is None:
+            self._prompt_hashes = {
+                'translate': prompt_hash(self._translation_prompt([], '{language}')[0]),
+                'edit': prompt_hash(self._edit_prompt([], '{language}')[0]),
+            }
+        return self._prompt_hashes
+
+    def _complete_translations(self, translations: List[str], texts: List[str]) -> List[str]:
+        """
+        Ensure there is one translation per text.
+
+        Args:
+            translations: Parsed translations
+            texts: Texts that were sent
+
+        Returns:
+            Translations, padded with the original texts if some are missing
+        """
+        if len(translations) != len(texts):
+            print(f"Warning: Expected {len(texts)} translations but got {len(translations)}")
+            # Fall back to original texts for missing translations
+            while len(translations) < len(texts):
+                translations.append(texts[len(translations)])
+        return translations
+
+    def translate_edit_batch(
+        self,
+        edits: List[Tuple[str, str, str]],
+        target_language: str
+    ) -> List[str]:
+        """
+        Update existing translations after small edits to their source text.
 
-            # Ensure we have the same number of translations
-            if len(translations) != len(texts):
-                print(f"Warning: Expected {len(texts)} translations but got {len(translations)}")
-                # Fall back to original texts for missing translations
-                while len(translations) < len(texts):
-                    translations.append(texts[len(translations)])
+        Instead of translating the new source from scratch, the model gets the
+        old source, the old translation and the new source, and is asked to
+        apply the minimal change to the old translation. This keeps approved
+        wording stable and needs far fewer output tokens.
 
-            return translations
+        Args:
+            edits: List of (old_source, old_target, new_source) tuples
+            target_language: Target language
+
+        Returns:
+            List of updated translations ('' for items that could not be parsed)
+        """
+        if not edits:
+            return []
 
+        temperature, max_tokens = self.REQUEST_PARAMS['edit']
+        try:
+            completion = self.provider.complete(
+                *self._edit_prompt(edits, target_language),
+                temperature=temperature,
+                max_tokens=max_tokens
+            )
         except Exception as e:
-            print(f"Error in batch translation: {e}")
-            return texts  # Return originals on error
+            print(f"Error in edit batch: {e}")
+            return [''] * len(edits)
+
+        return self._complete_edits(self._parse_numbered_response(completion.text), len(edits))
+
+    def _edit_prompt(self, edits: List[Tuple[str, str, str]], target_language: str) -> Tuple[str, str]:
+        """
+        Build the system prompt and numbered user message for a minimal-edit batch.
+
+        Args:
+            edits: List of (old_source, old_target, new_source) tuples
+            target_language: Target language
+
+        Returns:
+            Tuple of (system_prompt, user_message)
+        """
+        numbered_edits = "\n".join([
+            f"{i+1}. OLD SOURCE: {old_source}\n"
+            f"   OLD TRANSLATION: {old_target}\n"
+            f"   NEW SOURCE: {new_source}"
+            for i, (old_source, old_target, new_source) in enumerate(edits)
+        ])
+
+        system = (
+            f"You are a professional translator maintaining existing {target_language} translations. "
+            f"Each numbered item gives the OLD SOURCE, its approved OLD TRANSLATION and the edited NEW SOURCE. "
+            f"Apply the minimal edit to the OLD TRANSLATION so that it matches the NEW SOURCE, "
+            f"keeping all unchanged wording exactly as it is. "
+            f"Preserve any HTML tags, placeholders, or special formatting. "
+            f"Return only the updated translations in the same numbered format, one per line."
+        )
+        return system, numbered_edits
+
+    def _complete_edits(self, translations: List[str], count: int) -> List[str]:
+        """
+        Ensure there is one edited translation per edit.
+
+        Args:
+            translations: Parsed translations
+            count: Number of edits that were sent
+
+        Returns:
+            Translations, truncated or padded with '' (missing edits are reported
+            as errors and retried next run)
+        """
+        if len(translations) != count:
+            print(f"Warning: Expected {count} edited translations but got {len(translations)}")
+            translations = translations[:count]
+            while len(translations) < count:
+                translations.append('')
+        return translations
+
+    def _parse_numbered_response(self, translation_text: str) -> List[str]:
+        """
+        Parse a "1. ...\n2. ..." model response into a list of items.
+
+        Args:
+            translation_text: Raw response text
 
-    def extract_translations(self, root: ET.Element, skip_existing: bool = False) -> List[Tuple[ET.Element, ET.Element, str]]:
+        Returns:
+            List of items with their number prefix removed
+        """
+        translations = []
+        for line in translation_text.split('\n'):
+            line = line.strip()
+            if line:
+                # Remove number prefix (e.g., "1. ", "2. ")
+                if '. ' in line:
+                    translation = line.split('. ', 1)[1]
+                    translations.append(translation)
+                else:
+                    translations.append(line)
+        return translations
+
+    @classmethod
+    def extract_translations(cls, root: ET.Element, skip_existing: bool = False) -> List[Tuple[ET.Element, ET.Element, str]]:
         """
-        Extract all trans-units with source and target elements.
+        Extract all trans-units with a source text.
+
+        Units without a <target> (e.g. new units of a catalog that was not
+        synced, see xlf_sync) get an empty one, so they are translated too.
 
         Args:
             root: Root XML element
@@ -194,16 +566,19 @@ class XLIFFTranslator:
         translations = []
 
         # Find all trans-unit elements
-        for trans_unit in root.iter(f'{{{self.XLIFF_NS}}}trans-unit'):
-            source_elem = trans_unit.find(f'{{{self.XLIFF_NS}}}source')
-            target_elem = trans_unit.find(f'{{{self.XLIFF_NS}}}target')
+        for trans_unit in root.iter(f'{{{cls.XLIFF_NS}}}trans-unit'):
+            source_elem = trans_unit.find(f'{{{cls.XLIFF_NS}}}source')
+            target_elem = trans_unit.find(f'{{{cls.XLIFF_NS}}}target')
 
-            if source_elem is not None and target_elem is not None:
+            if source_elem is not None:
                 # Get source text (including any child elements)
-                source_text = self._get_element_text(source_elem)
+                source_text = cls._get_element_text(source_elem)
                 if source_text.strip():
+                    if target_elem is None:
+                        target_elem = add_target(trans_unit)
+
                     # Check if target already has content
-                    target_text = self._get_element_text(target_elem)
+                    target_text = cls._get_element_text(target_elem)
                     if skip_existing and target_text.strip():
                         continue  # Skip this one, already translated
 
@@ -211,7 +586,8 @@ class XLIFFTranslator:
 
         return translations
 
-    def _get_element_text(self, element: ET.Element) -> str:
+    @staticmethod
+    def _get_element_text(element: ET.Element) -> str:
         """
         Get text from element including nested tags.
 
@@ -227,7 +603,8 @@ class XLIFFTranslator:
         text = text.split('>', 1)[1].rsplit('<', 1)[0] if '>' in text else ''
         return text.strip()
 
-    def _set_element_text(self, element: ET.Element, text: str):
+    @staticmethod
+    def _set_element_text(element: ET.Element, text: str):
         """
         Set text for element, preserving any inner XML.
 
@@ -235,9 +612,8 @@ class XLIFFTranslator:
             element: XML element
             text: Text to set
         """
-        # Clear existing content
+        # Clear existing content (the tail is the indentation that follows the element, not its content)
         element.text = None
-        element.tail = None
         for child in list(element):
             element.remove(child)
 
@@ -247,236 +623,1944 @@ class XLIFFTranslator:
             wrapped = f'<temp>{text}</temp>'
             temp = ET.fromstring(wrapped)
             element.text = temp.text
-            element.tail = None
             for child in temp:
                 element.append(child)
         except ET.ParseError:
             # If not valid XML, just set as text
             element.text = text
 
-    def translate_file(
-        self,
-        input_file: Path,
-        target_language: str,
-        output_file: Optional[Path] = None,
-        skip_existing: bool = True,
-        save_frequency: int = 5
-    ) -> dict:
+    def _source_similarity(self, old_source: str, new_source: str) -> float:
         """
-        Translate an XLIFF file with progress tracking and auto-save.
+        Similarity ratio (0..1) between two versions of a source string.
 
         Args:
-            input_file: Path to input XLIFF file
-            target_language: Target language name (e.g., 'French', 'Spanish')
-            output_file: Path to output file (defaults to overwriting input)
-            skip_existing: If True, skip trans-units that already have content in target
-            save_frequency: Save file every N batches (default: 5)
+            old_source: Previous source text
+            new_source: Current source text
 
         Returns:
-            Dictionary with translation statistics
+            difflib similarity ratio
         """
-        print(f"\n{'='*70}")
-        print(f"XLIFF Translation: {input_file.name} → {target_language}")
-        print(f"{'='*70}")
+        return difflib.SequenceMatcher(None, old_source, new_source, autojunk=False).ratio()
 
-        # Parse XML
-        tree = ET.parse(input_file)
-        root = tree.getroot()
+    def _plan_units(
+        self,
+        all_trans_units: List[Tuple[ET.Element, ET.Element, str]],
+        state: UnitStateStore,
+        skip_existing: bool
+    ) -> Tuple[List[Tuple[ET.Element, ET.Element, str]], List[Tuple[ET.Element, ET.Element, str, str, str]], int]:
+        """
+        Decide which trans-units need a full translation and which only an edit.
 
-        # Extract all translation units (with skip_existing logic)
-        all_trans_units = self.extract_translations(root, skip_existing=False)
-        trans_units_to_process = self.extract_translations(root, skip_existing=skip_existing)
+        A unit is stale when the unit state records a different source than the
+        one currently in the file. Stale units whose source only changed
+        slightly (see edit_threshold) are updated with a minimal edit of their
+        previous translation instead of being translated from scratch.
 
-        total_units = len(all_trans_units)
-        already_translated = total_units - len(trans_units_to_process)
-        to_translate = len(trans_units_to_process)
+        Args:
+            all_trans_units: All (trans_unit, target_element, source_text) tuples
+            state: Unit state store for the file
+            skip_existing: If True, skip up-to-date targets that already have content
 
-        print(f"Total trans-units: {total_units}")
-        print(f"Already translated: {already_translated}")
-        print(f"To translate: {to_translate}")
-        print(f"{'='*70}\n")
+        Returns:
+            Tuple of (units to translate, units to edit, number of stale units).
+            Edit entries are (trans_unit, target_element, source_text, old_source, old_target).
+        """
+        to_translate = []
+        to_edit = []
+        stale = 0
+
+        for trans_unit, target_elem, source_text in all_trans_units:
+            if not skip_existing:
+                to_translate.append((trans_unit, target_elem, source_text))
+                continue
+
+            target_text = self._get_element_text(target_elem)
+            previous = state.get(trans_unit.get('id', ''))
+            source_changed = previous is not None and previous['source'] != source_text
+
+            if target_text.strip() and not source_changed:
+                continue  # Up to date
+
+            if target_text.strip():
+                stale += 1
+
+            old_target = target_text or (previous or {}).get('target', '')
+            if (
+                source_changed
+                and old_target.strip()
+                and self.edit_threshold is not None
+                and self._source_similarity(previous['source'], source_text) >= self.edit_threshold
+                # ICU messages are split into leaves instead of being edited as a whole
+                and not (self.split_icu and IcuMessage.parse((trans_unit, target_elem, source_text), ''))
+            ):
+                to_edit.append((trans_unit, target_elem, source_text, previous['source'], old_target))
+            else:
+                to_translate.append((trans_unit, target_elem, source_text))
+
+        return to_translate, to_edit, stale
+
+    def _scan_quality(
+        self,
+        all_trans_units: List[Tuple[ET.Element, ET.Element, str]],
+        pending: list,
+        target_language: str
+    ) -> List[Tuple[ET.Element, ET.Element, str]]:
+        """
+        Find the existing translations of a file that look wrong.
 
-        if to_translate == 0:
-            print("✓ All translations complete! Nothing to do.")
-            return {
-                'total': total_units,
-                'already_translated': already_translated,
-                'translated': 0,
-                'errors': 0
-            }
+        The translated units that are not pending anyway are scored by the
+        QualityScanner. Suspect translations are also removed from the
+        translation memory, so they are not reused or sent as examples.
 
-        # Determine output path
-        output_path = output_file or input_file
+        Args:
+            all_trans_units: All (trans_unit, target_element, source_text) tuples
+            pending: Units already planned for translation or editing
+            target_language: Target language
 
-        # Process in batches with progress bar
-        stats = {
-            'total': total_units,
-            'already_translated': already_translated,
-            'translated': 0,
-            'errors': 0
-        }
+        Returns:
+            Suspect unit tuples, most suspect first
+        """
+        pending_ids = {id(unit[1]) for unit in pending}
+        translated = [
+            (unit, self._get_element_text(unit[1])) for unit in all_trans_units
+            if id(unit[1]) not in pending_ids
+        ]
+        translated = [(unit, target) for unit, target in translated if target.strip()]
+        scanner = QualityScanner(target_language, self.glossary, self.max_length_ratio, self.quality_threshold)
+        suspects = scanner.scan([(unit[2], target) for unit, target in translated])
+
+        units = []
+        report = []
+        for suspect in suspects:
+            unit, target = translated[suspect.index]
+            self._forget_translation(unit, target, target_language)
+            units.append(unit)
+            report.append((unit[0].get('id', ''), '; '.join(str(problem) for problem in suspect.problems)))
+        if suspects:
+            print(f"🔎 Quality scan: {len(suspects)} of {len(translated)} translations look suspect "
+                  f"({scanner.summary(suspects)})")
+            for unit_id, problems in report[:10]:
+                print(f"  {unit_id}: {problems}")
+            if len(report) > 10:
+                print(f"  ... and {len(report) - 10} more")
+        else:
+            print(f"🔎 Quality scan: {len(translated)} translations, none look suspect")
+        return units
+
+    def _select_by_provenance(
+        self,
+        all_trans_units: List[Tuple[ET.Element, ET.Element, str]],
+        pending: list,
+        state: UnitStateStore,
+        target_language: str
+    ) -> List[Tuple[ET.Element, ET.Element, str]]:
+        """
+        Find the existing translations selected by --retranslate-where.
 
-        # Create progress bar for batches
-        num_batches = (to_translate + self.batch_size - 1) // self.batch_size
-        batch_progress = tqdm(
-            total=num_batches,
-            desc="Batches",
-            unit="batch",
-            position=0,
-            leave=True
-        )
+        A translated unit that is not pending anyway is selected if the
+        provenance recorded for its current target matches any selector. A
+        target changed since it was recorded (e.g. by hand) counts as one
+        without provenance. Selected translations are removed from the
+        translation memory, so they are not reused.
 
-        # Create progress bar for individual translations
-        translation_progress = tqdm(
-            total=to_translate,
-            desc="Translations",
-            unit="item",
-            position=1,
-            leave=True
-        )
+        Args:
+            all_trans_units: All (trans_unit, target_element, source_text) tuples
+            pending: Units already planned for translation or editing
+            state: Unit state store for the file
+            target_language: Target language
 
-        try:
-            for batch_idx in range(0, to_translate, self.batch_size):
-                batch = trans_units_to_process[batch_idx:batch_idx + self.batch_size]
-                batch_texts = [source_text for _, _, source_text in batch]
-
-                # Translate batch
-                try:
-                    translations = self.translate_batch(batch_texts, target_language)
-
-                    # Update XML
-                    for (trans_unit, target_elem, source_text), translation in zip(batch, translations):
-                        if translation and translation != source_text:
-                            self._set_element_text(target_elem, translation)
-                            stats['translated'] += 1
-                        else:
-                            stats['errors'] += 1
+        Returns:
+            Selected unit tuples, in file order
+        """
+        pending_ids = {id(unit[1]) for unit in pending}
+        current_prompts = set(self.prompt_hashes().values())
+        translated = 0
+        units = []
+        for unit in all_trans_units:
+            target = self._get_element_text(unit[1])
+            if id(unit[1]) in pending_ids or not target.strip():
+                continue
+            translated += 1
+            entry = state.get(unit[0].get('id', ''))
+            if entry is not None and entry.get('target') != target:
+                entry = None
+            if any(selector.matches(entry, current_prompts) for selector in self.retranslate_where):
+                self._forget_translation(unit, target, target_language)
+                units.append(unit)
+
+        where = ' or '.join(selector.text for selector in self.retranslate_where)
+        print(f"🔁 Re-translating {len(units)} of {translated} translations where {where}")
+        return units
+
+    def _forget_translation(self, unit: tuple, target: str, target_language: str):
+        """
+        Remove an existing translation that is to be redone from the translation memory.
 
-                        translation_progress.update(1)
+        The shared leaf strings of an ICU message whose remembered translation
+        occurs in the target are removed as well, so the message is not
+        reassembled from them.
 
-                    batch_progress.update(1)
+        Args:
+            unit: (trans_unit, target_element, source_text) tuple
+            target: Current target text
+            target_language: Target language
+        """
+        self.memory.discard(unit[2], target_language, target)
+        message = IcuMessage.parse(unit, target_language) if self.split_icu else None
+        for leaf in message.leaves if message is not None else []:
+            remembered = self.memory.exact(leaf.text, target_language) if leaf.shared else None
+            if remembered and remembered in target:
+                self.memory.discard(leaf.text, target_language, remembered)
+
+    def _lookup_memory(
+        self,
+        trans_units: List[Tuple[ET.Element, ET.Element, str]],
+        target_language: str,
+        state: UnitStateStore,
+        allow_reuse: bool
+    ) -> Tuple[List[Tuple[ET.Element, ET.Element, str]], Dict[str, list], Dict[int, List[MemoryMatch]], int]:
+        """
+        Resolve trans-units from the translation memory before calling the model.
 
-                    # Save periodically to preserve progress
-                    if (batch_idx // self.batch_size + 1) % save_frequency == 0:
-                        tree.write(
-                            output_path,
-                            encoding='UTF-8',
-                            xml_declaration=True,
-                            method='xml'
-                        )
-                        tqdm.write(f"💾 Progress saved to {output_path.name}")
+        Exact matches and fuzzy matches that can be adapted by local token
+        substitution are written to the target directly. Units whose source
+        text is already queued are held back as duplicates and receive the same
+        translation. For the rest, fuzzy matches are collected as examples.
 
-                except Exception as e:
-                    tqdm.write(f"❌ Error in batch {batch_idx // self.batch_size + 1}: {e}")
-                    stats['errors'] += len(batch)
-                    translation_progress.update(len(batch))
-                    batch_progress.update(1)
+        ICU plural/select messages that are not in the memory as a whole are
+        split into their leaf strings (see xlf_icu), which go through the same
+        lookup. Leaves translated by an earlier, incomplete run are restored
+        from the unit state. Leaf units hold an IcuLeaf in place of the target
+        element.
 
-                # Rate limiting between batches
-                if batch_idx + self.batch_size < to_translate:
-                    time.sleep(self.delay)
+        Args:
+            trans_units: (trans_unit, target_element, source_text) tuples to translate
+            target_language: Target language
+            state: Unit state store for the file
+            allow_reuse: If False, only collect examples (used for --no-skip runs)
 
-        except KeyboardInterrupt:
-            print("\n\n⚠ Translation interrupted by user!")
-            print("Saving progress before exit...")
+        Returns:
+            Tuple of (units still to translate, duplicates by source text,
+            fuzzy matches by target element object id, number of reused units)
+        """
+        remaining = []
+        duplicates: Dict[str, list] = {}
+        examples: Dict[int, List[MemoryMatch]] = {}
+        reused = 0
+
+        work = deque(trans_units)
+        while work:
+            unit = work.popleft()
+            trans_unit, target_elem, source_text = unit
+
+            if isinstance(target_elem, IcuLeaf) and not target_elem.shared:
+                # Plural forms of the same text differ, so they are neither shared nor reused
+                remaining.append(unit)
+                continue
+
+            if source_text in duplicates:
+                duplicates[source_text].append(unit)
+                continue
+
+            translation = self.memory.exact(source_text, target_language) if allow_reuse else None
+
+            message = None
+            if translation is None and self.split_icu and not isinstance(target_elem, IcuLeaf):
+                message = IcuMessage.parse(unit, target_language)
+            if message is not None:
+                previous = state.get(trans_unit.get('id', ''))
+                progress = (previous or {}).get('icu') or {}
+                if allow_reuse and progress.get('source') == source_text:
+                    message.restore(progress['leaves'])
+                duplicates[source_text] = []
+                pending = message.pending()
+                if not pending:
+                    # Every leaf is already known: nothing to send
+                    completed, filled = self._store_translation(
+                        unit, message.assemble(), target_language, state, duplicates,
+                        {'origin': 'memory', 'at': timestamp()}
+                    )
+                    reused += completed + filled
+                work.extendleft(reversed([(trans_unit, leaf, leaf.text) for leaf in pending]))
+                continue
+
+            matches = []
+            if translation is None:
+                matches = self.memory.fuzzy(source_text, target_language, threshold=self.fuzzy_threshold)
+                if allow_reuse and matches and matches[0].score >= self.reuse_threshold:
+                    translation = self.memory.substitute(matches[0], source_text)
+
+            if translation is not None:
+                completed, filled = self._store_translation(
+                    unit, translation, target_language, state, duplicates, {'origin': 'memory', 'at': timestamp()}
+                )
+                reused += completed + filled
+                continue
+
+            duplicates[source_text] = []
+            if matches:
+                examples[id(target_elem)] = matches
+            remaining.append(unit)
+
+        return remaining, duplicates, examples, reused
+
+    def _write_unit(
+        self,
+        unit: tuple,
+        translation: str,
+        target_language: str,
+        state: UnitStateStore,
+        provenance: Optional[Dict[str, str]] = None
+    ) -> Optional[Tuple[str, str]]:
+        """
+        Write a translation into its target and record it in the memory and unit state.
 
-        finally:
-            batch_progress.close()
-            translation_progress.close()
+        The translation of an ICU leaf is kept with its message; the message is
+        assembled and written once all of its leaves are translated, and until
+        then the leaves translated so far are recorded in the unit state.
 
-        # Final save
-        print(f"\n💾 Saving final results to: {output_path}")
-        tree.write(
-            output_path,
-            encoding='UTF-8',
-            xml_declaration=True,
-            method='xml'
-        )
+        Args:
+            unit: Unit tuple (or leaf unit tuple)
+            translation: Translated text
+            target_language: Target language
+            state: Unit state store for the file
+            provenance: Where the translation came from (see xlf_provenance), recorded in the unit state
 
-        # Pretty print summary
-        print("\n" + "="*70)
-        print("TRANSLATION SUMMARY")
-        print("="*70)
-        print(f"Total trans-units:     {stats['total']}")
-        print(f"Already translated:    {stats['already_translated']}")
-        print(f"Newly translated:      {stats['translated']}")
-        print(f"Errors:                {stats['errors']}")
-        completion = ((stats['already_translated'] + stats['translated']) / stats['total'] * 100) if stats['total'] > 0 else 0
-        print(f"Completion:            {completion:.1f}%")
-        print("="*70)
+        Returns:
+            (source_text, translation) of the trans-unit if it is now complete, else None
+        """
+        trans_unit, target_elem, source_text = unit[:3]
+        unit_id = trans_unit.get('id')
+
+        if isinstance(target_elem, IcuLeaf):
+            message = target_elem.message
+            message.translations[target_elem.index] = translation
+            if target_elem.shared:
+                self.memory.add(source_text, translation, target_language)
+            translation = message.assemble()
+            if translation is None:
+                if unit_id:
+                    previous = state.get(unit_id) or {'source': message.source, 'target': ''}
+                    state.record(
+                        unit_id, previous['source'], previous['target'],
+                        icu=message.progress(), **provenance_of(previous)
+                    )
+                return None
+            target_elem, source_text = message.unit[1], message.source
+
+        self._set_element_text(target_elem, translation)
+        self.memory.add(source_text, translation, target_language)
+        if unit_id:
+            state.record(unit_id, source_text, translation, **(provenance or {}))
+        return source_text, translation
+
+    def _store_translation(
+        self,
+        unit: tuple,
+        translation: str,
+        target_language: str,
+        state: UnitStateStore,
+        duplicates: Dict[str, list],
+        provenance: Optional[Dict[str, str]] = None
+    ) -> Tuple[int, int]:
+        """
+        Write a translation into its unit and into the units held back as its duplicates.
 
-        return stats
+        Args:
+            unit: Unit tuple (or leaf unit tuple)
+            translation: Translated text
+            target_language: Target language
+            state: Unit state store for the file
+            duplicates: Units held back by source text (entries are consumed)
+            provenance: Where the translation came from (shared by the duplicates)
 
+        Returns:
+            Tuple of (1 if the unit's trans-unit is now complete else 0,
+            number of duplicate trans-units completed)
+        """
+        done = self._write_unit(unit, translation, target_language, state, provenance)
+        # Completed source texts whose duplicates are waiting
+        pending = [done] if done is not None else []
+        if isinstance(unit[1], IcuLeaf) and unit[1].shared:
+            pending.append((unit[2], translation))
+
+        filled = 0
+        while pending:
+            source_text, text = pending.pop()
+            for duplicate in duplicates.pop(source_text, []):
+                duplicate_done = self._write_unit(duplicate, text, target_language, state, provenance)
+                if duplicate_done is not None:
+                    filled += 1
+                    pending.append(duplicate_done)
+        return int(done is not None), filled
+
+    def _in_flight_limit(self) -> int:
+        """Maximum number of batches in flight right now (providers also limit their own share)."""
+        if self.tuner is not None:
+            return self.tuner.in_flight_limit
+        return self.concurrency * len(self.pool.providers)
+
+    def _estimate_tokens(self, unit: tuple) -> int:
+        """
+        Rough token estimate of a unit's prompt text (about 4 characters per token).
 
-def main():
-    """Main entry point for CLI usage"""
-    parser = argparse.ArgumentParser(
-        description='Translate XLIFF files using OpenAI API',
-        formatter_class=argparse.RawDescriptionHelpFormatter,
-        epilog="""
-Examples:
-  # Translate to French
-  python translate_xlf.py -i messages.fr.xlf -l French
+        Args:
+            unit: Unit tuple as produced by _plan_units
 
-  # Translate to Spanish with custom API key
-  python translate_xlf.py -i messages.es.xlf -l Spanish -k sk-...
+        Returns:
+            Estimated number of tokens
+        """
+        return sum(len(text) for text in unit[2:]) // 4 + 1
 
-  # Use GPT-4 for better quality
-  python translate_xlf.py -i messages.de.xlf -l German -m gpt-4
+    def _next_queue(self, queues: List[Tuple[str, deque]]) -> Optional[Tuple[str, deque]]:
+        """
+        Pick the work queue the next batch is taken from.
 
-  # Save to different file
-  python translate_xlf.py -i messages.xlf -l Italian -o messages.it.xlf
+        Without a scheduler, queues are drained in order (edits first); with one,
+        the queue whose next unit has the highest priority goes first.
 
-  # Only translate empty targets
-  python translate_xlf.py -i messages.fr.xlf -l French --skip-existing
+        Args:
+            queues: (kind, queue) pairs
+
+        Returns:
+            (kind, queue), or None if all queues are empty
         """
-    )
+        candidates = [(kind, queue) for kind, queue in queues if queue]
+        if not candidates:
+            return None
+        if self.scheduler is None:
+            return candidates[0]
+        return max(candidates, key=lambda kind_queue: self.scheduler.score(kind_queue[1][0][0]))
+
+    def _take_batch(self, queue: deque, provider: Optional[Provider] = None) -> list:
+        """
+        Take the next batch of units off a work queue.
 
-    parser.add_argument(
-        '-i', '--input',
-        type=Path,
-        required=True,
-        help='Input XLIFF file path'
-    )
+        With auto-tuning, batches are filled up to the tuner's token budget;
+        otherwise they hold batch_size units. Batches for a provider with a small
+        context window are also kept within its max_batch_tokens.
 
-    parser.add_argument(
-        '-l', '--language',
-        type=str,
-        required=True,
-        help='Target language (e.g., French, Spanish, German, Italian)'
-    )
+        Args:
+            queue: Queue of unit tuples
+            provider: Provider the batch will be sent to
 
-    parser.add_argument(
-        '-o', '--output',
-        type=Path,
-        help='Output file path (default: overwrite input file)'
-    )
+        Returns:
+            Non-empty list of unit tuples
+        """
+        limit = provider.max_batch_tokens if provider is not None else None
+        if self.tuner is None and limit is None:
+            return [queue.popleft() for _ in range(min(self.batch_size, len(queue)))]
+
+        if self.tuner is not None:
+            max_items = self.MAX_BATCH_ITEMS
+            budget = self.tuner.batch_token_budget if limit is None else min(limit, self.tuner.batch_token_budget)
+        else:
+            max_items = self.batch_size
+            budget = limit
+        batch = [queue.popleft()]
+        tokens = self._estimate_tokens(batch[0])
+        while queue and len(batch) < max_items:
+            tokens += self._estimate_tokens(queue[0])
+            if tokens > budget:
+                break
+            batch.append(queue.popleft())
+        return batch
+
+    def _send_batch(
+        self,
+        provider: Provider,
+        system: str,
+        user: str,
+        temperature: float,
+        max_tokens: int,
+        expected: int,
+        attempt: int
+    ) -> _BatchResponse:
+        """
+        Send one batch prompt to a provider and release its pool slot.
+
+        Args:
+            provider: Provider with a slot reserved for this request
+            system: System prompt
+            user: Numbered user message
+            temperature: Sampling temperature
+            max_tokens: Maximum response tokens
+            expected: Number of items the response should contain
+            attempt: How many times this batch has been tried (for backoff)
+
+        Returns:
+            Parsed response
+        """
+        started, cpu_started = time.monotonic(), time.thread_time()
+        try:
+            completion = provider.complete(system, user, temperature=temperature, max_tokens=max_tokens)
+        except Exception as e:
+            latency = time.monotonic() - started
+            if self.profiler is not None:
+                self.profiler.record('api', latency, time.thread_time() - cpu_started)
+            self.pool.release(provider, latency, error=e, attempt=attempt)
+            if self.tuner is not None:
+                self.tuner.record(started, latency, rate_limited=is_rate_limited(e), error=True)
+            raise
+
+        latency = time.monotonic() - started
+        if self.profiler is not None:
+            self.profiler.record('api', latency, time.thread_time() - cpu_started)
+        self.pool.release(provider, latency, completion=completion)
+        translations = self._parse_numbered_response(completion.text)
+        if self.tuner is not None:
+            self.tuner.record(started, latency, parse_failed=len(translations) != expected)
+        return _BatchResponse(completion, translations, provider.model)
+
+    def _run_batch(
+        self,
+        kind: str,
+        batch: list,
+        target_language: str,
+        examples: Optional[List[Tuple[str, str]]],
+        provider: Provider,
+        attempt: int = 1
+    ) -> _BatchResult:
+        """
+        Send one batch to a provider and validate the translations (runs on a worker thread).
+
+        API errors are raised so the caller can retry the batch. Latency, rate
+        limits and malformed responses are fed to the provider pool and the
+        auto-tuner. With a hedger, a batch that is slower than usual is also
+        sent to a second provider and the first valid response is used.
+
+        Args:
+            kind: 'translate' or 'edit'
+            batch: Unit tuples as produced by _plan_units
+            target_language: Target language
+            examples: Reference examples for translate batches
+            provider: Provider reserved for this batch with pool.acquire()
+            attempt: How many times this batch has been tried
+
+        Returns:
+            Translations and validation problems, one entry per unit
+        """
+        texts = [source_text for _, _, source_text, *_ in batch]
+        system, user = self._batch_prompt(kind, batch, target_language, examples)
+        temperature, max_tokens = self.REQUEST_PARAMS[kind]
+
+        def send(target: Provider) -> _BatchResponse:
+            return self._send_batch(target, system, user, temperature, max_tokens, len(batch), attempt)
+
+        if self.hedger is None:
+            response = send(provider)
+        else:
+            def hedge():
+                second = self.pool.acquire(avoid=provider, hedge=True)
+                if second is None:
+                    return None
+                tqdm.write(f"🔀 Hedging slow batch of {len(batch)} on {second.label}")
+                return lambda: send(second)
+
+            response = self.hedger.run(
+                lambda: send(provider),
+                hedge,
+                valid=lambda r: len(r.translations) == len(batch),
+                items=len(batch)
+            )
+        translations = response.translations
+        mismatched = len(translations) != len(batch)
+
+        if kind == 'edit':
+            translations = self._complete_edits(translations, len(batch))
+        else:
+            translations = self._complete_translations(translations, texts)
+
+        # Validated here, so the checks overlap with the batches still in flight
+        problems = [
+            self.validator.check(text, translation) if self.validator is not None and translation else []
+            for text, translation in zip(texts, translations)
+        ]
+        return _BatchResult(translations, problems, mismatched, response.model)
+
+    def _batch_prompt(
+        self,
+        kind: str,
+        batch: list,
+        target_language: str,
+        examples: Optional[List[Tuple[str, str]]]
+    ) -> Tuple[str, str]:
+        """
+        Build the prompt of a batch.
+
+        Args:
+            kind: 'translate' or 'edit'
+            batch: Unit tuples as produced by _plan_units
+            target_language: Target language
+            examples: Reference examples for translate batches
+
+        Returns:
+            Tuple of (system_prompt, user_message)
+        """
+        if kind == 'edit':
+            return self._edit_prompt(
+                [(old_source, old_target, source_text)
+                 for _, _, source_text, old_source, old_target in batch],
+                target_language
+            )
+        context = self.composer.batch_context(batch) if self.composer is not None else None
+        forms = {
+            number: unit[1].hint for number, unit in enumerate(batch, 1)
+            if isinstance(unit[1], IcuLeaf) and unit[1].hint
+        }
+        texts = [unit[2] for unit in batch]
+        terms = self.glossary.matches(texts, target_language) if self.glossary is not None else None
+        return self._translation_prompt(texts, target_language, examples, context, forms, terms)
+
+    def _batch_examples(
+        self,
+        batch: List[Tuple[ET.Element, ET.Element, str]],
+        examples: Dict[int, List[MemoryMatch]],
+        limit: int = 10
+    ) -> List[Tuple[str, str]]:
+        """
+        Collect the distinct memory matches of a batch, best first.
+
+        Args:
+            batch: (trans_unit, target_element, source_text) tuples
+            examples: Fuzzy matches by target element object id
+            limit: Maximum number of examples
+
+        Returns:
+            List of (source, translation) pairs
+        """
+        matches = {}
+        for _, target_elem, _ in batch:
+            for match in examples.get(id(target_elem), []):
+                if match.source not in matches or matches[match.source].score < match.score:
+                    matches[match.source] = match
+        best = sorted(matches.values(), key=lambda m: -m.score)[:limit]
+        return [(m.source, m.target) for m in best]
+
+    def _sync_unit_state(
+        self,
+        all_trans_units: List[Tuple[ET.Element, ET.Element, str]],
+        state: UnitStateStore
+    ):
+        """
+        Record translated units that have no state entry yet.
+
+        Existing entries are left alone so that stale units stay detectable
+        until they are actually re-translated.
+
+        Args:
+            all_trans_units: All (trans_unit, target_element, source_text) tuples
+            state: Unit state store for the file
+        """
+        for trans_unit, target_elem, source_text in all_trans_units:
+            unit_id = trans_unit.get('id')
+            if not unit_id or state.get(unit_id) is not None:
+                continue
+            target_text = self._get_element_text(target_elem)
+            if target_text.strip():
+                state.record(unit_id, source_text, target_text)
+
+    def _pool_tokens(self) -> Tuple[int, int]:
+        """Input and output tokens used by all providers so far."""
+        stats = self.pool.stats().values()
+        return sum(s['input_tokens'] for s in stats), sum(s['output_tokens'] for s in stats)
+
+    def _phase(self, name: str):
+        """Context manager timing a phase of the run with the profiler (a no-op without one)."""
+        if self.profiler is None:
+            return contextlib.nullcontext()
+        return self.profiler.phase(name)
+
+    def _finish_profile(self, output_path: Path, stats: dict):
+        """Stop the profiler, print the phase table and write the profile report."""
+        if self.profiler is None:
+            return
+        self.profiler.stop()
+        print("\nProfile (main thread; api = requests on worker threads):")
+        for line in self.profiler.summary():
+            print(f"  {line}")
+        for path in self.profiler.write(output_path, stats):
+            print(f"📈 Profile written to: {path}")
+
+    def _save_progress(
+        self,
+        tree: ET.ElementTree,
+        output_path: Path,
+        state: UnitStateStore,
+        shard_result: Optional[ShardResult] = None
+    ):
+        """
+        Write the XLIFF tree and its unit state sidecar.
+
+        Shard workers write their shard result file instead; the XLIFF and its
+        sidecar are only updated by the merge.
+
+        Args:
+            tree: Parsed XLIFF tree
+            output_path: Path to write the XLIFF file to
+            state: Unit state store for the file
+            shard_result: Shard result of a shard worker
+        """
+        if shard_result is not None:
+            shard_result.collect(self._get_element_text, state)
+            shard_result.save()
+            self.memory.save()
+            return
+
+        tree.write(
+            output_path,
+            encoding='UTF-8',
+            xml_declaration=True,
+            method='xml'
+        )
+        state.save()
+        self.memory.save()
+
+    def plan_file(
+        self,
+        input_file: Path,
+        target_language: str,
+        output_file: Optional[Path] = None,
+        skip_existing: bool = True,
+        root: Optional[ET.Element] = None
+    ) -> dict:
+        """
+        Estimate a translation run without calling any model.
+
+        Extraction, stale detection, deduplication and memory reuse run exactly
+        as in translate_file. The batches and prompts that would be sent are
+        built, and their tokens, cost and wall time are estimated. Nothing is
+        written, and neither the translator's memory nor the given root is
+        changed: memory hits are applied to copies.
+
+        Args:
+            input_file: Path to input XLIFF file
+            target_language: Target language name
+            output_file: Path the run would write to (its unit state is used)
+            skip_existing: If True, skip trans-units that already have up-to-date content
+            root: Parsed XLIFF root to plan instead of reading input_file (e.g. the
+                locale file as a sync would write it, see xlf_sync)
+
+        Returns:
+            Dictionary with unit counts, 'requests', 'input_tokens', 'output_tokens',
+            'cost' (USD, None if a price is unknown) and 'seconds'
+        """
+        root = ET.parse(input_file).getroot() if root is None else copy.deepcopy(root)
+        # The lookup writes reused translations into the units, the memory and the unit state
+        # as a run would: plan with a scratch memory (the state is a fresh copy that is not saved)
+        planner = copy.copy(self)
+        planner.memory = self.memory.copy(target_language)
+        return planner._plan(root, UnitStateStore.for_xliff(output_file or input_file), target_language, skip_existing)
+
+    def _plan(self, root: ET.Element, state: UnitStateStore, target_language: str, skip_existing: bool) -> dict:
+        # Body of plan_file, run on the planning copy of the translator
+        all_trans_units = self.extract_translations(root, skip_existing=False)
+        trans_units_to_process, trans_units_to_edit, stale = self._plan_units(all_trans_units, state, skip_existing)
+        reselected = []
+        if skip_existing and self.retranslate_where:
+            reselected = self._select_by_provenance(
+                all_trans_units, trans_units_to_process + trans_units_to_edit, state, target_language
+            )
+            trans_units_to_process += reselected
+        suspect = []
+        if skip_existing and self.quality_scan:
+            suspect = self._scan_quality(all_trans_units, trans_units_to_process + trans_units_to_edit, target_language)
+            trans_units_to_process += suspect
+
+        pending = {id(unit[0]) for unit in trans_units_to_process + trans_units_to_edit}
+        for trans_unit, target_elem, source_text in all_trans_units:
+            if id(trans_unit) not in pending:
+                self.memory.add(source_text, self._get_element_text(target_elem), target_language, 'file')
+        trans_units_to_process, duplicates, examples, reused = self._lookup_memory(
+            trans_units_to_process, target_language, state, allow_reuse=skip_existing
+        )
+        if self.composer is not None:
+            trans_units_to_process = self.composer.order(trans_units_to_process)
+            trans_units_to_edit = self.composer.order(trans_units_to_edit)
+
+        # Build the batches the run would send (with the primary provider's limits)
+        providers = self.pool.providers
+        requests = []
+        for kind, units in (('edit', trans_units_to_edit), ('translate', trans_units_to_process)):
+            max_tokens = self.REQUEST_PARAMS[kind][1]
+            queue = deque(units)
+            while queue:
+                batch = self._take_batch(queue, self.pool.primary)
+                batch_examples = self._batch_examples(batch, examples) if kind == 'translate' else None
+                system, user = self._batch_prompt(kind, batch, target_language, batch_examples)
+                # Translations run about a third longer than English, plus the numbering
+                output_tokens = sum(int(self.pool.primary.count_tokens(unit[2]) * 1.3) + 3 for unit in batch)
+                requests.append((
+                    self.pool.primary.count_tokens(system) + self.pool.primary.count_tokens(user),
+                    min(output_tokens, max_tokens)
+                ))
+
+        # Batches are spread evenly across the pool's providers
+        costs = [p.cost(sum(r[0] for r in requests), sum(r[1] for r in requests)) for p in providers]
+        latency = sum(
+            sum(p.estimate_latency(input_tokens, output_tokens) for p in providers) / len(providers)
+            for input_tokens, output_tokens in requests
+        )
+        seconds = max(len(requests) * self.delay, latency / self._in_flight_limit()) if requests else 0.0
+
+        return {
+            'total': len(all_trans_units),
+            'already_translated': len(all_trans_units) - len(pending),
+            'stale': stale,
+            'reselected': len(reselected),
+            'suspect': len(suspect),
+            'to_translate': len(trans_units_to_process),
+            'to_edit': len(trans_units_to_edit),
+            'duplicates': sum(len(units) for units in duplicates.values()),
+            'reused': reused,
+            'requests': len(requests),
+            'input_tokens': sum(r[0] for r in requests),
+            'output_tokens': sum(r[1] for r in requests),
+            'cost': None if None in costs else sum(costs) / len(costs),
+            'seconds': seconds,
+        }
+
+    @classmethod
+    def merge_shards(
+        cls,
+        xliff_path: Path,
+        target_language: str,
+        shard_paths: Optional[List[Path]] = None
+    ) -> dict:
+        """
+        Apply the shard result files of a sharded run to the XLIFF file in one pass.
+
+        Every shard must be present, and assigned units must have a result. Units
+        with conflicting results (several shards, or a source that changed since
+        the shard ran) keep their current target. Shard files are removed after
+        a clean merge.
+
+        Args:
+            xliff_path: XLIFF file the shard workers wrote their results next to
+            target_language: Target language name
+            shard_paths: Shard result files (default: all next to xliff_path)
+
+        Returns:
+            Dictionary with 'shards', 'merged', 'conflicts', 'uncovered' and 'missing_shards' counts
+        """
+        shard_paths = shard_paths if shard_paths is not None else ShardResult.find(xliff_path)
+        print(f"\n{'='*70}")
+        print(f"Merging {len(shard_paths)} shard results into {xliff_path.name}")
+        print(f"{'='*70}")
+
+        # No translator instance registered the namespace: keep it as the default on write
+        ET.register_namespace('', cls.XLIFF_NS)
+        tree = ET.parse(xliff_path)
+        units = {
+            unit_key(trans_unit.get('id'), source_text): (trans_unit, target_elem, source_text)
+            for trans_unit, target_elem, source_text in cls.extract_translations(tree.getroot())
+        }
+        shards = [ShardResult.load(path) for path in shard_paths]
+        plan: MergePlan = plan_merge(
+            {key: source_text for key, (_, _, source_text) in units.items()},
+            shards,
+            target_language
+        )
+
+        provenance = {
+            key: result.get('provenance', {}) for shard in shards for key, result in shard.results.items()
+        }
+        state = UnitStateStore.for_xliff(xliff_path)
+        for key, target in plan.apply.items():
+            trans_unit, target_elem, source_text = units[key]
+            cls._set_element_text(target_elem, target)
+            if trans_unit.get('id'):
+                state.record(trans_unit.get('id'), source_text, target, **provenance[key])
+
+        if plan.apply:
+            tree.write(xliff_path, encoding='UTF-8', xml_declaration=True, method='xml')
+            state.save()
+
+        for conflict in plan.conflicts:
+            print(f"⚠ Conflict: {conflict}")
+        if plan.missing_shards:
+            print(f"⚠ Missing shard results: {', '.join(str(i) for i in plan.missing_shards)}")
+        if plan.uncovered:
+            print(f"⚠ {len(plan.uncovered)} assigned units have no result (failed in their shard)")
+
+        stats = {
+            'shards': len(shards),
+            'merged': len(plan.apply),
+            'conflicts': len(plan.conflicts),
+            'uncovered': len(plan.uncovered),
+            'missing_shards': len(plan.missing_shards),
+        }
+        print(f"Merged: {stats['merged']}, conflicts: {stats['conflicts']}, "
+              f"uncovered: {stats['uncovered']}, missing shards: {stats['missing_shards']}")
+
+        if shards and not (plan.conflicts or plan.uncovered or plan.missing_shards):
+            for path in shard_paths:
+                path.unlink()
+            print("✓ Clean merge, shard result files removed")
+
+        return stats
+
+    def translate_file(
+        self,
+        input_file: Path,
+        target_language: str,
+        output_file: Optional[Path] = None,
+        skip_existing: bool = True,
+        save_frequency: int = 5,
+        shard: Optional[Tuple[int, int]] = None
+    ) -> dict:
+        """
+        Translate an XLIFF file with progress tracking and auto-save.
+
+        Args:
+            input_file: Path to input XLIFF file
+            target_language: Target language name (e.g., 'French', 'Spanish')
+            output_file: Path to output file (defaults to overwriting input)
+            skip_existing: If True, skip trans-units that already have up-to-date content in target
+            save_frequency: Save file every N batches (default: 5)
+            shard: Optional (index, count) to translate only one shard of the pending
+                units and write a shard result file instead of the XLIFF (see merge_shards)
+
+        Returns:
+            Dictionary with translation statistics
+        """
+        print(f"\n{'='*70}")
+        print(f"XLIFF Translation: {input_file.name} → {target_language}")
+        print(f"Model: {', '.join(p.label for p in self.pool.providers)}")
+        print(f"{'='*70}")
+
+        if self.profiler is not None:
+            self.profiler.start()
+        # Each run gets its own breaker, so concurrent runs sharing the translator do not trip each other
+        breaker = self.breaker.fresh() if self.breaker is not None else None
+
+        # Parse XML
+        with self._phase('parse'):
+            tree = ET.parse(input_file)
+            root = tree.getroot()
+
+            # Determine output path (the unit state sidecar and shard results live next to it)
+            output_path = output_file or input_file
+            state = UnitStateStore.for_xliff(output_path)
+
+        # Extract all translation units and split them into full translations and edits
+        with self._phase('extract'):
+            all_trans_units = self.extract_translations(root, skip_existing=False)
+            trans_units_to_process, trans_units_to_edit, stale = self._plan_units(
+                all_trans_units, state, skip_existing
+            )
+
+        # Existing translations selected by provenance or that look wrong are translated
+        # again (before they seed the memory)
+        reselected = []
+        suspect = []
+        if skip_existing and (self.retranslate_where or self.quality_scan):
+            with self._phase('scan'):
+                if self.retranslate_where:
+                    reselected = self._select_by_provenance(
+                        all_trans_units, trans_units_to_process + trans_units_to_edit, state, target_language
+                    )
+                    trans_units_to_process += reselected
+                if self.quality_scan:
+                    suspect = self._scan_quality(
+                        all_trans_units, trans_units_to_process + trans_units_to_edit, target_language
+                    )
+                    trans_units_to_process += suspect
+
+        total_units = len(all_trans_units)
+        already_translated = total_units - len(trans_units_to_process) - len(trans_units_to_edit)
+
+        # Seed the translation memory with the up-to-date targets of this file
+        pending = {id(unit[0]) for unit in trans_units_to_process + trans_units_to_edit}
+        with self._phase('memory'):
+            for trans_unit, target_elem, source_text in all_trans_units:
+                if id(trans_unit) not in pending:
+                    self.memory.add(source_text, self._get_element_text(target_elem), target_language, 'file')
+
+        # Shard workers keep only the pending units that hash to their shard
+        shard_result = None
+        other_shards = 0
+        if shard is not None:
+            index, count = shard
+            shard_result = ShardResult(ShardResult.path_for(output_path, index, count), index, count, target_language)
+
+            def in_shard(unit):
+                return shard_of(unit_key(unit[0].get('id'), unit[2]), count) == index
+
+            other_shards = len(pending)
+            trans_units_to_process = [unit for unit in trans_units_to_process if in_shard(unit)]
+            trans_units_to_edit = [unit for unit in trans_units_to_edit if in_shard(unit)]
+            for trans_unit, target_elem, source_text, *_ in trans_units_to_process + trans_units_to_edit:
+                shard_result.assign(
+                    unit_key(trans_unit.get('id'), source_text),
+                    source_text,
+                    target_elem,
+                    self._get_element_text(target_elem),
+                    trans_unit.get('id')
+                )
+            other_shards -= len(shard_result.assigned)
+
+        with self._phase('memory'):
+            trans_units_to_process, duplicates, examples, reused = self._lookup_memory(
+                trans_units_to_process, target_language, state, allow_reuse=skip_existing
+            )
+
+        # Related strings next to each other, so they share batches (priority order below is stable)
+        if self.composer is not None:
+            with self._phase('compose'):
+                trans_units_to_process = self.composer.order(trans_units_to_process)
+                trans_units_to_edit = self.composer.order(trans_units_to_edit)
+
+        # Most valuable units first, so a run cut short by its budget has translated them
+        if self.scheduler is not None:
+            self.scheduler.start()
+            trans_units_to_process = self.scheduler.order(trans_units_to_process)
+            trans_units_to_edit = self.scheduler.order(trans_units_to_edit)
+
+        to_translate = len(trans_units_to_process)
+        to_edit = len(trans_units_to_edit)
+        num_duplicates = sum(len(units) for units in duplicates.values())
+        to_process = to_translate + to_edit
+        icu_leaves = [unit[1] for unit in trans_units_to_process if isinstance(unit[1], IcuLeaf)]
+        icu_messages = len({id(leaf.message) for leaf in icu_leaves})
+
+        print(f"Total trans-units: {total_units}")
+        print(f"Already translated: {already_translated}")
+        if shard is not None:
+            print(f"Shard {shard[0]}/{shard[1]}: {len(shard_result.assigned)} units ({other_shards} in other shards)")
+        if stale:
+            print(f"Stale (source changed): {stale}")
+        if reselected:
+            print(f"Selected by provenance: {len(reselected)}")
+        if suspect:
+            print(f"Suspect (quality scan): {len(suspect)}")
+        if reused:
+            print(f"Reused from translation memory: {reused}")
+        if num_duplicates:
+            print(f"Duplicate source strings: {num_duplicates}")
+        print(f"To translate: {to_translate}")
+        if icu_messages:
+            print(f"  ICU plural/select messages: {icu_messages} (split into {len(icu_leaves)} strings)")
+        if to_edit:
+            print(f"To edit (minor source change): {to_edit}")
+        if self.scheduler is not None:
+            prioritized = sum(
+                1 for unit in trans_units_to_process + trans_units_to_edit if self.scheduler.score(unit[0]) >= 1
+            )
+            print(f"Prioritized: {prioritized} units match a priority rule (budget: {self.scheduler.describe()})")
+        print(f"{'='*70}\n")
+
+        stats = {
+            'total': total_units,
+            'already_translated': already_translated,
+            'stale': stale,
+            'reselected': len(reselected),
+            'suspect': len(suspect),
+            'translated': 0,
+            'edited': 0,
+            'reused': reused,
+            'deferred': 0,
+            'invalid': 0,
+            'errors': 0,
+            'aborted': False,
+            'icu_messages': icu_messages,
+            'units_sent': 0,
+            'input_tokens': 0,
+            'output_tokens': 0
+        }
+        tokens_before = self._pool_tokens()
+
+        if to_process == 0:
+            if reused:
+                print(f"✓ All remaining translations reused from memory, saving to: "
+                      f"{shard_result.path if shard_result else output_path}")
+                with self._phase('save'):
+                    self._sync_unit_state(all_trans_units, state)
+                    self._save_progress(tree, output_path, state, shard_result)
+            else:
+                print("✓ All translations complete! Nothing to do.")
+                with self._phase('save'):
+                    self._sync_unit_state(all_trans_units, state)
+                    if shard_result is not None:
+                        self._save_progress(tree, output_path, state, shard_result)
+                    else:
+                        state.save()
+            self._finish_profile(output_path, stats)
+            return stats
+
+        # Work queues: edits are cheap, so they go first; each batch holds only one kind of request
+        queues = [('edit', deque(trans_units_to_edit)), ('translate', deque(trans_units_to_process))]
+
+        # Create progress bar for batches (the total is re-estimated as batch sizes change)
+        batch_progress = tqdm(
+            total=math.ceil(to_edit / self.batch_size) + math.ceil(to_translate / self.batch_size),
+            desc="Batches",
+            unit="batch",
+            position=0,
+            leave=True
+        )
+
+        # Create progress bar for individual translations
+        translation_progress = tqdm(
+            total=to_process,
+            desc="Translations",
+            unit="item",
+            position=1,
+            leave=True
+        )
+
+        interrupted = False
+        completed = 0
+        dispatched = 0
+        last_dispatch = None
+        retries: Dict[int, int] = {}
+        in_flight = {}
+        # Budget accounting: estimated cost of batches in flight, units left for the next run
+        committed: Dict[object, float] = {}
+        # When each batch finished (results arriving after the time budget are not counted)
+        finished_at: Dict[object, float] = {}
+        budget_reason = None
+        deferred = []
+        if self.tuner is not None:
+            max_workers = self.tuner.max_concurrency
+        else:
+            max_workers = self.concurrency * len(self.pool.providers)
+        pool = ThreadPoolExecutor(max_workers=max_workers)
+        try:
+            while any(queue for _, queue in queues) or in_flight:
+                # Keep up to the in-flight limit busy, spacing request starts by `delay`
+                while len(in_flight) < self._in_flight_limit():
+                    if breaker is not None and not breaker.allow(len(in_flight)):
+                        break
+                    queue_kind = self._next_queue(queues)
+                    if queue_kind is None:
+                        break
+                    kind, queue = queue_kind
+
+                    if last_dispatch is not None:
+                        with self._phase('throttle'):
+                            time.sleep(max(0.0, last_dispatch + self.delay - time.monotonic()))
+
+                    # The provider with the most free capacity gets the batch
+                    provider = self.pool.acquire()
+                    if provider is None:
+                        break
+
+                    batch = self._take_batch(queue, provider)
+                    if breaker is not None and breaker.probing and len(batch) > breaker.probe_size:
+                        # A small probe decides whether the run resumes
+                        queue.extendleft(reversed(batch[breaker.probe_size:]))
+                        batch = batch[:breaker.probe_size]
+
+                    if self.scheduler is not None:
+                        next_cost = self.scheduler.estimate_cost(
+                            sum(self._estimate_tokens(unit) for unit in batch), provider, self.pool.spent()
+                        )
+                        budget_reason = self.scheduler.exhausted(
+                            self.pool.spent(),
+                            sum(committed.values()),
+                            next_cost,
+                            self.pool.stats()[provider.label]['latency']
+                        )
+                        if budget_reason == 'cost' and in_flight:
+                            # Estimates of batches in flight are conservative: wait for their actual cost
+                            self.pool.cancel(provider)
+                            queue.extendleft(reversed(batch))
+                            budget_reason = None
+                            break
+                        if budget_reason is not None:
+                            # Leave everything not yet sent for the next run
+                            self.pool.cancel(provider)
+                            deferred.extend(batch)
+                            for _, q in queues:
+                                deferred.extend(q)
+                                q.clear()
+                            tqdm.write(
+                                f"{'⏱' if budget_reason == 'time' else '💰'} "
+                                f"{'Time budget' if budget_reason == 'time' else 'Cost limit'} reached, "
+                                f"finishing {len(in_flight)} batches in flight"
+                            )
+                            break
+
+                    attempt = max(retries.get(id(unit[1]), 0) for unit in batch) + 1
+                    batch_examples = self._batch_examples(batch, examples) if kind == 'translate' else None
+                    future = pool.submit(
+                        self._run_batch, kind, batch, target_language, batch_examples, provider, attempt
+                    )
+                    dispatched += 1
+                    stats['units_sent'] += len(batch)
+                    in_flight[future] = (dispatched, kind, batch, provider)
+                    if self.scheduler is not None:
+                        committed[future] = next_cost
+                        future.add_done_callback(lambda f: finished_at.setdefault(f, time.monotonic()))
+                    last_dispatch = time.monotonic()
+
+                    remaining = sum(len(q) for _, q in queues)
+                    batch_progress.total = dispatched + math.ceil(remaining / len(batch))
+                    batch_progress.refresh()
+
+                if not in_flight:
+                    # Every provider is cooling down after rate limits or errors, or the breaker is open
+                    pause = self.pool.next_available_in()
+                    if breaker is not None:
+                        pause = max(pause, breaker.pause_remaining())
+                    with self._phase('throttle'):
+                        time.sleep(max(0.05, pause))
+                    continue
+
+                remaining_time = self.scheduler.remaining_time() if self.scheduler is not None else None
+                with self._phase('wait'):
+                    done, _ = wait(
+                        in_flight,
+                        timeout=None if remaining_time is None else max(0.0, remaining_time),
+                        return_when=FIRST_COMPLETED
+                    )
+                deadline = self.scheduler.deadline() if self.scheduler is not None else None
+                if deadline is not None:
+                    # Results that came in after the deadline are treated like batches still in flight
+                    # (done callbacks run just after the future completes: missing means just now)
+                    done = {future for future in done if finished_at.get(future, time.monotonic()) <= deadline}
+                if not done:
+                    # Out of time: batches still in flight are left for the next run. Those not started
+                    # yet are cancelled; requests already sent cannot be recalled and finish in the
+                    # background (they are billed, and the process waits for them before it exits)
+                    cancelled = sum(future.cancel() for future in in_flight)
+                    tqdm.write(f"⏱ Time budget reached, abandoning {len(in_flight)} batches in flight"
+                               f"{f' ({cancelled} not started yet, cancelled)' if cancelled else ''}")
+                    budget_reason = 'time'
+                    for _, _, batch, _ in in_flight.values():
+                        deferred.extend(batch)
+                    for _, q in queues:
+                        deferred.extend(q)
+                        q.clear()
+                    in_flight.clear()
+                    break
+
+                for future in done:
+                    batch_num, kind, batch, provider = in_flight.pop(future)
+                    committed.pop(future, None)
+                    finished_at.pop(future, None)
+                    try:
+                        translations, problems, mismatched, model = future.result()
+                        provenance = {
+                            'origin': 'edit' if kind == 'edit' else 'translation',
+                            'model': model,
+                            'prompt': self.prompt_hashes()[kind],
+                            'at': timestamp(),
+                        }
+                        if breaker is not None:
+                            unusable = sum(1 for t, p in zip(translations, problems) if p or not t)
+                            breaker.record(not mismatched and unusable * 2 <= len(batch))
+                        if self.scheduler is not None:
+                            self.scheduler.record(sum(self._estimate_tokens(unit) for unit in batch))
+
+                        # Update XML
+                        invalid = []
+                        with self._phase('apply'):
+                            for unit, translation, unit_problems in zip(batch, translations, problems):
+                                trans_unit, target_elem, source_text = unit[:3]
+                                if unit_problems:
+                                    # Only the failing units are sent again; they are never written
+                                    attempts = retries.get(id(target_elem), 0) + 1
+                                    if attempts <= self.MAX_RETRIES:
+                                        retries[id(target_elem)] = attempts
+                                        invalid.append(unit)
+                                        continue
+                                    tqdm.write(f"❌ {trans_unit.get('id') or source_text[:40]} failed validation "
+                                               f"({'; '.join(map(str, unit_problems))}), left untranslated")
+                                    stats['invalid'] += 1
+                                    stats['errors'] += 1
+                                elif translation and (kind == 'edit' or translation != source_text):
+                                    # Units with the same source text get the same translation
+                                    done, filled = self._store_translation(
+                                        unit, translation, target_language, state, duplicates, provenance
+                                    )
+                                    stats['edited' if kind == 'edit' else 'translated'] += done
+                                    stats['reused'] += filled
+                                else:
+                                    stats['errors'] += 1
+
+                                translation_progress.update(1)
+
+                        if invalid:
+                            dict(queues)[kind].extendleft(reversed(invalid))
+                            tqdm.write(f"🔁 Batch {batch_num}: requeued {len(invalid)} units that failed validation "
+                                       f"({', '.join(unit[0].get('id') or '?' for unit in invalid)})")
+
+                    except Exception as e:
+                        if breaker is not None and not is_rate_limited(e):
+                            breaker.record(False)
+                        attempts = max(retries.get(id(unit[1]), 0) for unit in batch) + 1
+                        retryable = is_rate_limited(e) or len(self.pool.providers) > 1
+                        if retryable and attempts <= self.MAX_RETRIES:
+                            # Put the units back at the front of their queue; the pool keeps
+                            # the failing provider out of rotation while it cools down
+                            for unit in batch:
+                                retries[id(unit[1])] = attempts
+                            dict(queues)[kind].extendleft(reversed(batch))
+                            reason = 'rate limited' if is_rate_limited(e) else f'failed ({e})'
+                            tqdm.write(f"⏳ Batch {batch_num} {reason} on {provider.label}, requeued")
+                        else:
+                            tqdm.write(f"❌ Error in batch {batch_num}: {e}")
+                            stats['errors'] += len(batch)
+                            translation_progress.update(len(batch))
+
+                    batch_progress.update(1)
+                    if not self.pool.unpriced():
+                        limit = f" of ${self.scheduler.max_cost:g}" if self.scheduler and self.scheduler.max_cost else ''
+                        translation_progress.set_postfix_str(f"${self.pool.spent():.4f}{limit}")
+
+                    # Save periodically to preserve progress
+                    completed += 1
+                    if completed % save_frequency == 0:
+                        with self._phase('save'):
+                            self._save_progress(tree, output_path, state, shard_result)
+                        tqdm.write(f"💾 Progress saved to {(shard_result.path if shard_result else output_path).name}")
+
+                if breaker is not None and breaker.aborted:
+                    # Everything not yet translated is left for the next run
+                    stats['aborted'] = True
+                    for future, (_, _, batch, _) in in_flight.items():
+                        future.cancel()
+                        deferred.extend(batch)
+                    for _, q in queues:
+                        deferred.extend(q)
+                        q.clear()
+                    in_flight.clear()
+                    break
+
+        except KeyboardInterrupt:
+            interrupted = True
+            print("\n\n⚠ Translation interrupted by user!")
+            print("Saving progress before exit...")
+
+        finally:
+            # Results of batches still in flight are discarded
+            pool.shutdown(wait=False, cancel_futures=True)
+            batch_progress.close()
+            translation_progress.close()
+
+        if self.tuner is not None:
+            print(self.tuner.summary())
+        if self.hedger is not None:
+            print(self.hedger.summary())
+        if breaker is not None and breaker.trips:
+            print(breaker.summary())
+        if len(self.pool.providers) + len(self.pool.hedge_providers) > 1:
+            print("Providers:")
+            for line in self.pool.summary():
+                print(f"  {line}")
+
+        input_tokens, output_tokens = self._pool_tokens()
+        stats['input_tokens'] = input_tokens - tokens_before[0]
+        stats['output_tokens'] = output_tokens - tokens_before[1]
+
+        # Units left by the budget (and their duplicates) are picked up by the next run
+        for unit in deferred:
+            stats['deferred'] += 1 + len(duplicates.pop(unit[2], []))
+        if budget_reason is not None:
+            limit = 'time budget' if budget_reason == 'time' else 'cost limit'
+            print(f"{'⏱' if budget_reason == 'time' else '💰'} Stopped at the {limit} "
+                  f"({self.scheduler.describe()}, spent ${self.pool.spent():.4f}): "
+                  f"{stats['deferred']} units deferred to the next run")
+        if stats['aborted']:
+            print(f"🛑 Aborted by the circuit breaker: {stats['deferred']} units deferred to the next run")
+
+        # Duplicates of units that failed are still untranslated
+        if not interrupted:
+            stats['errors'] += sum(len(units) for units in duplicates.values())
+
+        # Final save
+        print(f"\n💾 Saving final results to: {shard_result.path if shard_result else output_path}")
+        with self._phase('save'):
+            self._sync_unit_state(all_trans_units, state)
+            self._save_progress(tree, output_path, state, shard_result)
+
+        # Pretty print summary
+        print("\n" + "="*70)
+        print("TRANSLATION SUMMARY")
+        print("="*70)
+        print(f"Total trans-units:     {stats['total']}")
+        print(f"Already translated:    {stats['already_translated']}")
+        print(f"Newly translated:      {stats['translated']}")
+        print(f"Minimal edits:         {stats['edited']}")
+        print(f"Reused from memory:    {stats['reused']}")
+        if stats['deferred']:
+            print(f"Deferred to next run:  {stats['deferred']}")
+        print(f"Errors:                {stats['errors']}")
+        if stats['invalid']:
+            print(f"  Failed validation:   {stats['invalid']}")
+        if stats['units_sent']:
+            sent = stats['units_sent']
+            print(f"Tokens per unit:       {(stats['input_tokens'] + stats['output_tokens']) / sent:.1f} "
+                  f"({stats['input_tokens'] / sent:.1f} in, {stats['output_tokens'] / sent:.1f} out)")
+        completion = ((stats['already_translated'] + stats['translated'] + stats['edited'] + stats['reused']) / stats['total'] * 100) if stats['total'] > 0 else 0
+        print(f"Completion:            {completion:.1f}%")
+        print("="*70)
+
+        self._finish_profile(output_path, stats)
+        return stats
+
+
+def _format_duration(seconds: float) -> str:
+    minutes, seconds = divmod(int(round(seconds)), 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return f"{hours}h {minutes:02d}m"
+    return f"{minutes}m {seconds:02d}s" if minutes else f"{seconds}s"
+
+
+def print_plans(plans: Dict[str, dict], models: str):
+    """
+    Print run estimates as a table, one row per locale file, with totals.
+
+    Files are translated one after another, so their times add up.
+
+    Args:
+        plans: File name -> estimate as returned by XLIFFTranslator.plan_file
+        models: Provider labels the estimate is for
+    """
+    print(f"\n{'='*70}")
+    print(f"RUN PLAN (no requests sent): {models}")
+    print(f"{'='*70}")
+    print(f"{'locale file':<22} {'pending':>8} {'reused':>7} {'requests':>9} {'tokens in/out':>16} {'cost':>9} {'time':>9}")
+    totals = {'pending': 0, 'reused': 0, 'requests': 0, 'input_tokens': 0, 'output_tokens': 0, 'seconds': 0.0}
+    total_cost = 0.0
+    for name, plan in plans.items():
+        pending = plan['to_translate'] + plan['to_edit'] + plan['duplicates']
+        cost = f"${plan['cost']:.4f}" if plan['cost'] is not None else 'n/a'
+        print(f"{name:<22} {pending:>8} {plan['reused']:>7} {plan['requests']:>9} "
+              f"{plan['input_tokens']:>8}/{plan['output_tokens']:<7} {cost:>9} {_format_duration(plan['seconds']):>9}")
+        totals['pending'] += pending
+        for key in ('reused', 'requests', 'input_tokens', 'output_tokens', 'seconds'):
+            totals[key] += plan[key]
+        total_cost = None if total_cost is None or plan['cost'] is None else total_cost + plan['cost']
+    if len(plans) > 1:
+        cost = f"${total_cost:.4f}" if total_cost is not None else 'n/a'
+        print(f"{'total':<22} {totals['pending']:>8} {totals['reused']:>7} {totals['requests']:>9} "
+              f"{totals['input_tokens']:>8}/{totals['output_tokens']:<7} {cost:>9} {_format_duration(totals['seconds']):>9}")
+    print(f"{'='*70}")
+    print("Time assumes the configured concurrency and delay (auto-tune may be faster).")
+
+
+DEFAULT_EPILOG = """
+Examples:
+  # Translate to French
+  python translate_xlf.py -i messages.fr.xlf -l French
+
+  # Translate to Spanish with custom API key
+  python translate_xlf.py -i messages.es.xlf -l Spanish -k sk-...
+
+  # Use GPT-4 for better quality
+  python translate_xlf.py -i messages.de.xlf -l German -m gpt-4
+
+  # Save to different file
+  python translate_xlf.py -i messages.xlf -l Italian -o messages.it.xlf
 
+  # Only translate empty targets
+  python translate_xlf.py -i messages.fr.xlf -l French --skip-existing
+
+  # Spread batches over OpenAI and Claude, failing over when one is degraded
+  python translate_xlf.py -i messages.fr.xlf -l French --auto-tune \\
+      --provider anthropic:claude-haiku-4-5-20251001
+        """
+
+
+def add_translator_arguments(parser: argparse.ArgumentParser, provider_class: type = OpenAIProvider):
+    """
+    Add the provider, batching, memory and cassette options shared by the CLI tools.
+
+    Args:
+        parser: Argument parser to extend
+        provider_class: Primary provider (sets the default API key variable and model)
+    """
     parser.add_argument(
         '-k', '--api-key',
         type=str,
-        help='OpenAI API key (default: read from OPENAI_API_KEY env var)'
+        help=f'{provider_class.display_name} API key (default: read from {provider_class.API_KEY_ENV} env var)'
     )
 
     parser.add_argument(
         '-m', '--model',
         type=str,
-        default='gpt-3.5-turbo',
-        help='OpenAI model to use (default: gpt-3.5-turbo)'
+        help=f'{provider_class.display_name} model to use (default: {provider_class.DEFAULT_MODEL})'
+    )
+
+    parser.add_argument(
+        '--base-url',
+        type=str,
+        help='Use a local OpenAI-compatible server (llama.cpp, vLLM, Ollama, ...) at this URL, '
+             'e.g. http://localhost:8080/v1, instead of the hosted API'
+    )
+
+    parser.add_argument(
+        '--context-tokens',
+        type=int,
+        default=4096,
+        help='Context window of the local model; batches and response length are kept within it (default: 4096)'
+    )
+
+    parser.add_argument(
+        '--request-timeout',
+        type=float,
+        default=600.0,
+        help='Request timeout in seconds for the local server (default: 600)'
+    )
+
+    parser.add_argument(
+        '--no-system-role',
+        action='store_true',
+        help='Local model has no system role in its chat template (the instructions go into the user message)'
+    )
+
+    parser.add_argument(
+        '--provider',
+        action='append',
+        default=[],
+        metavar='NAME:MODEL[@KEY_ENV]',
+        help='Additional provider to balance batches across, e.g. anthropic:claude-haiku-4-5-20251001 '
+             'or openai:gpt-4o-mini@OPENAI_API_KEY_2 (repeatable; -k/-m stay the primary provider)'
     )
 
     parser.add_argument(
         '-b', '--batch-size',
         type=int,
-        default=10,
-        help='Number of translations per API call (default: 10)'
+        help='Number of translations per API call (default: from probe report, else 10)'
     )
 
     parser.add_argument(
         '-d', '--delay',
         type=float,
+        help='Delay in seconds between API calls (default: from probe report, else 1.0)'
+    )
+
+    parser.add_argument(
+        '-c', '--concurrency',
+        type=int,
+        help='Number of API calls in flight at once (default: from probe report, else 1)'
+    )
+
+    parser.add_argument(
+        '--auto-tune',
+        action='store_true',
+        help='Adapt batch size and concurrency during the run (AIMD on rate limits, latency '
+             'and malformed responses); --batch-size/--concurrency become starting points'
+    )
+
+    parser.add_argument(
+        '--max-concurrency',
+        type=int,
+        default=16,
+        help='Upper bound for auto-tuned concurrency (default: 16)'
+    )
+
+    parser.add_argument(
+        '--latency-target',
+        type=float,
+        help='Auto-tune shrinks batches that take longer than this many seconds '
+             '(default: 20, 120 with --base-url)'
+    )
+
+    parser.add_argument(
+        '--hedge-percentile',
+        type=float,
+        help='Re-send a batch to a second provider once it is slower than this latency '
+             'percentile of recent batches, e.g. 95 (default: no hedging)'
+    )
+
+    parser.add_argument(
+        '--hedge-provider',
+        action='append',
+        default=[],
+        metavar='NAME:MODEL[@KEY_ENV]',
+        help='Provider reserved for hedged requests (repeatable; default: another --provider, '
+             'or the same one)'
+    )
+
+    parser.add_argument(
+        '--hedge-max-rate',
+        type=float,
+        default=0.1,
+        help='Maximum share of batches that may be hedged (default: 0.1)'
+    )
+
+    parser.add_argument(
+        '--hedge-max-overhead',
+        type=float,
+        default=0.1,
+        help='Maximum share of tokens that may be spent on discarded hedge responses (default: 0.1)'
+    )
+
+    parser.add_argument(
+        '--prioritize',
+        action='store_true',
+        help='Translate high-priority units first (lobby, deposit, KYC, responsible gaming, ...)'
+    )
+
+    parser.add_argument(
+        '--priority-file',
+        type=Path,
+        help="Priority rules, one 'pattern weight' per line, matched against source files and unit ids "
+             "(implies --prioritize)"
+    )
+
+    parser.add_argument(
+        '--time-budget',
+        type=parse_duration,
+        help='Stop sending batches when this time is up (e.g. 900, 15m, 1h) and save; implies --prioritize'
+    )
+
+    parser.add_argument(
+        '--max-cost',
+        type=float,
+        help='Stop sending batches before spending more than this many USD; implies --prioritize'
+    )
+
+    parser.add_argument(
+        '--breaker-threshold',
+        type=float,
+        default=0.5,
+        help='Pause the run when this share of the last 10 batches failed or came back mismatched, '
+             'then probe with a small batch (default: 0.5, 0 disables the circuit breaker)'
+    )
+
+    parser.add_argument(
+        '--breaker-cooldown',
+        type=float,
+        default=30.0,
+        help='Seconds to pause before probing after the circuit breaker trips (doubles after each '
+             'failed probe; default: 30)'
+    )
+
+    parser.add_argument(
+        '--breaker-probes',
+        type=int,
+        default=3,
+        help='Abort the run (saving progress) after this many failed probes (default: 3)'
+    )
+
+    parser.add_argument(
+        '--profile',
+        action='store_true',
+        help='Time each phase of the run (parse, extract, API wait, XML updates, saves) with peak '
+             'memory, and write <output>.profile.json'
+    )
+
+    parser.add_argument(
+        '--profile-cpu',
+        action='store_true',
+        help='Also profile the main thread with cProfile and write <output>.prof for pstats '
+             '(implies --profile)'
+    )
+
+    parser.add_argument(
+        '--probe-report',
+        type=Path,
+        help='Probe report from the connection test script (--probe) used for the defaults above '
+             f'(default: scripts/probe-{provider_class.name}.json if present)'
+    )
+
+    parser.add_argument(
+        '--cassette',
+        type=Path,
+        help='Record/replay API responses to/from this JSON Lines file'
+    )
+
+    parser.add_argument(
+        '--cassette-mode',
+        choices=Cassette.MODES,
+        default='auto',
+        help='record: always call the API; replay: offline only, fail on unknown requests; '
+             'auto: replay known requests and record new ones (default: auto)'
+    )
+
+    parser.add_argument(
+        '--edit-threshold',
+        type=float,
+        default=0.75,
+        help='Source similarity (0-1) above which changed strings get a minimal edit '
+             'of their previous translation (default: 0.75)'
+    )
+
+    parser.add_argument(
+        '--no-edit-aware',
+        action='store_true',
+        help='Always re-translate changed source strings from scratch'
+    )
+
+    parser.add_argument(
+        '--batch-order',
+        choices=['locality', 'document'],
+        default='locality',
+        help='locality: batch strings of the same component and similar strings together; '
+             'document: batch them in file order (default: locality)'
+    )
+
+    parser.add_argument(
+        '--no-validate',
+        action='store_true',
+        help='Apply translations without checking placeholders, tags, ICU structure and length'
+    )
+
+    parser.add_argument(
+        '--no-icu-split',
+        action='store_true',
+        help='Send ICU plural/select messages as a whole instead of translating their strings separately'
+    )
+
+    parser.add_argument(
+        '--quality-scan',
+        action='store_true',
+        help='Re-translate existing translations that a local quality scan finds suspect '
+             '(untranslated copies, wrong language or script, broken placeholders, glossary violations)'
+    )
+
+    parser.add_argument(
+        '--quality-threshold',
+        type=float,
         default=1.0,
-        help='Delay in seconds between API calls (default: 1.0)'
+        help='Quality scan: score from which a translation is suspect; each signal counts 1, '
+             'a length outlier 0.5 (default: 1)'
+    )
+
+    parser.add_argument(
+        '--glossary',
+        type=Path,
+        help='Glossary JSON file ({language: {term: translation}}, "*" for all languages); its terms '
+             'are added to the prompt and checked by --quality-scan'
+    )
+
+    parser.add_argument(
+        '--retranslate-where',
+        type=parse_selector,
+        action='append',
+        default=[],
+        metavar='SELECTOR',
+        help='Re-translate existing translations whose recorded provenance matches, e.g. '
+             '"model=gpt-3.5-turbo", "prompt!=current" or "model=gpt-4*,at<2026-06-01" '
+             '(fields origin, model, prompt, at; comma = and; repeatable = or)'
+    )
+
+    parser.add_argument(
+        '--max-length-ratio',
+        type=float,
+        default=3.0,
+        help='Validation: maximum length ratio between translation and source, in either direction '
+             '(default: 3, 0 disables the check)'
+    )
+
+    parser.add_argument(
+        '--memory',
+        type=Path,
+        help='Translation memory JSON file to reuse and extend across runs and locales '
+             '(default: in-memory only, seeded from the input file)'
+    )
+
+    parser.add_argument(
+        '--tmx',
+        type=Path,
+        action='append',
+        default=[],
+        help='Seed the translation memory with the approved translations of a TMX file; its source '
+             'strings are reused instead of translated (repeatable)'
+    )
+
+    parser.add_argument(
+        '--fuzzy-threshold',
+        type=float,
+        default=0.5,
+        help='Similarity (0-1) for memory matches to be sent as reference examples (default: 0.5)'
+    )
+
+    parser.add_argument(
+        '--reuse-threshold',
+        type=float,
+        default=0.7,
+        help='Similarity (0-1) for memory matches that differ only in numbers/placeholders '
+             'to be reused without calling the model (default: 0.7)'
+    )
+
+
+def build_translator(args: argparse.Namespace, translator_class: type = XLIFFTranslator, offline: bool = False):
+    """
+    Create a translator from the options added by add_translator_arguments.
+
+    Exits with an error message if a provider cannot be created (e.g. no API key).
+
+    Args:
+        args: Parsed command line
+        translator_class: Translator to create
+        offline: The translator is only used to plan runs: no API key is needed
+            and no request can be sent
+
+    Returns:
+        Translator instance
+    """
+    provider_class = translator_class.PROVIDER
+
+    # A local server replaces the hosted API as the primary provider
+    if args.base_url:
+        provider_class = LocalProvider
+    model = args.model or provider_class.DEFAULT_MODEL
+    probe_report = args.probe_report or Path(__file__).parent / f'probe-{provider_class.name}.json'
+
+    # Fill unset batch size / delay / concurrency from the probe report for this key and model
+    settings = dict(provider_class.DEFAULT_SETTINGS)
+    api_key = args.api_key or os.getenv(provider_class.API_KEY_ENV)
+    if api_key and probe_report.exists():
+        recommendation = load_recommendation(probe_report, provider_class.name, model, api_key)
+        if recommendation:
+            settings.update(recommendation)
+            print(f"Using probe report {probe_report.name}: batch size {settings['batch_size']}, "
+                  f"concurrency {settings['concurrency']}, delay {settings['delay']}")
+    if args.auto_tune:
+        settings['delay'] = 0.0  # Pacing is left to the tuner
+    for name in settings:
+        if getattr(args, name) is not None:
+            settings[name] = getattr(args, name)
+
+    tuner = None
+    if args.auto_tune:
+        tuner = AutoTuner(
+            initial_concurrency=settings['concurrency'],
+            max_concurrency=args.max_concurrency,
+            initial_batch_tokens=settings['batch_size'] * AUTO_TUNE_TOKENS_PER_UNIT,
+            latency_target=args.latency_target or provider_class.LATENCY_TARGET,
+            log=tqdm.write
+        )
+
+    scheduler = None
+    if args.prioritize or args.priority_file or args.time_budget is not None or args.max_cost is not None:
+        try:
+            rules = load_priority_rules(args.priority_file) if args.priority_file else None
+        except (OSError, ValueError) as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+        scheduler = UnitScheduler(rules, time_budget=args.time_budget, max_cost=args.max_cost)
+
+    glossary = None
+    if args.glossary:
+        try:
+            glossary = Glossary.load(args.glossary)
+        except (OSError, ValueError) as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+
+    # Create translator (the -k/-m provider first, then any --provider entries)
+    cassette = Cassette(args.cassette, args.cassette_mode) if args.cassette else None
+    if offline:
+        # An empty replay cassette needs no API key and fails any request that slips through
+        cassette = Cassette(Path(os.devnull), 'replay')
+    try:
+        if provider_class is LocalProvider:
+            primary = LocalProvider(
+                api_key=args.api_key,
+                model=model,
+                cassette=cassette,
+                base_url=args.base_url,
+                context_tokens=args.context_tokens,
+                timeout=args.request_timeout,
+                system_role=not args.no_system_role
+            )
+        else:
+            primary = provider_class(api_key=args.api_key, model=model, cassette=cassette)
+        providers = [primary]
+        providers += [provider_from_spec(spec, cassette) for spec in args.provider]
+        hedge_providers = [provider_from_spec(spec, cassette) for spec in args.hedge_provider]
+        translator = translator_class(
+            providers=providers,
+            batch_size=settings['batch_size'],
+            delay=settings['delay'],
+            concurrency=settings['concurrency'],
+            tuner=tuner,
+            hedger=Hedger(
+                latency_percentile=args.hedge_percentile,
+                max_rate=args.hedge_max_rate,
+                max_overhead=args.hedge_max_overhead
+            ) if args.hedge_percentile else None,
+            hedge_providers=hedge_providers,
+            scheduler=scheduler,
+            profiler=RunProfiler(cpu_profile=args.profile_cpu) if args.profile or args.profile_cpu else None,
+            breaker=CircuitBreaker(
+                threshold=args.breaker_threshold,
+                cooldown=args.breaker_cooldown,
+                max_probes=args.breaker_probes,
+                log=tqdm.write
+            ) if args.breaker_threshold > 0 else None,
+            edit_threshold=None if args.no_edit_aware else args.edit_threshold,
+            validate=not args.no_validate,
+            batch_order=args.batch_order,
+            split_icu=not args.no_icu_split,
+            quality_scan=args.quality_scan,
+            quality_threshold=args.quality_threshold,
+            glossary=glossary,
+            retranslate_where=args.retranslate_where,
+            max_length_ratio=args.max_length_ratio,
+            memory=TranslationMemory(args.memory) if args.memory else None,
+            fuzzy_threshold=args.fuzzy_threshold,
+            reuse_threshold=args.reuse_threshold,
+            cassette=cassette
+        )
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    for tmx_path in args.tmx:
+        try:
+            counts = import_tmx(translator.memory, tmx_path)
+        except (OSError, ET.ParseError) as e:
+            print(f"Error: Could not import {tmx_path}: {e}")
+            sys.exit(1)
+        print(f"📥 Imported {format_counts(counts)} from {tmx_path.name}")
+
+    unpriced = translator.pool.unpriced()
+    if args.max_cost is not None and unpriced:
+        print(f"Error: --max-cost needs known prices, but there is none for "
+              f"{', '.join(p.label for p in unpriced)}")
+        sys.exit(1)
+
+    return translator
+
+
+def main(
+    translator_class: type = XLIFFTranslator,
+    description: str = 'Translate XLIFF files using OpenAI API',
+    epilog: str = DEFAULT_EPILOG
+):
+    """
+    Main entry point for CLI usage.
+
+    Args:
+        translator_class: Translator to run; its PROVIDER sets the default API key
+            variable, model and probe report
+        description: Argument parser description
+        epilog: Argument parser epilog (examples)
+    """
+    provider_class = translator_class.PROVIDER
+    parser = argparse.ArgumentParser(
+        description=description,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=epilog
+    )
+
+    parser.add_argument(
+        '-i', '--input',
+        type=Path,
+        required=True,
+        help='Input XLIFF file path'
+    )
+
+    parser.add_argument(
+        '-l', '--language',
+        type=str,
+        required=True,
+        help='Target language (e.g., French, Spanish, German, Italian)'
+    )
+
+    parser.add_argument(
+        '-o', '--output',
+        type=Path,
+        help='Output file path (default: overwrite input file)'
     )
 
     parser.add_argument(
@@ -492,6 +2576,29 @@ Examples:
         help='Save progress every N batches (default: 5)'
     )
 
+    parser.add_argument(
+        '--shard',
+        type=parse_shard,
+        metavar='INDEX/COUNT',
+        help='Translate only shard INDEX of COUNT (e.g. 2/4) of the pending units and write '
+             '<output>.shard-INDEX-of-COUNT.json instead of the XLIFF'
+    )
+
+    parser.add_argument(
+        '--plan',
+        action='store_true',
+        help='Estimate requests, tokens, cost and time of the run without calling any model (no API key needed)'
+    )
+
+    parser.add_argument(
+        '--merge-shards',
+        action='store_true',
+        help='Apply all shard result files next to the output file and check coverage and conflicts '
+             '(no API calls)'
+    )
+
+    add_translator_arguments(parser, provider_class)
+
     args = parser.parse_args()
 
     # Validate input file
@@ -499,17 +2606,18 @@ Examples:
         print(f"Error: Input file not found: {args.input}")
         sys.exit(1)
 
-    # Create translator
-    try:
-        translator = XLIFFTranslator(
-            api_key=args.api_key,
-            model=args.model,
-            batch_size=args.batch_size,
-            delay=args.delay
-        )
-    except ValueError as e:
-        print(f"Error: {e}")
-        sys.exit(1)
+    if args.merge_shards:
+        stats = translator_class.merge_shards(args.output or args.input, args.language)
+        clean = stats['shards'] and not (stats['conflicts'] or stats['uncovered'] or stats['missing_shards'])
+        sys.exit(0 if clean else 1)
+
+    if args.plan:
+        translator = build_translator(args, translator_class, offline=True)
+        plan = translator.plan_file(args.input, args.language, args.output, skip_existing=not args.no_skip)
+        print_plans({args.input.name: plan}, ', '.join(p.label for p in translator.pool.providers))
+        sys.exit(0)
+
+    translator = build_translator(args, translator_class)
 
     # Translate file
     try:
@@ -518,11 +2626,15 @@ Examples:
             target_language=args.language,
             output_file=args.output,
             skip_existing=not args.no_skip,
-            save_frequency=args.save_frequency
+            save_frequency=args.save_frequency,
+            shard=args.shard
         )
 
+        if translator.cassette is not None:
+            print(translator.cassette.summary())
+
         print(f"\n✓ Translation complete!")
-        sys.exit(0 if stats['errors'] == 0 else 1)
+        sys.exit(0 if stats['errors'] == 0 and not stats['aborted'] else 1)
 
     except Exception as e:
         print(f"\n✗ Translation failed: {e}")
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Adaptive batch size and concurrency controller for translation runs.
+
+Instead of hand-picked --batch-size/--delay values, the controller starts
+conservatively and adjusts two knobs from live feedback using AIMD (additive
+increase, multiplicative decrease), the same scheme TCP uses to find the
+available bandwidth:
+
+- concurrency (batches in flight): +1 after a full window of clean batches,
+  halved on a 429 rate-limit response
+- batch token budget (estimated source tokens per request): +step after each
+  clean batch, cut when a batch is slower than the latency target or when the
+  numbered response could not be parsed back into the right number of items
+
+Only one decrease is applied per congestion event: feedback from requests that
+were started before the last decrease is not acted on again.
+
+Every decision is logged so runs can be reviewed and the defaults revisited.
+"""
+
+import threading
+import time
+from typing import Callable, List, Optional
+
+
+class AutoTuner:
+    """AIMD controller for in-flight concurrency and batch token budget"""
+
+    def __init__(
+        self,
+        initial_concurrency: int = 1,
+        max_concurrency: int = 16,
+        initial_batch_tokens: int = 300,
+        min_batch_tokens: int = 60,
+        max_batch_tokens: int = 1500,
+        batch_tokens_step: int = 100,
+        latency_target: float = 20.0,
+        log: Optional[Callable[[str], None]] = None
+    ):
+        """
+        Initialize the controller.
+
+        Args:
+            initial_concurrency: Batches in flight at the start
+            max_concurrency: Upper bound for batches in flight
+            initial_batch_tokens: Estimated source tokens per batch at the start
+            min_batch_tokens: Lower bound for the batch token budget
+            max_batch_tokens: Upper bound for the batch token budget (keeps the
+                response well within the request's max_tokens)
+            batch_tokens_step: Additive increase of the budget per clean batch
+            latency_target: Batches slower than this (seconds) shrink the budget
+            log: Function used to log decisions (default: print)
+        """
+        self.concurrency = float(max(1, initial_concurrency))
+        self.max_concurrency = max(1, max_concurrency)
+        self.batch_tokens = float(initial_batch_tokens)
+        self.min_batch_tokens = min_batch_tokens
+        self.max_batch_tokens = max_batch_tokens
+        self.batch_tokens_step = batch_tokens_step
+        self.latency_target = latency_target
+        self.log = log or print
+
+        self.decisions: List[dict] = []
+        self._clean_in_window = 0
+        self._last_decrease = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def in_flight_limit(self) -> int:
+        """Current maximum number of batches in flight."""
+        return int(self.concurrency)
+
+    @property
+    def batch_token_budget(self) -> int:
+        """Current estimated source-token budget per batch."""
+        return int(self.batch_tokens)
+
+    def _decide(self, action: str, reason: str):
+        decision = {
+            'time': round(time.time(), 3),
+            'action': action,
+            'reason': reason,
+            'concurrency': self.in_flight_limit,
+            'batch_tokens': self.batch_token_budget,
+        }
+        self.decisions.append(decision)
+        self.log(
+            f"⚙ Auto-tune: {action} ({reason}) → concurrency {decision['concurrency']}, "
+            f"batch budget {decision['batch_tokens']} tokens"
+        )
+
+    def record(
+        self,
+        started: float,
+        latency: float,
+        rate_limited: bool = False,
+        parse_failed: bool = False,
+        error: bool = False
+    ):
+        """
+        Feed back the outcome of one batch request.
+
+        Args:
+            started: time.monotonic() when the request was sent
+            latency: Request duration in seconds
+            rate_limited: True if the provider answered 429
+            parse_failed: True if the response had the wrong number of items
+            error: True if the request failed for another reason
+        """
+        with self._lock:
+            stale = started < self._last_decrease
+
+            if rate_limited:
+                if not stale and self.concurrency > 1:
+                    self.concurrency = max(1.0, self.concurrency / 2)
+                    self._last_decrease = time.monotonic()
+                    self._clean_in_window = 0
+                    self._decide('decrease concurrency', 'rate limited (429)')
+                return
+
+            if parse_failed or latency > self.latency_target:
+                if not stale and self.batch_tokens > self.min_batch_tokens:
+                    self.batch_tokens = max(float(self.min_batch_tokens), self.batch_tokens * 0.7)
+                    self._last_decrease = time.monotonic()
+                    reason = 'response could not be parsed' if parse_failed else f'latency {latency:.1f}s'
+                    self._decide('decrease batch size', reason)
+                return
+
+            if error:
+                return
+
+            # Clean batch: grow the batch budget, and concurrency once per full window
+            if self.batch_tokens < self.max_batch_tokens:
+                self.batch_tokens = min(float(self.max_batch_tokens), self.batch_tokens + self.batch_tokens_step)
+
+            self._clean_in_window += 1
+            window = self.in_flight_limit
+            if self._clean_in_window >= window:
+                self._clean_in_window = 0
+                if self.concurrency < self.max_concurrency:
+                    self.concurrency = min(float(self.max_concurrency), self.concurrency + 1)
+                    self._decide('increase concurrency', f'{window} clean batches in a row')
+
+    def summary(self) -> str:
+        """One-line summary of the final settings."""
+        return (
+            f"Auto-tune: {len(self.decisions)} decisions, final concurrency {self.in_flight_limit}, "
+            f"batch budget {self.batch_token_budget} tokens"
+        )
@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+"""
+Shared flow of the batch scripts that translate all locale files.
+
+translate_all_locales.py (OpenAI) and translate_all_locales_claude.py differ
+only in the translator class, the translate script, its options and the API
+key they need. Everything else lives here:
+
+- translate (default): sync with messages.xlf (dry run), plan, confirm, sync,
+  then run the translate script once per locale file
+- sync: update the locale files from messages.xlf without translating
+- status: per-locale totals, pending, stale and error counts (no API key)
+- --plan: estimate requests, tokens, cost and time (of the synced files), then exit
+- --watch: keep running, sync when messages.xlf changes and translate new or
+  changed trans-units
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Type
+from xml.etree import ElementTree as ET
+
+from xlf_status import add_status_arguments, run_status
+from xlf_sync import sync_locales
+
+# Language mapping: filename -> language name
+LANGUAGE_MAP = {
+    'messages.fr.xlf': 'French',
+    'messages.es.xlf': 'Spanish',
+    'messages.de.xlf': 'German',
+    'messages.it.xlf': 'Italian',
+    'messages.pt.xlf': 'Portuguese',
+    'messages.pl.xlf': 'Polish',
+    'messages.sv.xlf': 'Swedish',
+    'messages.no.xlf': 'Norwegian',
+    'messages.fi.xlf': 'Finnish',
+}
+
+SCRIPT_DIR = Path(__file__).parent
+LOCALE_DIR = SCRIPT_DIR.parent / 'casino-customer-f' / 'src' / 'locale'
+
+
+def _option(options: List[str], name: str) -> Optional[str]:
+    # Value of an option in a translate_xlf.py argument list (e.g. '-m')
+    return options[options.index(name) + 1] if name in options else None
+
+
+def _build_translator(translator_class: Type, options: List[str], offline: bool = False):
+    # The translator the translate script would build from the same options
+    from translate_xlf import add_translator_arguments, build_translator
+
+    parser = argparse.ArgumentParser()
+    add_translator_arguments(parser, translator_class.PROVIDER)
+    return build_translator(parser.parse_args(options), translator_class, offline=offline)
+
+
+def watch(
+    locale_dir: Path,
+    translator_class: Type,
+    options: List[str],
+    interval: float,
+    debounce: float,
+    sync: bool = True
+):
+    """
+    Translate new and changed trans-units as the locale files change.
+
+    Args:
+        locale_dir: Directory with the locale files
+        translator_class: XLIFFTranslator or a subclass
+        options: translate_xlf.py options of the batch run
+        interval: Seconds between polls
+        debounce: Seconds a file must stay unchanged before it is translated
+        sync: Also watch messages.xlf and sync the locale files when it changes
+    """
+    from xlf_watch import LocaleWatcher
+
+    # One warm translator: client connections, translation memory and tuning survive between changes
+    translator = _build_translator(translator_class, options)
+    files = {locale_dir / filename: language for filename, language in LANGUAGE_MAP.items()}
+    LocaleWatcher(
+        translator,
+        files,
+        interval=interval,
+        debounce=debounce,
+        catalog=locale_dir / 'messages.xlf' if sync else None
+    ).run()
+
+
+def plan(
+    locale_dir: Path,
+    translator_class: Type,
+    options: List[str],
+    synced: Optional[Dict[Path, ET.Element]] = None
+):
+    """
+    Print the estimated requests, tokens, cost and time of translating all locale files.
+
+    Args:
+        locale_dir: Directory with the locale files
+        translator_class: XLIFFTranslator or a subclass
+        options: translate_xlf.py options of the batch run
+        synced: Locale file -> XLIFF root as the sync would write it (from a dry run of
+            sync_locales), planned instead of the file on disk
+    """
+    from translate_xlf import print_plans
+
+    # The same translator settings as the run, without an API key or any request
+    translator = _build_translator(translator_class, options, offline=True)
+    synced = synced or {}
+    plans = {
+        filename: translator.plan_file(locale_dir / filename, language, root=synced.get(locale_dir / filename))
+        for filename, language in LANGUAGE_MAP.items()
+        if (locale_dir / filename).exists() or locale_dir / filename in synced
+    }
+    print_plans(plans, ', '.join(p.label for p in translator.pool.providers))
+
+
+def main(
+    load_translator: Callable[[], Type],
+    script: str,
+    options: List[str],
+    description: str,
+    api_key_env: str,
+    api_name: str,
+    title: str = "BATCH TRANSLATION OF ALL LOCALE FILES",
+    api_key_help: str = ''
+):
+    """
+    Command line of a batch script.
+
+    Args:
+        load_translator: Function importing and returning the translator class (XLIFFTranslator
+            or a subclass) for planning and watch mode; status and sync do not need it
+        script: Translate script run for each locale file (e.g. 'translate_xlf.py')
+        options: Options passed to the translate script (also used to plan the run)
+        description: Help text of the batch script
+        api_key_env: Environment variable with the API key
+        api_name: Provider name in the confirmation prompt (e.g. 'OpenAI')
+        title: Banner of the translate command
+        api_key_help: Extra lines printed when the API key is missing
+    """
+    parser = argparse.ArgumentParser(description=description, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument(
+        'command',
+        nargs='?',
+        choices=['translate', 'sync', 'status'],
+        default='translate',
+        help='translate (default), sync: update the locale files from messages.xlf without translating, '
+             'or status: per-locale totals, pending, stale and error counts'
+    )
+    parser.add_argument(
+        '--no-sync',
+        action='store_true',
+        help='Translate the locale files as they are, without syncing them with messages.xlf first'
+    )
+    parser.add_argument(
+        '--plan',
+        action='store_true',
+        help='Estimate requests, tokens, cost and time per locale without calling the API, then exit'
+    )
+    parser.add_argument(
+        '--watch',
+        action='store_true',
+        help='Keep running and translate new or changed trans-units whenever a locale file changes; '
+             'changes of messages.xlf are synced into the locale files first (unless --no-sync)'
+    )
+    parser.add_argument(
+        '--interval',
+        type=float,
+        default=1.0,
+        help='Watch mode: seconds between checks for changes (default: 1)'
+    )
+    parser.add_argument(
+        '--debounce',
+        type=float,
+        default=2.0,
+        help='Watch mode: seconds a file must stay unchanged before it is translated (default: 2)'
+    )
+    add_status_arguments(parser)
+    args = parser.parse_args()
+
+    locale_dir = LOCALE_DIR
+    catalog = locale_dir / 'messages.xlf'
+    locale_files = [locale_dir / filename for filename in LANGUAGE_MAP]
+
+    if args.command == 'status':
+        sys.exit(run_status(locale_files, args, SCRIPT_DIR / '.xlf-status.json', LANGUAGE_MAP))
+
+    if args.command == 'sync':
+        sys.exit(0 if sync_locales(catalog, locale_files) is not None else 1)
+
+    # The plan counts the units the sync would bring in, without writing anything
+    synced = {}
+    if args.plan:
+        if not args.no_sync:
+            synced = sync_locales(catalog, locale_files, dry_run=True)
+            if synced is None:
+                sys.exit(1)
+            print()
+        plan(locale_dir, load_translator(), options, synced)
+        sys.exit(0)
+
+    # Check if API key is set
+    if not os.getenv(api_key_env):
+        print(f"Error: {api_key_env} environment variable not set")
+        print(f"Set it with: export {api_key_env}='your-api-key-here'")
+        if api_key_help:
+            print(api_key_help)
+        sys.exit(1)
+
+    if not locale_dir.exists():
+        print(f"Error: Locale directory not found: {locale_dir}")
+        sys.exit(1)
+
+    print("="*60)
+    print(title)
+    print("="*60)
+    print(f"Locale directory: {locale_dir}")
+    print(f"Files to translate: {len(LANGUAGE_MAP)}")
+    print(f"Model: {_option(options, '-m')}")
+    print("="*60)
+    print()
+
+    # New strings of the catalog reach the translator, obsolete ones are not translated. The sync
+    # drops units (and their translations), so it only reports its changes until the run is confirmed
+    if not args.no_sync:
+        synced = sync_locales(catalog, locale_files, dry_run=True)
+        if synced is None:
+            sys.exit(1)
+        print()
+
+    if not args.watch:
+        plan(locale_dir, load_translator(), options, synced)
+        print()
+
+    # Confirm before proceeding
+    response = input(f"Proceed with translation? This will use {api_name} API credits. (y/N): ")
+    if response.lower() not in ['y', 'yes']:
+        print("Cancelled.")
+        sys.exit(0)
+
+    if not args.no_sync:
+        if sync_locales(catalog, locale_files) is None:
+            sys.exit(1)
+        print()
+
+    if args.watch:
+        watch(locale_dir, load_translator(), options, args.interval, args.debounce, sync=not args.no_sync)
+        sys.exit(0)
+
+    # Translate each file
+    success_count = 0
+    failed_files = []
+
+    for filename, language in LANGUAGE_MAP.items():
+        file_path = locale_dir / filename
+
+        if not file_path.exists():
+            print(f"\n⚠ Warning: File not found, skipping: {filename}")
+            continue
+
+        print(f"\n{'='*60}")
+        print(f"Translating: {filename} → {language}")
+        print(f"{'='*60}")
+
+        # Run translation script
+        try:
+            result = subprocess.run([
+                sys.executable,
+                str(SCRIPT_DIR / script),
+                '-i', str(file_path),
+                '-l', language,
+                *options,
+                '--save-frequency', '3'  # Save more frequently
+            ], check=True)
+
+            if result.returncode == 0:
+                success_count += 1
+                print(f"✓ Successfully translated {filename}")
+            else:
+                failed_files.append(filename)
+                print(f"✗ Failed to translate {filename}")
+
+        except subprocess.CalledProcessError as e:
+            failed_files.append(filename)
+            print(f"✗ Error translating {filename}: {e}")
+
+        except KeyboardInterrupt:
+            print("\n\nInterrupted by user. Exiting...")
+            sys.exit(1)
+
+    # Print summary
+    print("\n" + "="*60)
+    print("BATCH TRANSLATION SUMMARY")
+    print("="*60)
+    print(f"Total files:       {len(LANGUAGE_MAP)}")
+    print(f"Successfully:      {success_count}")
+    print(f"Failed:            {len(failed_files)}")
+
+    if failed_files:
+        print("\nFailed files:")
+        for filename in failed_files:
+            print(f"  - {filename}")
+
+    print("="*60)
+
+    sys.exit(0 if len(failed_files) == 0 else 1)
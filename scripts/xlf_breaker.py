@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Circuit breaker for translation runs.
+
+When a provider degrades or a prompt change makes responses unusable, a long
+unattended run keeps sending batches, and every failed or mismatched batch is
+billed and then counted as errors. The breaker watches the outcome of recent
+batches and trips when the share of bad ones (API errors, responses with the
+wrong number of items, batches where most translations fail validation)
+crosses a threshold:
+
+    closed     batches are sent as usual
+    open       no new batches; batches in flight finish, then the run pauses
+    half-open  after the pause a single small probe batch is sent; if it is
+               good the breaker closes and the run resumes, otherwise it opens
+               again with twice the pause
+
+After max_probes failed probes the run is aborted: the remaining units are
+deferred and the progress saved so far is kept.
+"""
+
+import time
+from collections import deque
+from typing import Callable
+
+
+class CircuitBreaker:
+    """Pauses, probes and aborts a run when the rate of bad batches spikes"""
+
+    def __init__(
+        self,
+        threshold: float = 0.5,
+        window: int = 10,
+        min_batches: int = 5,
+        cooldown: float = 30.0,
+        max_probes: int = 3,
+        probe_size: int = 2,
+        log: Callable[[str], None] = print
+    ):
+        """
+        Initialize the breaker.
+
+        Args:
+            threshold: Share of bad batches (0..1) among recent batches that trips the breaker
+            window: Number of recent batches the share is taken over
+            min_batches: Batches needed in the window before the breaker can trip
+            cooldown: Seconds to pause before the first probe (doubled after each failed probe)
+            max_probes: Failed probes after which the run is aborted
+            probe_size: Maximum units in a probe batch
+            log: Function used to report state changes
+        """
+        self.threshold = threshold
+        self.min_batches = min_batches
+        self.cooldown = cooldown
+        self.max_probes = max_probes
+        self.probe_size = probe_size
+        self.log = log
+
+        self._outcomes = deque(maxlen=window)
+        self.state = 'closed'
+        self.trips = 0
+        self._failed_probes = 0
+        self._resume_at = 0.0
+
+    def fresh(self) -> 'CircuitBreaker':
+        """
+        A closed breaker with the same settings, for one run.
+
+        Runs that share a translator (e.g. concurrent files in the translation
+        service) each get their own, so one file's trip or abort does not pause
+        or abort the others.
+        """
+        return CircuitBreaker(
+            threshold=self.threshold,
+            window=self._outcomes.maxlen,
+            min_batches=self.min_batches,
+            cooldown=self.cooldown,
+            max_probes=self.max_probes,
+            probe_size=self.probe_size,
+            log=self.log
+        )
+
+    def _close(self):
+        self._outcomes.clear()
+        self.state = 'closed'
+        self._failed_probes = 0
+
+    @property
+    def aborted(self) -> bool:
+        return self.state == 'aborted'
+
+    @property
+    def probing(self) -> bool:
+        return self.state == 'half-open'
+
+    def allow(self, in_flight: int) -> bool:
+        """
+        Check whether a batch may be sent now.
+
+        Args:
+            in_flight: Number of batches in flight
+
+        Returns:
+            True if the batch may be sent (while probing, only one batch at a time)
+        """
+        if self.state == 'open' and in_flight == 0 and time.monotonic() >= self._resume_at:
+            self.state = 'half-open'
+            self.log(f"🔌 Circuit breaker: sending a probe batch of up to {self.probe_size} units")
+        if self.state == 'closed':
+            return True
+        return self.state == 'half-open' and in_flight == 0
+
+    def pause_remaining(self) -> float:
+        """Seconds until the next probe may be sent (0 unless the breaker is open)."""
+        if self.state != 'open':
+            return 0.0
+        return max(0.0, self._resume_at - time.monotonic())
+
+    def _open(self):
+        pause = self.cooldown * 2 ** self._failed_probes
+        self._resume_at = time.monotonic() + pause
+        self.state = 'open'
+        return pause
+
+    def record(self, ok: bool):
+        """
+        Account for the outcome of a completed batch.
+
+        Args:
+            ok: False for an API error, a response with the wrong number of items
+                or a batch where most translations were unusable
+        """
+        if self.state == 'half-open':
+            if ok:
+                self._close()
+                self.log("✅ Circuit breaker: probe succeeded, resuming")
+                return
+            self._failed_probes += 1
+            if self._failed_probes >= self.max_probes:
+                self.state = 'aborted'
+                self.log(f"🛑 Circuit breaker: {self._failed_probes} probes failed, aborting the run")
+                return
+            pause = self._open()
+            self.log(f"🔌 Circuit breaker: probe failed, pausing {pause:g}s")
+            return
+
+        self._outcomes.append(ok)
+        if self.state != 'closed' or len(self._outcomes) < self.min_batches:
+            return
+        bad = self._outcomes.count(False) / len(self._outcomes)
+        if bad >= self.threshold:
+            self.trips += 1
+            pause = self._open()
+            self.log(f"🔌 Circuit breaker tripped: {bad:.0%} of the last {len(self._outcomes)} batches failed, "
+                     f"pausing {pause:g}s after the batches in flight")
+
+    def summary(self) -> str:
+        """One-line report for the end of a run."""
+        state = 'aborted the run' if self.aborted else self.state
+        return f"Circuit breaker: tripped {self.trips} times, {state}"
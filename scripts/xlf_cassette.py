@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Record/replay cassette for OpenAI and Anthropic API calls.
+
+Wraps a provider client so that every request is keyed by a canonical hash of
+the endpoint, model, messages and parameters. Responses are stored in a compact
+JSON Lines file (one line per request) and can be served again offline:
+
+    record  - always call the API and store the response
+    replay  - only serve stored responses; a missing request is an error
+    auto    - serve stored responses, call the API (and record) on a miss
+
+Replay needs neither network access nor an API key, which makes prompt and
+batching changes testable in CI at zero cost.
+
+Usage:
+    cassette = Cassette(Path('fixtures/fr.cassette.jsonl'), mode='replay')
+    client = cassette.wrap(OpenAI(api_key='replay-only'))
+"""
+
+import hashlib
+import json
+import threading
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Callable, Dict
+
+
+class CassetteMiss(KeyError):
+    """Raised in replay mode when a request has no stored response"""
+
+
+class Cassette:
+    """On-disk store of API responses keyed by request hash"""
+
+    MODES = ('record', 'replay', 'auto')
+
+    def __init__(self, path: Path, mode: str = 'auto'):
+        """
+        Open (or create) a cassette file.
+
+        Args:
+            path: JSON Lines file holding the recorded responses
+            mode: 'record', 'replay' or 'auto'
+        """
+        if mode not in self.MODES:
+            raise ValueError(f"Invalid cassette mode '{mode}' (expected one of: {', '.join(self.MODES)})")
+
+        self.path = path
+        self.mode = mode
+        self.responses: Dict[str, dict] = {}
+        self.stats = {'hits': 0, 'misses': 0, 'recorded': 0}
+        self._lock = threading.Lock()
+
+        if path.exists():
+            with open(path, encoding='utf-8') as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self.responses[entry['key']] = entry['response']
+
+    @staticmethod
+    def request_key(endpoint: str, params: Dict[str, Any]) -> str:
+        """
+        Canonical hash of a request.
+
+        Args:
+            endpoint: Endpoint name (e.g. 'openai.chat.completions')
+            params: Keyword arguments of the create() call
+
+        Returns:
+            Hex SHA-256 digest
+        """
+        canonical = json.dumps(
+            {'endpoint': endpoint, 'params': params},
+            sort_keys=True,
+            ensure_ascii=False,
+            separators=(',', ':'),
+            default=str
+        )
+        return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+    def call(self, endpoint: str, create: Callable, response_type: Any, params: Dict[str, Any]) -> Any:
+        """
+        Serve a request from the cassette or forward it to the real client.
+
+        Args:
+            endpoint: Endpoint name used in the request key
+            create: The real client's create() method
+            response_type: SDK model class used to rebuild stored responses
+            params: Keyword arguments of the create() call
+
+        Returns:
+            SDK response object
+        """
+        key = self.request_key(endpoint, params)
+
+        if self.mode != 'record':
+            with self._lock:
+                stored = self.responses.get(key)
+            if stored is not None:
+                with self._lock:
+                    self.stats['hits'] += 1
+                return response_type.model_validate(stored)
+            if self.mode == 'replay':
+                with self._lock:
+                    self.stats['misses'] += 1
+                raise CassetteMiss(f"No recorded response for {endpoint} request {key[:12]} in {self.path.name}")
+
+        response = create(**params)
+        data = response.model_dump(mode='json')
+
+        with self._lock:
+            self.stats['recorded'] += 1
+            self.responses[key] = data
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps({'key': key, 'response': data}, ensure_ascii=False, separators=(',', ':')) + '\n')
+
+        return response
+
+    def wrap(self, client: Any) -> 'CassetteClient':
+        """
+        Wrap an OpenAI or Anthropic client.
+
+        Args:
+            client: Provider SDK client
+
+        Returns:
+            Client proxy that routes create() calls through this cassette
+        """
+        return CassetteClient(client, self)
+
+    def summary(self) -> str:
+        """One-line summary of cassette usage."""
+        return (
+            f"Cassette {self.path.name} ({self.mode}): "
+            f"{self.stats['hits']} replayed, {self.stats['recorded']} recorded, {self.stats['misses']} missing"
+        )
+
+
+class _Endpoint:
+    """create() proxy for one API endpoint"""
+
+    def __init__(self, cassette: Cassette, name: str, create: Callable, response_type_loader: Callable):
+        self._cassette = cassette
+        self._name = name
+        self._create = create
+        self._response_type_loader = response_type_loader
+
+    def create(self, **params) -> Any:
+        return self._cassette.call(self._name, self._create, self._response_type_loader(), params)
+
+
+def _openai_chat_completion():
+    from openai.types.chat import ChatCompletion
+    return ChatCompletion
+
+
+def _anthropic_message():
+    from anthropic.types import Message
+    return Message
+
+
+class CassetteClient:
+    """Proxy for an OpenAI or Anthropic client that records and replays requests"""
+
+    def __init__(self, client: Any, cassette: Cassette):
+        self._client = client
+
+        if hasattr(client, 'chat'):
+            self.chat = SimpleNamespace(completions=_Endpoint(
+                cassette,
+                'openai.chat.completions',
+                lambda **params: client.chat.completions.create(**params),
+                _openai_chat_completion
+            ))
+        if hasattr(client, 'messages'):
+            self.messages = _Endpoint(
+                cassette,
+                'anthropic.messages',
+                lambda **params: client.messages.create(**params),
+                _anthropic_message
+            )
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._client, name)
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Locality-aware batch composition.
+
+Batches are contiguous slices of the work queue, so the order of the queue
+decides which strings share a request. In document order, a batch mixes
+strings from unrelated components. BatchComposer orders the pending units so
+that related strings are adjacent:
+
+1. Units are grouped by the component they are used in (the first `sourcefile`
+   of their location context-groups); groups keep the order in which they
+   first appear in the file, and units without a location form the last group.
+2. Within a group, each next unit is the one most similar to the previous one
+   (character trigram overlap), so variants of the same message end up together.
+
+Strings from one component share their terminology, their reference examples
+from the translation memory, and a single context line in the prompt, so a
+batch of related strings needs fewer prompt tokens per unit than a mixed one.
+"""
+
+from collections import OrderedDict
+from pathlib import PurePosixPath
+from typing import Dict, List, Set
+
+from xlf_schedule import unit_locations
+
+
+def _trigrams(text: str) -> Set[str]:
+    text = f" {' '.join(text.lower().split())} "
+    return {text[i:i + 3] for i in range(max(1, len(text) - 2))}
+
+
+def component_name(sourcefile: str) -> str:
+    """Short name of a source file for prompts (src/app/lobby/lobby.component.html -> lobby.component.html)."""
+    return PurePosixPath(sourcefile.replace('\\', '/')).name or sourcefile
+
+
+class BatchComposer:
+    """Orders pending units so that related strings end up in the same batch"""
+
+    def __init__(self, max_chain: int = 500):
+        """
+        Initialize the composer.
+
+        Args:
+            max_chain: Groups larger than this are ordered alphabetically instead of
+                by similarity chaining (which is quadratic in the group size)
+        """
+        self.max_chain = max_chain
+
+    @staticmethod
+    def group_key(unit: tuple) -> str:
+        """Component of a unit tuple ('' for units without a location)."""
+        locations = unit_locations(unit[0])
+        return locations[0] if locations else ''
+
+    def _chain(self, units: list) -> list:
+        # Greedy nearest-neighbour order by trigram Jaccard similarity
+        if len(units) > self.max_chain:
+            return sorted(units, key=lambda unit: ' '.join(unit[2].lower().split()))
+        shingles = [_trigrams(unit[2]) for unit in units]
+        remaining = list(range(1, len(units)))
+        order = [0]
+        while remaining:
+            last = shingles[order[-1]]
+            best = max(remaining, key=lambda i: len(last & shingles[i]) / len(last | shingles[i]))
+            remaining.remove(best)
+            order.append(best)
+        return [units[i] for i in order]
+
+    def order(self, units: list) -> list:
+        """
+        Order unit tuples by component, and by similarity within a component.
+
+        Args:
+            units: Unit tuples whose first element is the trans-unit and third the source text
+
+        Returns:
+            New ordered list
+        """
+        groups: Dict[str, list] = OrderedDict()
+        for unit in units:
+            groups.setdefault(self.group_key(unit), []).append(unit)
+        unlocated = groups.pop('', [])
+        ordered = []
+        for group in list(groups.values()) + ([unlocated] if unlocated else []):
+            ordered.extend(self._chain(group))
+        return ordered
+
+    @staticmethod
+    def batch_context(batch: list, limit: int = 3) -> List[str]:
+        """
+        Components a batch's strings are used in, most common first.
+
+        Args:
+            batch: Unit tuples
+            limit: Maximum number of components
+
+        Returns:
+            Short component names
+        """
+        counts: Dict[str, int] = {}
+        for unit in batch:
+            for location in dict.fromkeys(unit_locations(unit[0])):
+                name = component_name(location)
+                counts[name] = counts.get(name, 0) + 1
+        return sorted(counts, key=lambda name: -counts[name])[:limit]
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Request hedging for slow translation batches.
+
+A few batches in a long run take many times the median latency, and the run
+(and its final save) waits for them. With hedging, a batch that has not
+completed by a latency percentile of the batches seen so far is sent again to
+a second provider (or model). The first valid response wins; the other request
+is cancelled if it has not started yet and its result is discarded otherwise.
+
+Hedges cost extra tokens, so both the share of hedged batches and the token
+overhead (tokens spent on losing requests) are capped, and reported at the end
+of the run.
+"""
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Callable, Optional
+
+from xlf_probe import percentile
+
+
+class Hedger:
+    """Decides when to hedge a batch and runs the race between the two requests"""
+
+    def __init__(
+        self,
+        latency_percentile: float = 95.0,
+        max_rate: float = 0.1,
+        max_overhead: float = 0.1,
+        min_samples: int = 10,
+        window: int = 200,
+        max_workers: int = 32
+    ):
+        """
+        Initialize the hedger.
+
+        Args:
+            latency_percentile: A batch is hedged once it is slower than this
+                percentile of recent batches (scaled to its number of items)
+            max_rate: Maximum share of batches that may be hedged (0..1)
+            max_overhead: Maximum share of all tokens that may be spent on
+                losing requests (0..1)
+            min_samples: Completed batches needed before hedging starts
+            window: Number of recent batches the percentile is taken over
+            max_workers: Threads available for racing requests
+        """
+        self.latency_percentile = latency_percentile
+        self.max_rate = max_rate
+        self.max_overhead = max_overhead
+        self.min_samples = min_samples
+
+        self.stats = {
+            'batches': 0,
+            'hedged': 0,
+            'hedge_wins': 0,
+            'cancelled': 0,
+            'tokens': 0,
+            'overhead_tokens': 0,
+        }
+        self._item_latencies = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='hedge')
+
+    def record(self, latency: float, items: int, tokens: int):
+        """
+        Account for one completed batch.
+
+        Args:
+            latency: Time until the batch had a usable response, in seconds
+            items: Number of units in the batch
+            tokens: Input + output tokens of the response that was used
+        """
+        with self._lock:
+            self._item_latencies.append(latency / max(1, items))
+            self.stats['tokens'] += tokens
+
+    def _record_overhead(self, future: Future):
+        """Done-callback for a losing request: its tokens are pure overhead."""
+        if future.cancelled() or future.exception() is not None:
+            return
+        tokens = future.result().tokens
+        with self._lock:
+            self.stats['tokens'] += tokens
+            self.stats['overhead_tokens'] += tokens
+
+    def delay(self, items: int) -> Optional[float]:
+        """
+        Seconds after which a batch of this size should be hedged.
+
+        Returns:
+            Delay in seconds, or None while there are too few samples or the
+            rate / overhead caps are reached
+        """
+        with self._lock:
+            if len(self._item_latencies) < self.min_samples:
+                return None
+            if self.stats['hedged'] >= self.max_rate * max(1, self.stats['batches']):
+                return None
+            if self.stats['overhead_tokens'] > self.max_overhead * max(1, self.stats['tokens']):
+                return None
+            return percentile(list(self._item_latencies), self.latency_percentile) * items
+
+    def run(
+        self,
+        primary: Callable[[], object],
+        hedge: Callable[[], Optional[Callable[[], object]]],
+        valid: Callable[[object], bool],
+        items: int
+    ) -> object:
+        """
+        Run a request, hedging it if it is slow.
+
+        Args:
+            primary: Sends the request to the batch's provider and returns a
+                result with a `tokens` attribute (exceptions are raised)
+            hedge: Reserves a second provider and returns a function sending the
+                same request there, or None if no provider is free
+            valid: Whether a result is usable (e.g. has one item per unit)
+            items: Number of units in the batch
+
+        Returns:
+            The first valid result, or the primary's result / exception if
+            neither is valid
+        """
+        with self._lock:
+            self.stats['batches'] += 1
+
+        started = time.monotonic()
+
+        def finish(future: Future) -> object:
+            result = future.result()
+            self.record(time.monotonic() - started, items, result.tokens)
+            return result
+
+        primary_future = self._executor.submit(primary)
+        delay = self.delay(items)
+        if delay is None or wait([primary_future], timeout=delay).done:
+            return finish(primary_future)
+
+        hedge_call = hedge()
+        if hedge_call is None:
+            return finish(primary_future)
+
+        with self._lock:
+            self.stats['hedged'] += 1
+        hedge_future = self._executor.submit(hedge_call)
+
+        pending = {primary_future, hedge_future}
+        winner = None
+        while pending and winner is None:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None and valid(future.result()):
+                    winner = future
+                    break
+
+        if winner is None:
+            return finish(primary_future)
+
+        loser = hedge_future if winner is primary_future else primary_future
+        if loser.cancel():
+            with self._lock:
+                self.stats['cancelled'] += 1
+        else:
+            loser.add_done_callback(self._record_overhead)
+        if winner is hedge_future:
+            with self._lock:
+                self.stats['hedge_wins'] += 1
+        return finish(winner)
+
+    def summary(self) -> str:
+        """One-line summary of hedging activity and cost."""
+        with self._lock:
+            s = dict(self.stats)
+        rate = s['hedged'] / s['batches'] * 100 if s['batches'] else 0.0
+        overhead = s['overhead_tokens'] / s['tokens'] * 100 if s['tokens'] else 0.0
+        return (
+            f"Hedging: {s['hedged']}/{s['batches']} batches hedged ({rate:.1f}%), "
+            f"{s['hedge_wins']} won by the hedge, {s['overhead_tokens']} overhead tokens ({overhead:.1f}%)"
+        )
@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+"""
+Decomposition of ICU plural/select messages into leaf strings.
+
+Angular extracts ICU expressions as a single trans-unit:
+
+    {VAR_PLURAL, plural, =0 {No bonuses} =1 {One bonus} other {<x id="INTERPOLATION"/> bonuses}}
+
+Sent as a whole, the model has to reproduce the ICU syntax around the text,
+often breaks it, and the whole message fails validation and is sent again on
+the next run. IcuMessage splits a message into its leaf strings (the text of
+each case, with nested expressions and the plural `#` replaced by
+placeholders):
+
+    No bonuses
+    One bonus
+    <x id="INTERPOLATION"/> bonuses
+
+The leaves are translated like any other unit and the ICU syntax is
+reassembled locally, so it cannot be broken by the model. Plural
+expressions get the plural categories of the target language that the
+source does not have (Polish needs `few` and `many` next to `one` and
+`other`); their text starts from the source's `other` case and the model is
+told which form to produce.
+"""
+
+import re
+from typing import List, NamedTuple, Optional, Tuple, Union
+
+# Placeholders standing in for ICU syntax inside leaf strings
+COUNT_PLACEHOLDER = '<x id="ICU_COUNT"/>'
+NESTED_PLACEHOLDER = '<x id="ICU_NESTED_{}"/>'
+
+_HEAD_RE = re.compile(r'\s*([\w.]+)\s*,\s*(plural|select|selectordinal)\s*,(\s*offset:\s*\d+)?\s*')
+_CASE_RE = re.compile(r'\s*(=?[\w-]+)\s*\{')
+_END_RE = re.compile(r'\s*\}')
+_TAG_RE = re.compile(r'<[^>]*>')
+_PLACEHOLDER_RE = re.compile(r'<x\s+id="ICU_(COUNT|NESTED_(\d+))"\s*/>')
+_LETTER_RE = re.compile(r'[^\W\d_]')
+
+# CLDR cardinal plural categories of target languages, with the counts they are used for (for the prompt).
+# The `many` category of French, Spanish, Italian and Portuguese only applies to exact
+# millions in compact notation (and falls back to `other`), so it is left out.
+PLURAL_CATEGORIES = {
+    'English': {'one': '1', 'other': '0, 2-16'},
+    'French': {'one': '0, 1', 'other': '2-17'},
+    'Spanish': {'one': '1', 'other': '0, 2-16'},
+    'German': {'one': '1', 'other': '0, 2-16'},
+    'Italian': {'one': '1', 'other': '0, 2-16'},
+    'Portuguese': {'one': '0, 1', 'other': '2-17'},
+    'Polish': {'one': '1', 'few': '2-4, 22-24, 32-34', 'many': '0, 5-21, 25-31', 'other': 'fractions such as 1.5'},
+    'Swedish': {'one': '1', 'other': '0, 2-16'},
+    'Norwegian': {'one': '1', 'other': '0, 2-16'},
+    'Finnish': {'one': '1', 'other': '0, 2-16'},
+    'Czech': {'one': '1', 'few': '2-4', 'many': 'fractions such as 1.5', 'other': '0, 5-19'},
+    'Russian': {'one': '1, 21, 31', 'few': '2-4, 22-24', 'many': '0, 5-20, 25-30', 'other': 'fractions such as 1.5'},
+    'Ukrainian': {'one': '1, 21, 31', 'few': '2-4, 22-24', 'many': '0, 5-20, 25-30', 'other': 'fractions such as 1.5'},
+    'Croatian': {'one': '1, 21, 31', 'few': '2-4, 22-24', 'other': '0, 5-20'},
+    'Lithuanian': {'one': '1, 21, 31', 'few': '2-9, 22-29', 'many': 'fractions such as 0.1', 'other': '0, 10-20, 30'},
+    'Romanian': {'one': '1', 'few': '0, 2-19, 101', 'other': '20-100'},
+    'Arabic': {'zero': '0', 'one': '1', 'two': '2', 'few': '3-10', 'many': '11-99', 'other': '100-102'},
+}
+
+
+def _covered(counts: str, selectors: set) -> bool:
+    # Whether every count of a category has an explicit =N case (e.g. French `one` with =0 and =1)
+    numbers = counts.split(', ')
+    return all(number.isdigit() and f'={number}' in selectors for number in numbers)
+
+
+class _Case(NamedTuple):
+    prefix: str  # Whitespace and selector before the case's '{', e.g. ' =0 '
+    selector: str
+    body: 'Body'
+
+
+class Expression(NamedTuple):
+    """A plural/select expression; `head` is the text between '{' and the first case"""
+    head: str
+    variable: str
+    kind: str
+    cases: List[_Case]
+    tail: str  # Whitespace before the closing '}'
+
+
+# Message text: raw text (including inline tags and simple {arguments}) and expressions
+Body = List[Union[str, Expression]]
+
+
+def _skip_tag(text: str, pos: int) -> int:
+    end = text.find('>', pos)
+    if end < 0:
+        raise ValueError("unterminated tag")
+    return end + 1
+
+
+def _parse_body(text: str, pos: int, nested: bool) -> Tuple[Body, int]:
+    # Body up to an unmatched '}' (if nested) or the end of the text
+    body: Body = []
+    start = pos
+    while pos < len(text):
+        char = text[pos]
+        if char == '<':
+            pos = _skip_tag(text, pos)
+        elif char == '{':
+            head = _HEAD_RE.match(text, pos + 1)
+            if head is None:
+                # Simple argument or Angular interpolation: kept as text
+                pos = _skip_argument(text, pos + 1)
+                continue
+            if pos > start:
+                body.append(text[start:pos])
+            expression, pos = _parse_expression(text, head)
+            body.append(expression)
+            start = pos
+        elif char == '}':
+            if not nested:
+                raise ValueError("unbalanced braces")
+            break
+        else:
+            pos += 1
+    else:
+        if nested:
+            raise ValueError("unbalanced braces")
+    if pos > start:
+        body.append(text[start:pos])
+    return body, pos
+
+
+def _skip_argument(text: str, pos: int) -> int:
+    # Position after the '}' that closes a simple argument
+    depth = 1
+    while pos < len(text):
+        if text[pos] == '<':
+            pos = _skip_tag(text, pos)
+            continue
+        depth += {'{': 1, '}': -1}.get(text[pos], 0)
+        pos += 1
+        if depth == 0:
+            return pos
+    raise ValueError("unbalanced braces")
+
+
+def _parse_expression(text: str, head: re.Match) -> Tuple[Expression, int]:
+    variable, kind = head.group(1), head.group(2)
+    pos = head.end()
+    cases = []
+    while True:
+        case = _CASE_RE.match(text, pos)
+        if case is None:
+            end = _END_RE.match(text, pos)
+            if end is None:
+                raise ValueError(f"malformed {kind} expression for {variable}")
+            return Expression(head.group(0), variable, kind, cases, text[pos:end.end() - 1]), end.end()
+        body, pos = _parse_body(text, case.end(), nested=True)
+        cases.append(_Case(text[case.start():case.end() - 1], case.group(1), body))
+        pos += 1
+
+
+class IcuLeaf:
+    """One leaf string of an ICU message; stands in for the target element in unit tuples"""
+
+    def __init__(self, message: 'IcuMessage', index: int, text: str, hint: Optional[str] = None):
+        """
+        Initialize the leaf.
+
+        Args:
+            message: Message the leaf belongs to
+            index: Position of the leaf in the message
+            text: Leaf source text
+            hint: Plural form the translation must take, for the prompt
+        """
+        self.message = message
+        self.index = index
+        self.text = text
+        self.hint = hint
+
+    @property
+    def shared(self) -> bool:
+        """Whether the translation depends only on the text (plural forms also depend on their category)."""
+        return self.hint is None
+
+
+class IcuMessage:
+    """An ICU message of a trans-unit, split into leaf strings"""
+
+    def __init__(self, unit: tuple, body: Body, target_language: str):
+        """
+        Split a parsed message into leaves (use IcuMessage.parse).
+
+        Args:
+            unit: (trans_unit, target_element, source_text) of the message
+            body: Parsed source text
+            target_language: Target language (decides the plural categories)
+        """
+        self.unit = unit
+        self.source = unit[2]
+        self.target_language = target_language
+        self.leaves: List[IcuLeaf] = []
+        # Whitespace around each leaf's text in the source, restored on assembly
+        self._padding: List[Tuple[str, str]] = []
+        # Plural expressions that got categories of the target language
+        self._hinted = set()
+        self.body = self._expand(body)
+        self._add_leaves(self.body, counted=False, hint=None)
+        self.translations: List[Optional[str]] = [
+            None if self._translatable(leaf.text) else leaf.text for leaf in self.leaves
+        ]
+
+    @classmethod
+    def parse(cls, unit: tuple, target_language: str) -> Optional['IcuMessage']:
+        """
+        Split the source of a unit into leaves if it contains a plural/select expression.
+
+        Args:
+            unit: (trans_unit, target_element, source_text, ...) tuple
+            target_language: Target language
+
+        Returns:
+            IcuMessage, or None for plain or malformed messages (translated as a whole)
+        """
+        if '{' not in unit[2]:
+            return None
+        try:
+            body, _ = _parse_body(unit[2], 0, nested=False)
+        except ValueError:
+            return None
+        if not any(isinstance(part, Expression) for part in body):
+            return None
+        return cls(tuple(unit[:3]), body, target_language)
+
+    def _expand(self, body: Body) -> Body:
+        # Copy of the body with the missing plural categories of the target language added
+        expanded = []
+        for part in body:
+            if not isinstance(part, Expression):
+                expanded.append(part)
+                continue
+            cases = [_Case(case.prefix, case.selector, self._expand(case.body)) for case in part.cases]
+            categories = PLURAL_CATEGORIES.get(self.target_language, {})
+            present = {case.selector for case in cases}
+            other = next((case for case in cases if case.selector == 'other'), None)
+            missing = [
+                category for category, counts in categories.items()
+                if category not in present and not _covered(counts, present)
+            ]
+            if part.kind == 'plural' and other is not None and missing:
+                separator = re.match(r'\s*', other.prefix).group(0) or ' '
+                added = [_Case(f"{separator}{category} ", category, other.body) for category in missing]
+                index = cases.index(other)
+                cases[index:index] = added
+                part = part._replace(cases=cases)
+                # The model is told the form of every category of the expression
+                self._hinted.add(id(part))
+            else:
+                part = part._replace(cases=cases)
+            expanded.append(part)
+        return expanded
+
+    def _add_leaves(self, body: Body, counted: bool, hint: Optional[str]):
+        # One leaf per body: text with nested expressions and `#` replaced by placeholders
+        parts = []
+        nested = []
+        for part in body:
+            if isinstance(part, Expression):
+                nested.append(part)
+                parts.append(NESTED_PLACEHOLDER.format(len(nested)))
+            elif counted:
+                parts.append(''.join(
+                    piece if piece.startswith('<') else piece.replace('#', COUNT_PLACEHOLDER)
+                    for piece in re.split(r'(<[^>]*>)', part)
+                ))
+            else:
+                parts.append(part)
+        raw = ''.join(parts)
+        text = raw.strip()
+        leading = raw[:len(raw) - len(raw.lstrip())]
+        self._padding.append((leading, raw[len(leading) + len(text):]))
+        self.leaves.append(IcuLeaf(self, len(self.leaves), text, hint))
+
+        categories = PLURAL_CATEGORIES.get(self.target_language, {})
+        for expression in nested:
+            for case in expression.cases:
+                case_hint = hint
+                if id(expression) in self._hinted and case.selector in categories:
+                    case_hint = (f"{self.target_language} plural form '{case.selector}' "
+                                 f"(used for {categories[case.selector]})")
+                self._add_leaves(case.body, counted or expression.kind in ('plural', 'selectordinal'), case_hint)
+
+    @staticmethod
+    def _translatable(text: str) -> bool:
+        # Leaves with no letters outside markup (only placeholders, numbers or punctuation) are kept as they are
+        return bool(_LETTER_RE.search(_TAG_RE.sub('', text)))
+
+    def pending(self) -> List[IcuLeaf]:
+        """Leaves that still need a translation."""
+        return [leaf for leaf in self.leaves if self.translations[leaf.index] is None]
+
+    def restore(self, translations: List[Optional[str]]):
+        """
+        Reuse leaf translations of an earlier, incomplete run.
+
+        Args:
+            translations: Leaf translations as returned by progress() (ignored if the leaves differ)
+        """
+        if len(translations) == len(self.leaves):
+            self.translations = [
+                current if current is not None else previous
+                for current, previous in zip(self.translations, translations)
+            ]
+
+    def progress(self) -> dict:
+        """Leaf translations so far, for the unit state sidecar."""
+        return {'source': self.source, 'leaves': list(self.translations)}
+
+    def assemble(self) -> Optional[str]:
+        """
+        Rebuild the message from the translated leaves.
+
+        Returns:
+            Translated ICU message, or None while leaves are missing
+        """
+        if any(translation is None for translation in self.translations):
+            return None
+        return self._render(self.body, iter(range(len(self.leaves))))
+
+    def _render(self, body: Body, indexes) -> str:
+        # Leaves are numbered in the same (pre-)order _add_leaves created them
+        index = next(indexes)
+        translation = self.translations[index]
+        nested = [part for part in body if isinstance(part, Expression)]
+        rendered = {
+            number: self._render_expression(expression, indexes)
+            for number, expression in enumerate(nested, 1)
+        }
+
+        def replace(match: re.Match) -> str:
+            if match.group(1) == 'COUNT':
+                return '#'
+            return rendered.get(int(match.group(2)), '')
+
+        leading, trailing = self._padding[index]
+        return f"{leading}{_PLACEHOLDER_RE.sub(replace, translation)}{trailing}"
+
+    def _render_expression(self, expression: Expression, indexes) -> str:
+        cases = ''.join(
+            f"{case.prefix}{{{self._render(case.body, indexes)}}}" for case in expression.cases
+        )
+        return f"{{{expression.head}{cases}{expression.tail}}}"
@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+"""
+Translation memory with exact and fuzzy lookup for XLIFF translation runs.
+
+Past translations are kept per target language. Exact matches are reused as-is.
+Fuzzy matches are found with a MinHash LSH index over character trigrams, so a
+lookup only compares the query against a handful of candidate entries instead
+of the whole memory:
+
+    "Weekly deposit limit reached"  ~  "Deposit limit reached"  (0.74)
+
+Fuzzy matches are used as reference examples in the translation prompt. Very
+close matches that only differ in numbers or placeholders (e.g. "100 free
+spins" vs "150 free spins") are reused directly after substituting the
+differing tokens in the stored translation, without calling the model.
+
+The memory can be persisted to a JSON file and shared between runs and locales.
+It is safe to use from several threads (e.g. concurrent jobs of the
+translation service).
+"""
+
+import difflib
+import hashlib
+import json
+import os
+import re
+import struct
+import threading
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+
+
+class MemoryMatch(NamedTuple):
+    """A translation memory hit"""
+    source: str
+    target: str
+    score: float
+
+
+class TranslationMemory:
+    """In-memory translation memory with a MinHash LSH fuzzy index"""
+
+    VERSION = 1
+
+    # MinHash LSH parameters: 20 bands of 3 rows gives a high candidate
+    # probability above ~0.5 trigram Jaccard similarity.
+    NUM_BANDS = 20
+    ROWS_PER_BAND = 3
+    NGRAM = 3
+
+    # Inline markup, Angular interpolations, words, and single punctuation marks
+    _TOKEN_RE = re.compile(r'<[^>]+>|\{\{.*?\}\}|\w+|[^\w\s]')
+    # Tokens that are copied verbatim into translations and can be substituted locally
+    _SUBSTITUTABLE_RE = re.compile(r'^(?:<[^>]+>|\{\{.*?\}\}|[\d.,:%]*\d[\d.,:%]*)$')
+
+    def __init__(self, path: Optional[Path] = None):
+        """
+        Create a translation memory, loading it from disk if a path is given.
+
+        Args:
+            path: Optional JSON file to load from and save to
+        """
+        self.path = path
+        # language -> source -> (target, origin)
+        self._entries: Dict[str, Dict[str, Tuple[str, str]]] = {}
+        # language -> source -> trigram set
+        self._shingles: Dict[str, Dict[str, Set[str]]] = {}
+        # language -> (band index, band hash) -> sources
+        self._buckets: Dict[str, Dict[Tuple[int, int], List[str]]] = {}
+        # language -> sources not yet in the fuzzy index (indexed on the first fuzzy lookup,
+        # so loading or importing a large memory is fast)
+        self._unindexed: Dict[str, List[str]] = {}
+        # trigram -> signature row hashes
+        self._shingle_hashes: Dict[str, Tuple[int, ...]] = {}
+        self._dirty = False
+        self._lock = threading.RLock()
+
+        if path is not None and path.exists():
+            try:
+                with open(path, encoding='utf-8') as f:
+                    data = json.load(f)
+                for entry in data.get('entries', []):
+                    self.add(
+                        entry['source'],
+                        entry['target'],
+                        entry['language'],
+                        entry.get('origin', 'memory')
+                    )
+                self._dirty = False
+            except (OSError, ValueError, KeyError) as e:
+                print(f"Warning: Could not read translation memory {path.name}: {e}")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return sum(len(entries) for entries in self._entries.values())
+
+    @staticmethod
+    def _normalize(text: str) -> str:
+        return ' '.join(text.lower().split())
+
+    def _ngrams(self, text: str) -> Set[str]:
+        text = f" {self._normalize(text)} "
+        if len(text) <= self.NGRAM:
+            return {text}
+        return {text[i:i + self.NGRAM] for i in range(len(text) - self.NGRAM + 1)}
+
+    def _band_keys(self, shingles: Set[str]) -> List[Tuple[int, int]]:
+        # One 32-bit hash per signature row from a single SHAKE digest of each trigram
+        # (stable across runs); trigrams repeat a lot, so their digests are cached
+        count = self.NUM_BANDS * self.ROWS_PER_BAND
+        columns = []
+        for shingle in shingles:
+            hashes = self._shingle_hashes.get(shingle)
+            if hashes is None:
+                digest = hashlib.shake_128(shingle.encode('utf-8')).digest(4 * count)
+                hashes = self._shingle_hashes[shingle] = struct.unpack(f'<{count}I', digest)
+            columns.append(hashes)
+        signature = list(map(min, zip(*columns)))
+        rows = self.ROWS_PER_BAND
+        return [
+            (band, hash(tuple(signature[band * rows:(band + 1) * rows])))
+            for band in range(self.NUM_BANDS)
+        ]
+
+    def add(self, source: str, target: str, language: str, origin: str = 'translation'):
+        """
+        Add or update a translation.
+
+        Args:
+            source: Source text
+            target: Translated text
+            language: Target language
+            origin: Where the translation came from (e.g. 'file', 'translation', 'tmx')
+        """
+        if not source.strip() or not target.strip():
+            return
+
+        with self._lock:
+            entries = self._entries.setdefault(language, {})
+            if source in entries:
+                if entries[source] != (target, origin):
+                    entries[source] = (target, origin)
+                    self._dirty = True
+                return
+
+            entries[source] = (target, origin)
+            self._dirty = True
+            self._unindexed.setdefault(language, []).append(source)
+
+    def discard(self, source: str, language: str, target: Optional[str] = None) -> bool:
+        """
+        Remove a translation (e.g. one found to be wrong).
+
+        Args:
+            source: Source text
+            language: Target language
+            target: Only remove the entry if it has this translation
+
+        Returns:
+            True if an entry was removed
+        """
+        with self._lock:
+            entries = self._entries.get(language, {})
+            if source not in entries or (target is not None and entries[source][0] != target):
+                return False
+            del entries[source]
+            self._dirty = True
+
+            shingles = self._shingles.get(language, {}).pop(source, None)
+            if shingles is None:
+                self._unindexed[language].remove(source)
+                return True
+            buckets = self._buckets[language]
+            for key in self._band_keys(shingles):
+                buckets[key].remove(source)
+            return True
+
+    def _index(self, language: str):
+        # Add the sources added since the last fuzzy lookup to the LSH index (caller holds the lock)
+        pending = self._unindexed.pop(language, None)
+        if not pending:
+            return
+        stored_shingles = self._shingles.setdefault(language, {})
+        buckets = self._buckets.setdefault(language, {})
+        for source in pending:
+            shingles = self._ngrams(source)
+            stored_shingles[source] = shingles
+            for key in self._band_keys(shingles):
+                buckets.setdefault(key, []).append(source)
+
+    def exact(self, source: str, language: str) -> Optional[str]:
+        """
+        Look up an exact match.
+
+        Args:
+            source: Source text
+            language: Target language
+
+        Returns:
+            Stored translation, or None
+        """
+        with self._lock:
+            entry = self._entries.get(language, {}).get(source)
+        return entry[0] if entry else None
+
+    def fuzzy(
+        self,
+        source: str,
+        language: str,
+        limit: int = 3,
+        threshold: float = 0.5
+    ) -> List[MemoryMatch]:
+        """
+        Find the closest stored translations for a source text.
+
+        Args:
+            source: Source text
+            language: Target language
+            limit: Maximum number of matches to return
+            threshold: Minimum trigram Jaccard similarity (0..1)
+
+        Returns:
+            Matches sorted by descending similarity (exact matches excluded)
+        """
+        shingles = self._ngrams(source)
+        band_keys = self._band_keys(shingles)
+
+        with self._lock:
+            self._index(language)
+            buckets = self._buckets.get(language)
+            if not buckets:
+                return []
+
+            candidates = set()
+            for key in band_keys:
+                candidates.update(buckets.get(key, ()))
+            candidates.discard(source)
+
+            stored_shingles = self._shingles[language]
+            entries = self._entries[language]
+            matches = []
+            for candidate in candidates:
+                other = stored_shingles[candidate]
+                score = len(shingles & other) / len(shingles | other)
+                if score >= threshold:
+                    matches.append(MemoryMatch(candidate, entries[candidate][0], score))
+
+        matches.sort(key=lambda m: (-m.score, m.source))
+        return matches[:limit]
+
+    def substitute(self, match: MemoryMatch, source: str) -> Optional[str]:
+        """
+        Adapt a fuzzy match to a new source by local token substitution.
+
+        Only works when the sources differ in tokens that are copied verbatim
+        into the translation (numbers, amounts, inline tags, interpolations),
+        and each replaced token occurs exactly once in the stored translation.
+
+        Args:
+            match: Fuzzy match to adapt
+            source: New source text
+
+        Returns:
+            Adapted translation, or None if the difference needs the model
+        """
+        old_tokens = self._TOKEN_RE.findall(match.source)
+        new_tokens = self._TOKEN_RE.findall(source)
+        matcher = difflib.SequenceMatcher(None, old_tokens, new_tokens, autojunk=False)
+
+        target = match.target
+        replacements = []
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+            if tag == 'equal':
+                continue
+            if tag != 'replace' or i2 - i1 != j2 - j1:
+                return None
+            for old, new in zip(old_tokens[i1:i2], new_tokens[j1:j2]):
+                if not self._SUBSTITUTABLE_RE.match(old) or not self._SUBSTITUTABLE_RE.match(new):
+                    return None
+                pattern = re.escape(old) if old.startswith(('<', '{')) else rf'(?<![\w.,]){re.escape(old)}(?![\w]|[.,]\d)'
+                found = list(re.finditer(pattern, target))
+                if len(found) != 1:
+                    return None
+                replacements.append((found[0].span(), new))
+
+        if not replacements:
+            return None
+
+        # Rebuild from the spans in the original target, so a new value that equals
+        # another old token (100 -> 150 next to 150 -> 200) is not replaced again
+        replacements.sort()
+        parts = []
+        position = 0
+        for (start, end), new in replacements:
+            if start < position:
+                return None
+            parts.append(target[position:start])
+            parts.append(new)
+            position = end
+        parts.append(target[position:])
+        return ''.join(parts)
+
+    def copy(self, language: Optional[str] = None) -> 'TranslationMemory':
+        """
+        Scratch copy that is never saved (e.g. to plan a run without changing this memory).
+
+        Args:
+            language: Only copy the entries of this target language
+
+        Returns:
+            TranslationMemory without a path
+        """
+        memory = TranslationMemory()
+        with self._lock:
+            for lang in [language] if language is not None else list(self._entries):
+                if lang in self._entries:
+                    memory._entries[lang] = dict(self._entries[lang])
+                if lang in self._shingles:
+                    memory._shingles[lang] = dict(self._shingles[lang])
+                if lang in self._buckets:
+                    memory._buckets[lang] = {key: list(sources) for key, sources in self._buckets[lang].items()}
+                if lang in self._unindexed:
+                    memory._unindexed[lang] = list(self._unindexed[lang])
+            # Trigram digests only depend on the trigram
+            memory._shingle_hashes = self._shingle_hashes
+        return memory
+
+    def languages(self) -> List[str]:
+        """Target languages with at least one entry."""
+        with self._lock:
+            return sorted(language for language, entries in self._entries.items() if entries)
+
+    def entries(self, language: str) -> List[Tuple[str, str, str]]:
+        """
+        Snapshot of the entries of a language.
+
+        Args:
+            language: Target language
+
+        Returns:
+            List of (source, target, origin), sorted by source
+        """
+        with self._lock:
+            return [(source, target, origin) for source, (target, origin) in sorted(self._entries.get(language, {}).items())]
+
+    def save(self):
+        """Write the memory to its JSON file if it has one and changed (atomic replace)."""
+        with self._lock:
+            if self.path is None or not self._dirty:
+                return
+
+            entries = [
+                {'source': source, 'target': target, 'language': language, 'origin': origin}
+                for language, items in sorted(self._entries.items())
+                for source, (target, origin) in sorted(items.items())
+            ]
+            tmp_path = self.path.with_name(self.path.name + '.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'version': self.VERSION, 'entries': entries}, f, ensure_ascii=False, indent=1)
+            os.replace(tmp_path, self.path)
+            self._dirty = False
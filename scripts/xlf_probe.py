@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Latency and throughput probe for the translation providers.
+
+Used by test_openai_connection.py and test_claude_connection.py (--probe) to
+fire bursts of representative translation requests across candidate models,
+batch sizes and concurrency levels. The resulting JSON report contains
+time-to-first-token, p50/p95/p99 latency, tokens/sec, observed rate-limit
+headroom and a recommended concurrency / batch size / delay per model.
+
+translate_xlf.py reads the report (--probe-report) to pick its defaults for
+the current API key.
+"""
+
+import hashlib
+import json
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+# Representative customer-frontend strings (short labels, sentences, placeholders)
+REPRESENTATIVE_TEXTS = [
+    "Deposit",
+    "Withdraw",
+    "Claim your 100 free spins",
+    "Weekly deposit limit reached",
+    "Your account has been verified successfully.",
+    "Please upload a photo of your ID document to complete verification.",
+    "Hello <x id=\"INTERPOLATION\" equiv-text=\"{{ name }}\"/>, welcome back!",
+    "Set a daily, weekly or monthly limit on the amount you can deposit.",
+    "Bonus wagering requirements must be met before withdrawing winnings.",
+    "Take a break",
+    "Live casino",
+    "You have <x id=\"INTERPOLATION\" equiv-text=\"{{ count }}\"/> unread messages",
+    "Responsible gaming",
+    "Session time limit",
+    "Your withdrawal request is being processed and will be completed within 24 hours.",
+    "Forgot password?",
+    "Minimum deposit: <x id=\"INTERPOLATION\" equiv-text=\"{{ amount }}\"/>",
+    "Self-exclusion period",
+    "Jackpot games",
+    "Accept cookies",
+]
+
+
+def key_fingerprint(api_key: str) -> str:
+    """Short, non-reversible identifier of an API key."""
+    return hashlib.sha256(api_key.encode('utf-8')).hexdigest()[:12]
+
+
+def build_batch(batch_size: int) -> List[str]:
+    """Take batch_size representative texts, cycling through the list."""
+    return [REPRESENTATIVE_TEXTS[i % len(REPRESENTATIVE_TEXTS)] for i in range(batch_size)]
+
+
+def translation_prompt(texts: List[str], target_language: str) -> tuple:
+    """
+    System prompt and numbered user message of a translate_batch request.
+
+    Returns:
+        Tuple of (system_prompt, user_message)
+    """
+    # translate_xlf imports this module for load_recommendation
+    from translate_xlf import XLIFFTranslator
+
+    return XLIFFTranslator._translation_prompt(texts, target_language)
+
+
+def rate_limit_headers(headers) -> Dict[str, str]:
+    """Extract the provider rate-limit headers from an HTTP response."""
+    if headers is None:
+        return {}
+    return {name.lower(): value for name, value in headers.items() if 'ratelimit' in name.lower()}
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile (None for an empty list)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, min(len(ordered), math.ceil(pct / 100.0 * len(ordered))))
+    return ordered[rank - 1]
+
+
+def _round(value: Optional[float], digits: int = 3) -> Optional[float]:
+    return None if value is None else round(value, digits)
+
+
+def run_level(
+    request_fn: Callable[[str, List[str]], dict],
+    model: str,
+    batch_size: int,
+    concurrency: int,
+    num_requests: int
+) -> dict:
+    """
+    Fire one burst of requests and summarize it.
+
+    Args:
+        request_fn: Function (model, texts) -> sample dict with 'status'
+            ('ok', 'rate_limited' or 'error'), 'ttft', 'latency', 'output_tokens', 'headers'
+        model: Model to probe
+        batch_size: Items per request
+        concurrency: Requests in flight at once
+        num_requests: Total requests in the burst
+
+    Returns:
+        Summary dictionary for the report
+    """
+    texts = build_batch(batch_size)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        samples = list(pool.map(lambda _: request_fn(model, texts), range(num_requests)))
+    wall = time.perf_counter() - start
+
+    ok = [s for s in samples if s['status'] == 'ok']
+    latencies = [s['latency'] for s in ok]
+    ttfts = [s['ttft'] for s in ok if s.get('ttft') is not None]
+    output_tokens = sum(s.get('output_tokens') or 0 for s in ok)
+    headers = {}
+    for sample in samples:
+        headers.update(sample.get('headers') or {})
+
+    return {
+        'model': model,
+        'batch_size': batch_size,
+        'concurrency': concurrency,
+        'requests': num_requests,
+        'ok': len(ok),
+        'rate_limited': sum(1 for s in samples if s['status'] == 'rate_limited'),
+        'errors': sum(1 for s in samples if s['status'] == 'error'),
+        'wall_seconds': _round(wall),
+        'ttft_p50': _round(percentile(ttfts, 50)),
+        'latency_p50': _round(percentile(latencies, 50)),
+        'latency_p95': _round(percentile(latencies, 95)),
+        'latency_p99': _round(percentile(latencies, 99)),
+        'output_tokens_per_sec': _round(output_tokens / wall if wall > 0 else 0.0, 1),
+        'items_per_sec': _round(len(ok) * batch_size / wall if wall > 0 else 0.0, 2),
+        'rate_limit_headers': headers,
+    }
+
+
+def recommend(results: List[dict]) -> Dict[str, dict]:
+    """
+    Pick the best clean (no 429s, no errors) configuration per model.
+
+    Returns:
+        Dictionary model -> {'concurrency', 'batch_size', 'delay'}
+    """
+    recommendations = {}
+    for model in dict.fromkeys(r['model'] for r in results):
+        levels = [r for r in results if r['model'] == model]
+        clean = [r for r in levels if r['rate_limited'] == 0 and r['errors'] == 0 and r['ok'] > 0]
+        if clean:
+            best = max(clean, key=lambda r: (r['items_per_sec'], -r['concurrency']))
+            delay = 0.0
+        else:
+            best = min(levels, key=lambda r: (r['concurrency'], r['batch_size']))
+            delay = 1.0
+        recommendations[model] = {
+            'concurrency': best['concurrency'],
+            'batch_size': best['batch_size'],
+            'delay': delay,
+        }
+    return recommendations
+
+
+def run_probe(
+    provider: str,
+    api_key: str,
+    request_fn: Callable[[str, List[str]], dict],
+    models: List[str],
+    batch_sizes: List[int],
+    concurrency_levels: List[int],
+    num_requests: int,
+    target_language: str
+) -> dict:
+    """
+    Probe every model x batch size x concurrency combination.
+
+    Returns:
+        Report dictionary (see save_report)
+    """
+    results = []
+    for model in models:
+        for batch_size in batch_sizes:
+            for concurrency in concurrency_levels:
+                print(f"  {model}: batch {batch_size}, concurrency {concurrency} ...", end=' ', flush=True)
+                level = run_level(request_fn, model, batch_size, concurrency, max(num_requests, concurrency))
+                results.append(level)
+                print(
+                    f"p50 {level['latency_p50']}s, p95 {level['latency_p95']}s, "
+                    f"{level['items_per_sec']} items/s, {level['rate_limited']} rate-limited, {level['errors']} errors"
+                )
+                if level['rate_limited'] and level['ok'] == 0:
+                    break  # Higher concurrency will only hit the limit harder
+
+    return {
+        'provider': provider,
+        'key_fingerprint': key_fingerprint(api_key),
+        'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'target_language': target_language,
+        'results': results,
+        'recommended': recommend(results),
+    }
+
+
+def save_report(report: dict, path: Path):
+    """Write a probe report as JSON."""
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+
+
+def load_recommendation(path: Path, provider: str, model: str, api_key: str) -> Optional[dict]:
+    """
+    Read the recommended settings for a model from a probe report.
+
+    Reports recorded for another provider or API key are ignored, since
+    rate limits depend on the key's account tier.
+
+    Args:
+        path: Probe report JSON file
+        provider: 'openai' or 'anthropic'
+        model: Model that will be used
+        api_key: API key that will be used
+
+    Returns:
+        Dictionary with 'concurrency', 'batch_size' and 'delay', or None
+    """
+    try:
+        with open(path, encoding='utf-8') as f:
+            report = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Warning: Could not read probe report {path}: {e}")
+        return None
+
+    if report.get('provider') != provider:
+        print(f"Warning: Probe report {path.name} is for provider '{report.get('provider')}', ignoring it")
+        return None
+    if report.get('key_fingerprint') != key_fingerprint(api_key):
+        print(f"Warning: Probe report {path.name} was recorded with a different API key, ignoring it")
+        return None
+
+    return report.get('recommended', {}).get(model)
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Profiling hooks for translation runs.
+
+A slow run can spend its time in very different places: parsing, extracting
+and planning the trans-units, waiting for the API, applying results to the
+tree or writing the file. RunProfiler times the phases of a run on the main
+thread (wall and CPU time) and records the peak traced memory of each phase
+with tracemalloc. Requests on worker threads are accounted separately as
+network wait, so local overhead can be told apart from API latency.
+
+Optionally the main thread is also profiled with cProfile; the pstats dump
+can be inspected with `python -m pstats` or snakeviz.
+
+Reports are written next to the output file:
+
+    messages.fr.xlf  ->  messages.fr.xlf.profile.json
+                         messages.fr.xlf.prof       (with cProfile)
+"""
+
+import cProfile
+import json
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional
+
+
+class RunProfiler:
+    """Per-phase wall/CPU timers, peak memory and an optional cProfile of one run"""
+
+    def __init__(self, cpu_profile: bool = False):
+        """
+        Initialize the profiler.
+
+        Args:
+            cpu_profile: Also profile the main thread with cProfile
+        """
+        self.cpu_profile = cpu_profile
+        self.phases: Dict[str, dict] = {}
+        self.totals: dict = {}
+        self._lock = threading.Lock()
+        self._profile: Optional[cProfile.Profile] = None
+        self._own_tracing = False
+        self._started = 0.0
+        self._cpu_started = 0.0
+
+    def start(self):
+        """Start profiling a run (clears the previous run's numbers)."""
+        self.phases = {}
+        self.totals = {}
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._own_tracing = True
+        tracemalloc.reset_peak()
+        if self.cpu_profile:
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        self._started = time.monotonic()
+        self._cpu_started = time.process_time()
+
+    def _add(self, name: str, wall: float, cpu: float, peak: Optional[int] = None):
+        with self._lock:
+            phase = self.phases.setdefault(name, {'calls': 0, 'wall': 0.0, 'cpu': 0.0, 'peak_memory': None})
+            phase['calls'] += 1
+            phase['wall'] += wall
+            phase['cpu'] += cpu
+            if peak is not None:
+                phase['peak_memory'] = max(phase['peak_memory'] or 0, peak)
+
+    @contextmanager
+    def phase(self, name: str):
+        """
+        Time a phase on the main thread (phases must not be nested).
+
+        Args:
+            name: Phase name; repeated phases are summed
+        """
+        tracemalloc.reset_peak()
+        started, cpu_started = time.monotonic(), time.thread_time()
+        try:
+            yield
+        finally:
+            self._add(
+                name,
+                time.monotonic() - started,
+                time.thread_time() - cpu_started,
+                tracemalloc.get_traced_memory()[1]
+            )
+
+    def record(self, name: str, wall: float, cpu: float = 0.0):
+        """
+        Account for work done on a worker thread (e.g. one API request).
+
+        Args:
+            name: Phase name
+            wall: Duration in seconds
+            cpu: CPU time of the worker thread in seconds
+        """
+        self._add(name, wall, cpu)
+
+    def stop(self):
+        """Stop profiling and compute the run totals."""
+        if self._profile is not None:
+            self._profile.disable()
+        current, peak = tracemalloc.get_traced_memory()
+        if self._own_tracing:
+            tracemalloc.stop()
+            self._own_tracing = False
+        self.totals = {
+            'wall': time.monotonic() - self._started,
+            'cpu': time.process_time() - self._cpu_started,
+            'peak_memory': peak,
+        }
+
+    def report(self) -> dict:
+        """Totals and phases as a JSON-serializable dictionary."""
+        with self._lock:
+            phases = {name: dict(phase) for name, phase in self.phases.items()}
+        main_thread = sum(phase['wall'] for phase in phases.values() if phase['peak_memory'] is not None)
+        return {
+            'totals': dict(self.totals, unaccounted=max(0.0, self.totals.get('wall', 0.0) - main_thread)),
+            'phases': phases,
+        }
+
+    def summary(self) -> List[str]:
+        """Table lines of the phases, slowest first."""
+        report = self.report()
+        totals = report['totals']
+        lines = [f"{'phase':<14} {'calls':>7} {'wall':>9} {'cpu':>9} {'peak mem':>10}"]
+        for name, phase in sorted(report['phases'].items(), key=lambda item: -item[1]['wall']):
+            peak = f"{phase['peak_memory'] / 1e6:.1f} MB" if phase['peak_memory'] is not None else 'worker'
+            lines.append(f"{name:<14} {phase['calls']:>7} {phase['wall']:>8.2f}s {phase['cpu']:>8.2f}s {peak:>10}")
+        lines.append(
+            f"{'run':<14} {'':>7} {totals.get('wall', 0.0):>8.2f}s {totals.get('cpu', 0.0):>8.2f}s "
+            f"{totals.get('peak_memory', 0) / 1e6:>7.1f} MB"
+        )
+        return lines
+
+    def write(self, output_path: Path, stats: Optional[dict] = None) -> List[Path]:
+        """
+        Write the profile report (and the cProfile dump) next to a run's output file.
+
+        Args:
+            output_path: XLIFF file the run wrote
+            stats: Translation statistics of the run, stored with the profile
+
+        Returns:
+            Paths written
+        """
+        report_path = output_path.with_name(output_path.name + '.profile.json')
+        report = self.report()
+        if stats is not None:
+            report['stats'] = stats
+        with open(report_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+        paths = [report_path]
+        if self._profile is not None:
+            stats_path = output_path.with_name(output_path.name + '.prof')
+            self._profile.dump_stats(str(stats_path))
+            paths.append(stats_path)
+        return paths
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Per-unit provenance of translations, and selectors for targeted re-runs.
+
+Every target written by a run is recorded in the unit state sidecar (see
+xlf_unit_state) together with where it came from:
+
+    "lobby.title": {"source": "...", "target": "...",
+                    "origin": "translation", "model": "gpt-3.5-turbo",
+                    "prompt": "3f9c2a1b", "at": "2026-10-19T08:41:07Z"}
+
+- origin: 'translation' (model), 'edit' (minimal edit by the model) or
+          'memory' (translation memory, without calling the model)
+- model:  model that produced the text (origins translation and edit)
+- prompt: short hash of the prompt template the model was given, so a
+          changed system prompt can be told apart from the previous one
+- at:     when the target was written (UTC)
+
+Units with the same source text share the provenance of the one translation
+they got. Targets that were already in the file before provenance was
+recorded have none.
+
+A selector picks translated units by their provenance, so a model or prompt
+upgrade only re-translates the units it affects:
+
+    model=gpt-3.5-turbo             translated by gpt-3.5-turbo
+    model=gpt-3.5*,origin!=memory   both conditions (comma = and)
+    prompt!=current                 made with an older prompt template
+    at<2026-06-01                   written before June 2026
+    model=                          no recorded model (memory reuse, unknown)
+
+Values of = and != are shell-style patterns; < and > compare the text (which
+orders ISO timestamps by time). Except for an empty =, a condition never
+matches a unit that does not record the field.
+"""
+
+import fnmatch
+import hashlib
+import re
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+PROVENANCE_FIELDS = ('origin', 'model', 'prompt', 'at')
+
+_CONDITION_RE = re.compile(r'^\s*(\w+)\s*(!=|=|<|>)\s*(.*?)\s*$')
+
+
+def prompt_hash(template: str) -> str:
+    """Short, stable hash of a prompt template."""
+    return hashlib.sha256(template.encode('utf-8')).hexdigest()[:8]
+
+
+def timestamp() -> str:
+    """Current UTC time as recorded in the provenance ('2026-10-19T08:41:07Z')."""
+    return time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())
+
+
+def provenance_of(entry: Optional[dict]) -> Dict[str, str]:
+    """The provenance fields of a unit state entry (empty if it has none)."""
+    return {key: entry[key] for key in PROVENANCE_FIELDS if entry and key in entry}
+
+
+class ProvenanceSelector:
+    """Conditions on the provenance of a unit, all of which must hold"""
+
+    def __init__(self, conditions: List[Tuple[str, str, str]], text: str = ''):
+        """
+        Initialize the selector.
+
+        Args:
+            conditions: (field, operator, value) triples
+            text: The selector as written, for messages
+        """
+        self.conditions = conditions
+        self.text = text
+
+    @classmethod
+    def parse(cls, text: str) -> 'ProvenanceSelector':
+        """
+        Parse a selector such as 'model=gpt-3.5-turbo,prompt!=current'.
+
+        Args:
+            text: Comma-separated conditions
+
+        Returns:
+            ProvenanceSelector
+
+        Raises:
+            ValueError: If a condition is malformed or names an unknown field
+        """
+        conditions = []
+        for part in text.split(','):
+            match = _CONDITION_RE.match(part)
+            if not match:
+                raise ValueError(f"Invalid condition '{part.strip()}' (expected e.g. model=gpt-3.5-turbo)")
+            field, operator, value = match.groups()
+            if field not in PROVENANCE_FIELDS:
+                raise ValueError(f"Unknown field '{field}' (expected one of {', '.join(PROVENANCE_FIELDS)})")
+            conditions.append((field, operator, value))
+        return cls(conditions, text.strip())
+
+    def matches(self, entry: Optional[dict], current_prompts: Iterable[str] = ()) -> bool:
+        """
+        Check a unit state entry against the selector.
+
+        Args:
+            entry: Unit state entry (None for units without one)
+            current_prompts: Prompt hashes of the current templates (for prompt=current)
+
+        Returns:
+            True if every condition holds
+        """
+        provenance = provenance_of(entry)
+        for field, operator, value in self.conditions:
+            actual = provenance.get(field)
+            if actual is None:
+                if operator == '=' and value == '':
+                    continue
+                return False
+            if field == 'prompt' and value == 'current':
+                current = actual in set(current_prompts)
+                if current != (operator == '='):
+                    return False
+            elif operator in ('=', '!='):
+                if fnmatch.fnmatchcase(actual, value) != (operator == '='):
+                    return False
+            elif not (actual < value if operator == '<' else actual > value):
+                return False
+        return True
+
+
+def parse_selector(text: str) -> ProvenanceSelector:
+    """argparse type for --retranslate-where (see ProvenanceSelector.parse)."""
+    return ProvenanceSelector.parse(text)
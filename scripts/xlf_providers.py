@@ -0,0 +1,604 @@
+#!/usr/bin/env python3
+"""
+Translation model providers and a load-balancing provider pool.
+
+Provider wraps one API client + model behind a single complete() call, so the
+translator does not care whether a batch goes to OpenAI or Anthropic. The
+provider SDKs are only imported when a provider is created.
+
+ProviderPool spreads batches across several providers (different vendors,
+API keys or models) in proportion to their live capacity. Every provider has
+its own in-flight window and rate accounting:
+
+- a 429 halves the provider's window and cools it down (honouring retry-after)
+- repeated errors take the provider out of rotation for a growing cool-down
+- with adaptive=True, windows grow by one after a full window of clean requests
+
+Batches are always sent to the provider with the most free capacity, so a
+degraded provider automatically receives less (or no) traffic. Hedge providers
+are kept out of the normal rotation and only receive hedged requests.
+
+Provider specs on the command line look like:
+
+    openai:gpt-4o-mini
+    anthropic:claude-haiku-4-5-20251001
+    openai:gpt-4o-mini@OPENAI_API_KEY_2     (API key read from that env var)
+    local:qwen2.5-7b-instruct               (OpenAI-compatible server at LOCAL_LLM_BASE_URL)
+"""
+
+import os
+import sys
+import threading
+import time
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+
+class Completion(NamedTuple):
+    """Text and token usage of one model response"""
+    text: str
+    input_tokens: int
+    output_tokens: int
+
+
+class Provider:
+    """One model on one API account"""
+
+    name = ''
+    display_name = ''
+    API_KEY_ENV = ''
+    DEFAULT_MODEL = ''
+    REQUIRES_API_KEY = True
+
+    # Run settings for when neither the command line nor a probe report sets them
+    DEFAULT_SETTINGS = {'batch_size': 10, 'delay': 1.0, 'concurrency': 1}
+    # Auto-tune shrinks batches slower than this many seconds
+    LATENCY_TARGET = 20.0
+    # Typical request overhead and throughput, used to plan runs before any request is sent
+    BASE_LATENCY = 0.5
+    INPUT_TOKENS_PER_SECOND = 5000.0
+    OUTPUT_TOKENS_PER_SECOND = 60.0
+
+    # List prices in USD per 1M input / output tokens, by model name prefix (longest prefix wins)
+    PRICES: Dict[str, Tuple[float, float]] = {}
+
+    # Context window in tokens (None: large enough for any batch)
+    context_tokens: Optional[int] = None
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        model: Optional[str] = None,
+        cassette: Optional[Any] = None,
+        key_env: Optional[str] = None
+    ):
+        """
+        Create the provider and its API client.
+
+        Args:
+            api_key: API key (if None, read from key_env or the provider's default env var)
+            model: Model name (default: DEFAULT_MODEL)
+            cassette: Optional record/replay cassette wrapped around the client
+                (in replay mode no API key is needed)
+            key_env: Environment variable holding the API key
+        """
+        self.model = model or self.DEFAULT_MODEL
+        self.key_env = key_env or self.API_KEY_ENV
+        self.api_key = api_key or os.getenv(self.key_env)
+        if not self.api_key and self.REQUIRES_API_KEY and not (cassette and cassette.mode == 'replay'):
+            raise ValueError(
+                f"{self.display_name} API key not provided. Set {self.key_env} environment variable "
+                f"or pass api_key parameter"
+            )
+
+        self.client = self._create_client(self.api_key or 'replay-only')
+        if cassette is not None:
+            self.client = cassette.wrap(self.client)
+
+        self.label = f"{self.name}:{self.model}"
+        if key_env and key_env != self.API_KEY_ENV:
+            self.label += f"@{key_env}"
+
+    def _create_client(self, api_key: str) -> Any:
+        raise NotImplementedError
+
+    @property
+    def price(self) -> Optional[Tuple[float, float]]:
+        """USD per 1M input and output tokens of this model (None if unknown)."""
+        prefixes = [prefix for prefix in self.PRICES if self.model.startswith(prefix)]
+        return self.PRICES[max(prefixes, key=len)] if prefixes else None
+
+    def cost(self, input_tokens: int, output_tokens: int) -> Optional[float]:
+        """
+        Cost of a request in USD.
+
+        Args:
+            input_tokens: Prompt tokens
+            output_tokens: Response tokens
+
+        Returns:
+            Cost in USD, or None if the model's price is unknown
+        """
+        price = self.price
+        if price is None:
+            return None
+        return (input_tokens * price[0] + output_tokens * price[1]) / 1_000_000
+
+    def count_tokens(self, text: str) -> int:
+        """Estimated number of tokens of a text (about 4 characters per token)."""
+        return len(text) // 4 + 1
+
+    def estimate_latency(self, input_tokens: int, output_tokens: int) -> float:
+        """
+        Expected duration of a request in seconds, before any has been measured.
+
+        Args:
+            input_tokens: Prompt tokens
+            output_tokens: Response tokens
+
+        Returns:
+            Seconds
+        """
+        return (
+            self.BASE_LATENCY
+            + input_tokens / self.INPUT_TOKENS_PER_SECOND
+            + output_tokens / self.OUTPUT_TOKENS_PER_SECOND
+        )
+
+    @property
+    def max_batch_tokens(self) -> Optional[int]:
+        """
+        Largest estimated source-token count of one batch (None: no limit).
+
+        The prompt, reference examples and the response (usually longer than the
+        source) all have to fit in the context window.
+        """
+        if self.context_tokens is None:
+            return None
+        return max(50, (self.context_tokens - 500) // 4)
+
+    def complete(self, system: str, user: str, temperature: float, max_tokens: int) -> Completion:
+        """
+        Send one system + user prompt (API errors are raised).
+
+        Args:
+            system: System prompt
+            user: User message
+            temperature: Sampling temperature
+            max_tokens: Maximum response tokens
+
+        Returns:
+            Completion with the stripped response text and token usage
+        """
+        raise NotImplementedError
+
+
+class OpenAIProvider(Provider):
+    """OpenAI chat completions"""
+
+    name = 'openai'
+    display_name = 'OpenAI'
+    API_KEY_ENV = 'OPENAI_API_KEY'
+    DEFAULT_MODEL = 'gpt-3.5-turbo'
+    PRICES = {
+        'gpt-3.5-turbo': (0.50, 1.50),
+        'gpt-4': (30.00, 60.00),
+        'gpt-4-turbo': (10.00, 30.00),
+        'gpt-4o': (2.50, 10.00),
+        'gpt-4o-mini': (0.15, 0.60),
+        'gpt-4.1': (2.00, 8.00),
+        'gpt-4.1-mini': (0.40, 1.60),
+        'gpt-4.1-nano': (0.10, 0.40),
+    }
+
+    def _create_client(self, api_key: str) -> Any:
+        try:
+            from openai import OpenAI
+        except ImportError:
+            print("Error: openai package not installed. Install with: pip install openai")
+            sys.exit(1)
+        return OpenAI(api_key=api_key)
+
+    def _messages(self, system: str, user: str) -> List[dict]:
+        return [
+            {"role": "system", "content": system},
+            {"role": "user", "content": user}
+        ]
+
+    def count_tokens(self, text: str) -> int:
+        """Number of tokens of a text, with tiktoken if it is installed (estimated otherwise)."""
+        if not hasattr(self, '_encoding'):
+            try:
+                import tiktoken
+                try:
+                    self._encoding = tiktoken.encoding_for_model(self.model)
+                except KeyError:
+                    self._encoding = tiktoken.get_encoding('cl100k_base')
+            except Exception:
+                # Not installed, or its encoding files cannot be downloaded
+                self._encoding = None
+        if self._encoding is None:
+            return super().count_tokens(text)
+        return len(self._encoding.encode(text, disallowed_special=()))
+
+    def complete(self, system: str, user: str, temperature: float, max_tokens: int) -> Completion:
+        response = self.client.chat.completions.create(
+            model=self.model,
+            messages=self._messages(system, user),
+            temperature=temperature,
+            max_tokens=max_tokens
+        )
+        usage = response.usage
+        return Completion(
+            response.choices[0].message.content.strip(),
+            usage.prompt_tokens if usage else 0,
+            usage.completion_tokens if usage else 0
+        )
+
+
+class AnthropicProvider(Provider):
+    """Anthropic messages API (Claude)"""
+
+    name = 'anthropic'
+    display_name = 'Anthropic'
+    API_KEY_ENV = 'ANTHROPIC_API_KEY'
+    DEFAULT_MODEL = 'claude-haiku-4-5-20251001'
+    PRICES = {
+        'claude-3-haiku': (0.25, 1.25),
+        'claude-3-5-haiku': (0.80, 4.00),
+        'claude-haiku-4-5': (1.00, 5.00),
+        'claude-3-5-sonnet': (3.00, 15.00),
+        'claude-3-7-sonnet': (3.00, 15.00),
+        'claude-sonnet-4': (3.00, 15.00),
+        'claude-3-opus': (15.00, 75.00),
+        'claude-opus-4': (15.00, 75.00),
+        'claude-opus-4-5': (5.00, 25.00),
+    }
+
+    def _create_client(self, api_key: str) -> Any:
+        try:
+            from anthropic import Anthropic
+        except ImportError:
+            print("Error: anthropic package not installed. Install with: pip install anthropic")
+            sys.exit(1)
+        return Anthropic(api_key=api_key)
+
+    def complete(self, system: str, user: str, temperature: float, max_tokens: int) -> Completion:
+        message = self.client.messages.create(
+            model=self.model,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            system=system,
+            messages=[
+                {"role": "user", "content": user}
+            ]
+        )
+        return Completion(
+            message.content[0].text.strip(),
+            message.usage.input_tokens,
+            message.usage.output_tokens
+        )
+
+
+class LocalProvider(OpenAIProvider):
+    """
+    OpenAI-compatible server such as llama.cpp, vLLM or Ollama.
+
+    Local CPU servers are much slower and have smaller context windows than the
+    hosted APIs, so batches are kept small, requests get a long timeout and the
+    response length is clamped to what is left of the context window. No API key
+    is needed unless the server asks for one.
+    """
+
+    name = 'local'
+    display_name = 'Local'
+    API_KEY_ENV = 'LOCAL_LLM_API_KEY'
+    BASE_URL_ENV = 'LOCAL_LLM_BASE_URL'
+    DEFAULT_BASE_URL = 'http://localhost:8080/v1'
+    DEFAULT_MODEL = 'local-model'
+    REQUIRES_API_KEY = False
+    PRICES = {'': (0.0, 0.0)}
+
+    DEFAULT_SETTINGS = {'batch_size': 5, 'delay': 0.0, 'concurrency': 1}
+    LATENCY_TARGET = 120.0
+    BASE_LATENCY = 1.0
+    INPUT_TOKENS_PER_SECOND = 200.0
+    OUTPUT_TOKENS_PER_SECOND = 10.0
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        model: Optional[str] = None,
+        cassette: Optional[Any] = None,
+        key_env: Optional[str] = None,
+        base_url: Optional[str] = None,
+        context_tokens: int = 4096,
+        timeout: float = 600.0,
+        system_role: bool = True
+    ):
+        """
+        Create the provider and its API client.
+
+        Args:
+            api_key: API key, if the server requires one
+            model: Model name as served (many servers ignore it)
+            cassette: Optional record/replay cassette wrapped around the client
+            key_env: Environment variable holding the API key
+            base_url: Server URL (default: LOCAL_LLM_BASE_URL, else http://localhost:8080/v1)
+            context_tokens: Context window of the served model
+            timeout: Request timeout in seconds
+            system_role: False for chat templates without a system role (the system
+                prompt is then prepended to the user message)
+        """
+        self.base_url = base_url or os.getenv(self.BASE_URL_ENV) or self.DEFAULT_BASE_URL
+        self.context_tokens = context_tokens
+        self.timeout = timeout
+        self.system_role = system_role
+        super().__init__(api_key=api_key, model=model, cassette=cassette, key_env=key_env)
+        self.label = f"{self.label} ({self.base_url})"
+
+    def _create_client(self, api_key: str) -> Any:
+        try:
+            from openai import OpenAI
+        except ImportError:
+            print("Error: openai package not installed. Install with: pip install openai")
+            sys.exit(1)
+        return OpenAI(api_key=api_key, base_url=self.base_url, timeout=self.timeout, max_retries=0)
+
+    def _messages(self, system: str, user: str) -> List[dict]:
+        if self.system_role:
+            return super()._messages(system, user)
+        return [{"role": "user", "content": f"{system}\n\n{user}"}]
+
+    def complete(self, system: str, user: str, temperature: float, max_tokens: int) -> Completion:
+        # Prompt and response share the context window (about 3 characters per token, to be safe)
+        max_tokens = max(64, min(max_tokens, self.context_tokens - (len(system) + len(user)) // 3))
+        return super().complete(system, user, temperature, max_tokens)
+
+
+PROVIDERS = {
+    OpenAIProvider.name: OpenAIProvider,
+    AnthropicProvider.name: AnthropicProvider,
+    LocalProvider.name: LocalProvider,
+}
+
+
+def provider_from_spec(spec: str, cassette: Optional[Any] = None) -> Provider:
+    """
+    Create a provider from a 'name:model[@KEY_ENV]' spec.
+
+    Args:
+        spec: Provider spec, e.g. 'anthropic:claude-haiku-4-5-20251001'
+        cassette: Optional record/replay cassette
+
+    Returns:
+        Provider instance
+    """
+    name, _, rest = spec.partition(':')
+    model, _, key_env = rest.partition('@')
+    if name not in PROVIDERS:
+        raise ValueError(f"Unknown provider '{name}' in '{spec}' (expected one of: {', '.join(PROVIDERS)})")
+    return PROVIDERS[name](model=model or None, cassette=cassette, key_env=key_env or None)
+
+
+def is_rate_limited(error: Exception) -> bool:
+    """True if an API error is a 429 rate-limit response."""
+    return getattr(error, 'status_code', None) == 429
+
+
+def retry_after(error: Exception, attempt: int) -> float:
+    """
+    Seconds to wait after a rate-limit error.
+
+    Uses the provider's retry-after header when present, exponential backoff otherwise.
+    """
+    response = getattr(error, 'response', None)
+    headers = getattr(response, 'headers', None) or {}
+    try:
+        return min(60.0, float(headers.get('retry-after')))
+    except (TypeError, ValueError):
+        return min(60.0, 2.0 ** attempt)
+
+
+class _ProviderState:
+    """Live accounting for one provider in a pool"""
+
+    def __init__(self, limit: int):
+        self.limit = float(limit)
+        self.in_flight = 0
+        self.requests = 0
+        self.ok = 0
+        self.rate_limited = 0
+        self.errors = 0
+        self.consecutive_errors = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.cost = 0.0
+        self.latency = None
+        self.cooldown_until = 0.0
+        self.clean_in_window = 0
+
+
+class ProviderPool:
+    """Dispatches requests across providers in proportion to their live capacity"""
+
+    # Consecutive non-429 errors before a provider is taken out of rotation
+    ERROR_THRESHOLD = 3
+    ERROR_COOLDOWN = 30.0
+
+    def __init__(
+        self,
+        providers: List[Provider],
+        initial_limit: int = 1,
+        max_limit: int = 16,
+        adaptive: bool = False,
+        hedge_providers: Optional[List[Provider]] = None
+    ):
+        """
+        Create a pool.
+
+        Args:
+            providers: Providers to balance across (at least one)
+            initial_limit: Starting in-flight window per provider
+            max_limit: Upper bound for each provider's window
+            adaptive: If True, windows grow after clean requests (they always
+                shrink on rate limits)
+            hedge_providers: Providers reserved for hedged requests
+        """
+        if not providers:
+            raise ValueError("At least one provider is required")
+        self.providers = providers
+        self.hedge_providers = hedge_providers or []
+        self.max_limit = max(1, max_limit)
+        self.adaptive = adaptive
+        self._states: Dict[str, _ProviderState] = {
+            p.label: _ProviderState(max(1, initial_limit)) for p in self.providers + self.hedge_providers
+        }
+        self._lock = threading.Lock()
+
+    @property
+    def primary(self) -> Provider:
+        """The first (default) provider."""
+        return self.providers[0]
+
+    def _free(self, provider: Provider, now: float) -> float:
+        state = self._states[provider.label]
+        if state.cooldown_until > now:
+            return 0.0
+        return int(state.limit) - state.in_flight
+
+    def capacity(self) -> int:
+        """Number of requests that could be dispatched right now."""
+        now = time.monotonic()
+        with self._lock:
+            return int(sum(max(0.0, self._free(p, now)) for p in self.providers))
+
+    def next_available_in(self) -> float:
+        """Seconds until the first cooling-down provider is usable again (0 if one is usable now)."""
+        now = time.monotonic()
+        with self._lock:
+            return max(0.0, min(self._states[p.label].cooldown_until for p in self.providers) - now)
+
+    def acquire(self, avoid: Optional[Provider] = None, hedge: bool = False) -> Optional[Provider]:
+        """
+        Reserve a slot on the provider with the most free capacity.
+
+        Args:
+            avoid: Provider to pick only if no other one is free (e.g. the one a
+                hedged request is already waiting on)
+            hedge: Reserve for a hedged request (hedge providers are tried first)
+
+        Returns:
+            Provider, or None if every provider is full or cooling down
+        """
+        now = time.monotonic()
+        groups = [self.hedge_providers, self.providers] if hedge else [self.providers]
+        groups = [[p for p in group if p is not avoid] for group in groups] + [[avoid] if avoid else []]
+        with self._lock:
+            candidates = []
+            for group in groups:
+                candidates = [p for p in group if self._free(p, now) > 0]
+                if candidates:
+                    break
+            if not candidates:
+                return None
+
+            def load(provider):
+                state = self._states[provider.label]
+                # Providers that just failed (and fail fast) should not look attractive
+                return (state.in_flight / state.limit, state.consecutive_errors, state.latency or 0.0)
+
+            provider = min(candidates, key=load)
+            state = self._states[provider.label]
+            state.in_flight += 1
+            state.requests += 1
+            return provider
+
+    def cancel(self, provider: Provider):
+        """Return a slot that was reserved but not used, without accounting for a request."""
+        with self._lock:
+            state = self._states[provider.label]
+            state.in_flight -= 1
+            state.requests -= 1
+
+    def release(
+        self,
+        provider: Provider,
+        latency: float,
+        completion: Optional[Completion] = None,
+        error: Optional[Exception] = None,
+        attempt: int = 1
+    ):
+        """
+        Return a slot and account for the request's outcome.
+
+        Args:
+            provider: Provider the request was sent to
+            latency: Request duration in seconds
+            completion: Response on success
+            error: Exception on failure
+            attempt: How many times the batch has been tried (for backoff)
+        """
+        now = time.monotonic()
+        with self._lock:
+            state = self._states[provider.label]
+            state.in_flight -= 1
+
+            if error is None:
+                state.latency = latency if state.latency is None else 0.8 * state.latency + 0.2 * latency
+                state.ok += 1
+                state.consecutive_errors = 0
+                if completion is not None:
+                    state.input_tokens += completion.input_tokens
+                    state.output_tokens += completion.output_tokens
+                    state.cost += provider.cost(completion.input_tokens, completion.output_tokens) or 0.0
+                if self.adaptive:
+                    state.clean_in_window += 1
+                    if state.clean_in_window >= int(state.limit):
+                        state.clean_in_window = 0
+                        state.limit = min(float(self.max_limit), state.limit + 1)
+            elif is_rate_limited(error):
+                state.rate_limited += 1
+                state.clean_in_window = 0
+                state.limit = max(1.0, state.limit / 2)
+                state.cooldown_until = max(state.cooldown_until, now + retry_after(error, attempt))
+            else:
+                state.errors += 1
+                state.consecutive_errors += 1
+                if state.consecutive_errors >= self.ERROR_THRESHOLD:
+                    backoff = self.ERROR_COOLDOWN * 2 ** (state.consecutive_errors - self.ERROR_THRESHOLD)
+                    state.cooldown_until = max(state.cooldown_until, now + min(backoff, 600.0))
+
+    def stats(self) -> Dict[str, dict]:
+        """Per-provider accounting, keyed by provider label."""
+        with self._lock:
+            return {
+                label: {
+                    'requests': state.requests,
+                    'ok': state.ok,
+                    'rate_limited': state.rate_limited,
+                    'errors': state.errors,
+                    'input_tokens': state.input_tokens,
+                    'output_tokens': state.output_tokens,
+                    'cost': round(state.cost, 6),
+                    'latency': None if state.latency is None else round(state.latency, 3),
+                    'limit': int(state.limit),
+                }
+                for label, state in self._states.items()
+            }
+
+    def spent(self) -> float:
+        """Total cost in USD of all successful requests (providers with unknown prices count as free)."""
+        with self._lock:
+            return sum(state.cost for state in self._states.values())
+
+    def unpriced(self) -> List[Provider]:
+        """Providers whose model has no known price."""
+        return [p for p in self.providers + self.hedge_providers if p.price is None]
+
+    def summary(self) -> List[str]:
+        """One line per provider."""
+        return [
+            f"{label}: {s['ok']}/{s['requests']} ok, {s['rate_limited']} rate-limited, {s['errors']} errors, "
+            f"{s['input_tokens']}+{s['output_tokens']} tokens (${s['cost']:.4f}), window {s['limit']}"
+            for label, s in self.stats().items()
+        ]
@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+Local quality scan of existing translations.
+
+Refreshing bad translations with --no-skip re-sends every unit of a file.
+QualityScanner scores the existing targets with cheap local signals instead,
+so only the suspect units are sent again:
+
+- copy:         the target is the untranslated source text
+- script:       most letters are not in the target language's script
+- language:     the target reads like English (English function words, few
+                of the target language)
+- placeholders, tags, icu, length: the checks of UnitValidator
+- glossary:     a glossary term of the source is not translated as agreed
+
+Each signal has a weight (SIGNAL_WEIGHTS); units whose weights add up to the
+threshold are suspect. A length outlier alone is not enough, together with
+any other signal it is.
+
+The scan does not call any model. Tag stripping and normalization run over
+the whole file at once, glossary terms are matched with one combined pattern,
+and letters are counted with regular expressions instead of per character, so
+a file with thousands of units is scanned in well under a second. The loop over
+the units stays in Python on purpose: the UnitValidator checks parse each
+unit's inline XML and ICU expressions, which cannot be batched.
+
+The glossary is a JSON file of agreed term translations per language; terms
+under "*" apply to every language (e.g. brand names that stay as they are):
+
+    {
+        "French": {"free spins": "tours gratuits", "wagering": "mise"},
+        "*": {"Jackpot City": "Jackpot City"}
+    }
+"""
+
+import json
+import re
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from xlf_validate import Problem, UnitValidator
+
+SIGNAL_WEIGHTS = {
+    'copy': 1.0,
+    'script': 1.0,
+    'language': 1.0,
+    'placeholders': 1.0,
+    'tags': 1.0,
+    'icu': 1.0,
+    'glossary': 1.0,
+    'length': 0.5,
+}
+
+# Frequent function words; a target with several English ones and few of its own language is suspect
+STOPWORDS = {
+    'English': 'the and of to you your is are for with this that have has will be not on at from by can '
+               'please now our we all more been was',
+    'French': 'le la les des du de et vous votre vos est sont pour avec une un pas sur dans ce cette qui que '
+              'au aux plus nous tous être',
+    'Spanish': 'el la los las de del y que en para con su sus es son por una un no tu usted más se al este esta',
+    'German': 'der die das und ist sind nicht mit für ein eine zu auf sie ihr ihre den dem von wird werden '
+              'bitte jetzt auch',
+    'Italian': 'il lo la le gli di del della e è per con non un una che sono tuo tua ai alla al più questo',
+    'Portuguese': 'o a os as de do da dos das e é para com não um uma que seu sua em no na por mais você',
+    'Polish': 'i w z na nie do się jest są że to o dla od po twoje twój jak ale lub już tylko',
+    'Swedish': 'och att det är som för på med inte en ett av till du din ditt har kan vi eller nu',
+    'Norwegian': 'og å det er som for på med ikke en et av til du din ditt har kan vi eller nå',
+    'Finnish': 'ja on ei se että kanssa tai kun sinun olet ovat voit tämä jos myös nyt mutta kaikki',
+}
+STOPWORDS = {language: set(words.split()) for language, words in STOPWORDS.items()}
+
+# Scripts of target languages that are not written in the Latin alphabet
+SCRIPTS = {
+    'Russian': 'Cyrillic',
+    'Ukrainian': 'Cyrillic',
+    'Bulgarian': 'Cyrillic',
+    'Greek': 'Greek',
+    'Arabic': 'Arabic',
+    'Hebrew': 'Hebrew',
+    'Japanese': 'CJK',
+    'Chinese': 'CJK',
+    'Korean': 'Hangul',
+}
+
+_SCRIPT_RANGES = [
+    (0x0000, 0x024F, 'Latin'),
+    (0x0370, 0x03FF, 'Greek'),
+    (0x0400, 0x052F, 'Cyrillic'),
+    (0x0590, 0x05FF, 'Hebrew'),
+    (0x0600, 0x06FF, 'Arabic'),
+    (0x1E00, 0x1EFF, 'Latin'),
+    (0x3040, 0x30FF, 'CJK'),
+    (0x3400, 0x9FFF, 'CJK'),
+    (0xAC00, 0xD7AF, 'Hangul'),
+]
+
+# Share of letters outside the expected script that makes a target suspect
+MAX_FOREIGN_SCRIPT = 0.3
+# Minimum number of words for the copy and language signals
+MIN_WORDS = 2
+MIN_LANGUAGE_WORDS = 4
+
+_TAG_RE = re.compile(r'<[^>]*>')
+_WORD_RE = re.compile(r'[^\W\d_]{2,}')
+_SEPARATOR = '\x00'
+
+
+def _foreign_pattern(script: str) -> re.Pattern:
+    # Characters outside a script's ranges (the letters among them are foreign)
+    ranges = ''.join(f'\\u{start:04x}-\\u{end:04x}' for start, end, name in _SCRIPT_RANGES if name == script)
+    return re.compile(f'[^{ranges}]+')
+
+
+def _visible(texts: List[str]) -> List[str]:
+    # Tag-free, whitespace-normalized, case-folded texts, processed as one string
+    joined = _TAG_RE.sub(' ', _SEPARATOR.join(texts)).casefold()
+    return [' '.join(text.split()) for text in joined.split(_SEPARATOR)]
+
+
+class Suspect(NamedTuple):
+    """A translation selected by the quality scan"""
+    index: int  # Position in the scanned list
+    score: float
+    problems: List[Problem]
+
+
+class Glossary:
+    """Agreed translations of terms, per target language"""
+
+    def __init__(self, terms: Dict[str, Dict[str, str]]):
+        """
+        Initialize the glossary.
+
+        Args:
+            terms: Language -> source term -> translation ('*' for all languages)
+        """
+        self.terms = terms
+        self._patterns: Dict[str, Optional[re.Pattern]] = {}
+
+    @classmethod
+    def load(cls, path: Path) -> 'Glossary':
+        """
+        Load a glossary JSON file.
+
+        Args:
+            path: JSON file ({language: {term: translation}})
+
+        Returns:
+            Glossary
+
+        Raises:
+            ValueError: If the file is not a glossary
+        """
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        if not isinstance(data, dict) or not all(isinstance(terms, dict) for terms in data.values()):
+            raise ValueError(f"{path} is not a glossary ({{language: {{term: translation}}}})")
+        return cls(data)
+
+    def for_language(self, language: str) -> Dict[str, str]:
+        """Terms of a language, including those for all languages (keys are case-folded)."""
+        merged = dict(self.terms.get('*', {}), **self.terms.get(language, {}))
+        return {term.casefold(): translation for term, translation in merged.items() if term.strip()}
+
+    def pattern(self, language: str) -> Optional[re.Pattern]:
+        """Combined pattern of a language's terms, matching case-folded text (None without terms)."""
+        if language not in self._patterns:
+            terms = sorted(self.for_language(language), key=len, reverse=True)
+            self._patterns[language] = re.compile(
+                r'(?<!\w)(' + '|'.join(map(re.escape, terms)) + r')(?!\w)'
+            ) if terms else None
+        return self._patterns[language]
+
+    def matches(self, texts: List[str], language: str) -> List[Tuple[str, str]]:
+        """
+        Glossary entries whose terms occur in some texts.
+
+        Args:
+            texts: Source texts
+            language: Target language
+
+        Returns:
+            Distinct (term, translation) pairs in order of first occurrence
+        """
+        pattern = self.pattern(language)
+        if pattern is None:
+            return []
+        terms = self.for_language(language)
+        found = dict.fromkeys(pattern.findall(_SEPARATOR.join(_visible(texts))))
+        return [(term, terms[term]) for term in found]
+
+
+class QualityScanner:
+    """Scores existing translations of a file with local heuristics"""
+
+    def __init__(
+        self,
+        target_language: str,
+        glossary: Optional[Glossary] = None,
+        max_length_ratio: float = 3.0,
+        threshold: float = 1.0
+    ):
+        """
+        Initialize the scanner.
+
+        Args:
+            target_language: Language the targets should be in
+            glossary: Optional agreed term translations
+            max_length_ratio: Length ratio for the length signal (0 disables it)
+            threshold: Score (sum of SIGNAL_WEIGHTS) from which a translation is suspect
+        """
+        self.target_language = target_language
+        self.glossary = glossary
+        self.threshold = threshold
+        self.validator = UnitValidator(max_length_ratio)
+        self.script = SCRIPTS.get(target_language, 'Latin')
+        self._foreign = _foreign_pattern(self.script)
+        own = STOPWORDS.get(target_language, set())
+        self._own_words = own
+        # English function words that are not also words of the target language
+        self._english_words = STOPWORDS['English'] - own if target_language != 'English' else set()
+
+    def scan(self, pairs: List[Tuple[str, str]]) -> List[Suspect]:
+        """
+        Score a file's translations.
+
+        Args:
+            pairs: (source, target) inner-XML texts of the translated units
+
+        Returns:
+            Suspect translations, highest score first
+        """
+        sources = _visible([source for source, _ in pairs])
+        targets = _visible([target for _, target in pairs])
+        terms = self.glossary.for_language(self.target_language) if self.glossary is not None else {}
+        term_pattern = self.glossary.pattern(self.target_language) if self.glossary is not None else None
+
+        suspects = []
+        for index, ((source, target), visible_source, visible_target) in enumerate(zip(pairs, sources, targets)):
+            problems = list(self.validator.check(source, target))
+            words = _WORD_RE.findall(visible_target)
+
+            # Glossary terms (e.g. brand names) may stay as they are
+            if visible_target == visible_source and len(words) >= MIN_WORDS and visible_source not in terms:
+                problems.append(Problem('copy', "target is the untranslated source"))
+            elif len(words) >= MIN_LANGUAGE_WORDS and self._english_words:
+                english = sum(1 for word in words if word in self._english_words)
+                own = sum(1 for word in words if word in self._own_words)
+                if english >= 2 and english > own:
+                    problems.append(Problem('language', f"reads like English ({english} English function words)"))
+
+            letters = sum(map(str.isalpha, visible_target))
+            if letters >= 3:
+                foreign = sum(map(str.isalpha, ''.join(self._foreign.findall(visible_target))))
+                if foreign / letters > MAX_FOREIGN_SCRIPT:
+                    problems.append(Problem('script', f"{foreign} of {letters} letters are not {self.script}"))
+
+            if term_pattern is not None:
+                for term in dict.fromkeys(term_pattern.findall(visible_source)):
+                    if terms[term].casefold() not in visible_target:
+                        problems.append(Problem('glossary', f"'{term}' is not translated as '{terms[term]}'"))
+
+            score = sum(SIGNAL_WEIGHTS.get(problem.check, 1.0) for problem in problems)
+            if problems and score >= self.threshold:
+                suspects.append(Suspect(index, score, problems))
+
+        suspects.sort(key=lambda suspect: (-suspect.score, suspect.index))
+        return suspects
+
+    @staticmethod
+    def summary(suspects: List[Suspect]) -> str:
+        """Counts of the signals of suspect translations (e.g. 'copy 12, glossary 4')."""
+        counts: Dict[str, int] = {}
+        for suspect in suspects:
+            for check in dict.fromkeys(problem.check for problem in suspect.problems):
+                counts[check] = counts.get(check, 0) + 1
+        return ', '.join(f"{check} {count}" for check, count in sorted(counts.items(), key=lambda item: -item[1]))
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Priority- and budget-aware scheduling of trans-units.
+
+By default a run works through a locale file in document order, so a run that
+is cut short (CI timeout, spend cap) can leave the most visible strings
+untranslated. The scheduler orders pending units by a priority score and
+stops dispatching new batches when a time budget or a cost limit would be
+exceeded, so the most valuable units are translated first and the run still
+saves cleanly.
+
+A unit's score is the highest weight of the priority rules matching one of its
+source files (the `sourcefile` entries of its location context-groups, e.g.
+src/app/features/deposit/deposit.component.html) or its id. Units used in
+several places get a small bonus. Rules are shell-style patterns, one per line
+in a priority file:
+
+    # pattern                     weight
+    *responsible-gaming*          100
+    *deposit*                     80
+    checkout.*                    60
+"""
+
+import fnmatch
+import time
+from pathlib import Path
+from typing import List, Optional, Tuple
+from xml.etree import ElementTree as ET
+
+
+# The flows players and compliance care about most
+DEFAULT_PRIORITY_RULES: List[Tuple[str, float]] = [
+    ('*responsible-gaming*', 100),
+    ('*self-exclusion*', 100),
+    ('*limits*', 90),
+    ('*kyc*', 90),
+    ('*verification*', 90),
+    ('*deposit*', 80),
+    ('*withdraw*', 80),
+    ('*payment*', 80),
+    ('*cashier*', 80),
+    ('*login*', 70),
+    ('*register*', 70),
+    ('*signup*', 70),
+    ('*lobby*', 60),
+    ('*header*', 50),
+    ('*footer*', 50),
+    ('*nav*', 50),
+    ('*shared*', 40),
+]
+
+
+def load_priority_rules(path: Path) -> List[Tuple[str, float]]:
+    """
+    Read a priority file ('pattern weight' per line, '#' starts a comment).
+
+    Args:
+        path: Priority file
+
+    Returns:
+        List of (pattern, weight) rules
+    """
+    rules = []
+    with open(path, encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.split('#', 1)[0].strip()
+            if not line:
+                continue
+            try:
+                pattern, weight = line.rsplit(None, 1)
+                rules.append((pattern, float(weight)))
+            except ValueError:
+                raise ValueError(f"{path}:{line_number}: expected 'pattern weight', got '{line}'")
+    return rules
+
+
+def parse_duration(value: str) -> float:
+    """
+    Parse a duration such as '90', '90s', '20m' or '1.5h' into seconds.
+
+    Returns:
+        Seconds
+    """
+    units = {'s': 1, 'm': 60, 'h': 3600}
+    value = value.strip().lower()
+    try:
+        if value and value[-1] in units:
+            return float(value[:-1]) * units[value[-1]]
+        return float(value)
+    except ValueError:
+        raise ValueError(f"Invalid duration '{value}' (expected e.g. 90, 90s, 20m or 1.5h)")
+
+
+def unit_locations(trans_unit: ET.Element) -> List[str]:
+    """Source files a trans-unit is used in, from its location context-groups."""
+    return [
+        (context.text or '').strip()
+        for context in trans_unit.iter()
+        if context.tag.endswith('}context') or context.tag == 'context'
+        if context.get('context-type') == 'sourcefile'
+    ]
+
+
+class UnitScheduler:
+    """Orders pending units by priority and enforces a time and cost budget"""
+
+    def __init__(
+        self,
+        rules: Optional[List[Tuple[str, float]]] = None,
+        time_budget: Optional[float] = None,
+        max_cost: Optional[float] = None
+    ):
+        """
+        Initialize the scheduler.
+
+        Args:
+            rules: (pattern, weight) priority rules (default: DEFAULT_PRIORITY_RULES)
+            time_budget: Seconds after the first run starts in which all batches
+                must have completed (None: no limit)
+            max_cost: Maximum spend in USD (None: no limit)
+        """
+        self.rules = rules if rules is not None else DEFAULT_PRIORITY_RULES
+        self.time_budget = time_budget
+        self.max_cost = max_cost
+        self.started: Optional[float] = None
+
+        # Estimated source tokens of all completed batches (to calibrate cost estimates)
+        self._completed_tokens = 0
+
+    def start(self):
+        """Start the budget clock (only the first call counts, so the budget covers the whole process)."""
+        if self.started is None:
+            self.started = time.monotonic()
+
+    def score(self, trans_unit: ET.Element) -> float:
+        """
+        Priority of a trans-unit (higher is more important).
+
+        Args:
+            trans_unit: trans-unit element
+
+        Returns:
+            Highest matching rule weight, plus 0.01 per additional location (at most 0.1)
+        """
+        locations = unit_locations(trans_unit)
+        candidates = locations + [trans_unit.get('id') or '']
+        weight = max(
+            (w for pattern, w in self.rules for c in candidates if c and fnmatch.fnmatch(c.lower(), pattern.lower())),
+            default=0.0
+        )
+        return weight + min(0.1, 0.01 * max(0, len(locations) - 1))
+
+    def order(self, units: list) -> list:
+        """
+        Sort unit tuples by priority, keeping document order among equals.
+
+        Args:
+            units: Unit tuples whose first element is the trans-unit
+
+        Returns:
+            New sorted list
+        """
+        return sorted(units, key=lambda unit: -self.score(unit[0]))
+
+    def remaining_time(self) -> Optional[float]:
+        """Seconds left of the time budget (None without a time budget)."""
+        if self.time_budget is None or self.started is None:
+            return None
+        return self.time_budget - (time.monotonic() - self.started)
+
+    def deadline(self) -> Optional[float]:
+        """time.monotonic() at which the time budget ends (None without a time budget)."""
+        if self.time_budget is None or self.started is None:
+            return None
+        return self.started + self.time_budget
+
+    def record(self, source_tokens: int):
+        """
+        Calibrate cost estimates with a completed batch.
+
+        Args:
+            source_tokens: Estimated source tokens of the batch
+        """
+        self._completed_tokens += source_tokens
+
+    def estimate_cost(self, source_tokens: int, provider, spent: float) -> float:
+        """
+        Expected cost of a batch before sending it.
+
+        Once batches have completed, the spend so far per source token is used.
+        Before that, prompts are assumed to be three times and responses twice
+        the source text (instructions, examples, markup).
+
+        Args:
+            source_tokens: Estimated source tokens of the batch
+            provider: Provider the batch goes to
+            spent: USD spent so far
+
+        Returns:
+            Estimated cost in USD
+        """
+        if self._completed_tokens and spent:
+            return spent / self._completed_tokens * source_tokens
+        return provider.cost(3 * source_tokens + 150, 2 * source_tokens) or 0.0
+
+    def exhausted(self, spent: float, committed: float, next_cost: float, latency: Optional[float]) -> Optional[str]:
+        """
+        Check whether another batch still fits in the budget.
+
+        Args:
+            spent: USD spent so far
+            committed: Estimated cost of the batches in flight
+            next_cost: Estimated cost of the next batch
+            latency: Expected duration of the next batch in seconds (None if unknown)
+
+        Returns:
+            'time' or 'cost' if the batch does not fit, None if it does
+        """
+        remaining = self.remaining_time()
+        if remaining is not None and remaining <= (latency or 0.0):
+            return 'time'
+        if self.max_cost is not None and spent + committed + next_cost > self.max_cost:
+            return 'cost'
+        return None
+
+    def describe(self) -> str:
+        """Budget as shown at the start of a run."""
+        parts = []
+        if self.time_budget is not None:
+            parts.append(f"{self.time_budget:g}s")
+        if self.max_cost is not None:
+            parts.append(f"${self.max_cost:g}")
+        return ', '.join(parts) or 'none'
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Sharded translation of one XLIFF file across several workers.
+
+Pending trans-units are partitioned by a hash of their id into K shards, so
+every worker (CI runner, machine) computes the same partition without talking
+to the others. A worker translates only its shard and writes a shard result
+file instead of the XLIFF:
+
+    messages.fr.xlf  ->  messages.fr.xlf.shard-2-of-4.json
+
+The merge step reads all K result files, checks that every shard is present,
+that no unit has conflicting results and that every assigned unit was
+translated, and applies the results to the XLIFF in one pass.
+"""
+
+import hashlib
+import json
+import os
+import re
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from xlf_provenance import provenance_of
+from xlf_unit_state import UnitStateStore
+
+
+def parse_shard(spec: str) -> Tuple[int, int]:
+    """
+    Parse an 'INDEX/COUNT' shard spec (1-based, e.g. '2/4').
+
+    Returns:
+        Tuple of (index, count)
+    """
+    match = re.fullmatch(r'\s*(\d+)\s*/\s*(\d+)\s*', spec)
+    if not match:
+        raise ValueError(f"Invalid shard '{spec}' (expected INDEX/COUNT, e.g. 2/4)")
+    index, count = int(match.group(1)), int(match.group(2))
+    if not 1 <= index <= count:
+        raise ValueError(f"Invalid shard '{spec}' (index must be between 1 and {count})")
+    return index, count
+
+
+def shard_of(key: str, count: int) -> int:
+    """
+    Shard (1-based) a trans-unit belongs to.
+
+    Args:
+        key: Trans-unit id (or source text for units without an id)
+        count: Number of shards
+
+    Returns:
+        Shard index between 1 and count
+    """
+    digest = hashlib.sha256(key.encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'big') % count + 1
+
+
+def unit_key(unit_id: Optional[str], source_text: str) -> str:
+    """Key used to shard and merge a unit: its id, or its source text if it has none."""
+    return unit_id or source_text
+
+
+class ShardResult:
+    """Translations produced by one shard worker"""
+
+    VERSION = 1
+
+    def __init__(self, path: Path, index: int, count: int, language: str):
+        """
+        Create an empty shard result.
+
+        Args:
+            path: JSON file to write to
+            index: Shard index (1-based)
+            count: Number of shards
+            language: Target language
+        """
+        self.path = path
+        self.index = index
+        self.count = count
+        self.language = language
+        # Unit keys assigned to this shard
+        self.assigned: List[str] = []
+        # Unit key -> {'source': ..., 'target': ..., 'provenance': {...}}
+        self.results: Dict[str, dict] = {}
+        # Unit key -> (unit id, source, target element, target text before the run)
+        self._units: Dict[str, tuple] = {}
+
+    @staticmethod
+    def path_for(xliff_path: Path, index: int, count: int) -> Path:
+        """Shard result file of a shard, next to the XLIFF file."""
+        return xliff_path.with_name(f"{xliff_path.name}.shard-{index}-of-{count}.json")
+
+    @staticmethod
+    def find(xliff_path: Path) -> List[Path]:
+        """All shard result files next to an XLIFF file."""
+        pattern = re.compile(re.escape(xliff_path.name) + r'\.shard-\d+-of-\d+\.json$')
+        return sorted(p for p in xliff_path.parent.iterdir() if pattern.match(p.name))
+
+    @classmethod
+    def load(cls, path: Path) -> 'ShardResult':
+        """Read a shard result file."""
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        result = cls(path, data['shard'], data['shards'], data['language'])
+        result.assigned = data['assigned']
+        result.results = data['results']
+        return result
+
+    def assign(self, key: str, source: str, target_elem, original_target: str, unit_id: Optional[str] = None):
+        """
+        Assign a unit to this shard.
+
+        Args:
+            key: Unit key (see unit_key)
+            source: Source text
+            target_elem: The unit's <target> element in the worker's tree
+            original_target: Target text before the run
+            unit_id: trans-unit id (to look up the provenance of its translation)
+        """
+        self.assigned.append(key)
+        self._units[key] = (unit_id, source, target_elem, original_target)
+
+    def collect(self, get_text: Callable, state: Optional[UnitStateStore] = None):
+        """
+        Record the assigned units whose target was filled in or changed.
+
+        Args:
+            get_text: Function returning the text of a <target> element
+            state: Worker's unit state (not saved by shard workers); the provenance
+                recorded there is kept with the results, for the merge
+        """
+        for key, (unit_id, source, target_elem, original_target) in self._units.items():
+            target = get_text(target_elem)
+            if target.strip() and target != original_target:
+                self.results[key] = {'source': source, 'target': target}
+                entry = state.get(unit_id) if state is not None and unit_id else None
+                if entry is not None and entry.get('target') == target and provenance_of(entry):
+                    self.results[key]['provenance'] = provenance_of(entry)
+
+    def save(self):
+        """Write the shard result (atomic replace)."""
+        data = {
+            'version': self.VERSION,
+            'shard': self.index,
+            'shards': self.count,
+            'language': self.language,
+            'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'assigned': self.assigned,
+            'results': self.results,
+        }
+        tmp_path = self.path.with_name(self.path.name + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+
+class MergePlan(NamedTuple):
+    """Outcome of checking shard results against an XLIFF file"""
+    apply: Dict[str, str]        # unit key -> target to write
+    conflicts: List[str]         # human-readable conflict descriptions
+    uncovered: List[str]         # assigned unit keys without a result
+    missing_shards: List[int]    # shard indexes without a result file
+
+
+def plan_merge(sources: Dict[str, str], shards: List[ShardResult], language: str) -> MergePlan:
+    """
+    Check shard results and decide which targets to apply.
+
+    Args:
+        sources: Unit key -> current source text of the XLIFF file
+        shards: Loaded shard results
+        language: Expected target language
+
+    Returns:
+        MergePlan
+    """
+    conflicts = []
+    counts = {shard.count for shard in shards}
+    if len(counts) > 1:
+        conflicts.append(f"shard results disagree on the number of shards: {sorted(counts)}")
+    count = max(counts) if counts else 0
+
+    seen: Dict[int, ShardResult] = {}
+    for shard in shards:
+        if shard.language != language:
+            conflicts.append(f"{shard.path.name} is for {shard.language}, not {language}")
+        if shard.index in seen:
+            conflicts.append(f"shard {shard.index} appears twice ({seen[shard.index].path.name}, {shard.path.name})")
+        seen[shard.index] = shard
+    missing_shards = [index for index in range(1, count + 1) if index not in seen]
+
+    apply: Dict[str, str] = {}
+    owner: Dict[str, int] = {}
+    conflicted = set()
+    uncovered = []
+    for shard in shards:
+        for key in shard.assigned:
+            if shard_of(key, shard.count) != shard.index:
+                conflicts.append(f"{key}: assigned to shard {shard.index} but hashes to {shard_of(key, shard.count)}")
+            if key in owner and owner[key] != shard.index:
+                conflicts.append(f"{key}: assigned to shards {owner[key]} and {shard.index}")
+            owner[key] = shard.index
+            if key not in shard.results:
+                uncovered.append(key)
+
+        for key, result in shard.results.items():
+            if key not in sources:
+                conflicts.append(f"{key}: not in the XLIFF file any more")
+            elif result['source'] != sources[key]:
+                conflicts.append(f"{key}: source changed since shard {shard.index} was translated")
+            elif key in apply and apply[key] != result['target']:
+                conflicts.append(f"{key}: different translations in several shards")
+                conflicted.add(key)
+            else:
+                apply[key] = result['target']
+
+    # Conflicting units keep their current target
+    for key in conflicted:
+        del apply[key]
+
+    return MergePlan(apply, conflicts, uncovered, missing_shards)
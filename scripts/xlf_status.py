@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""
+Translation status of locale files, cheap enough for a pre-commit hook.
+
+Only the standard library is imported: no provider SDKs, no API key and no
+translator are needed. Locale files are streamed with iterparse (one
+trans-unit in memory at a time) in parallel worker processes, and the results
+are kept in a content-hash manifest, so files that have not changed since the
+last check (and whose unit state sidecar has not changed) are answered from
+the cache without being parsed.
+
+Per locale file it reports:
+
+- total:   trans-units with a source text
+- pending: units without a translation
+- stale:   translated units whose source changed since they were translated
+           (according to the <file>.state.json sidecar)
+- errors:  translated units whose placeholders (<x id="..."/>) differ from
+           the source's (as sets in ICU messages, see xlf_validate)
+
+Usage:
+    python xlf_status.py ../casino-customer-f/src/locale/messages.*.xlf
+    python translate_all_locales.py status
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional
+from xml.etree import ElementTree as ET
+
+from xlf_validate import UnitValidator
+
+XLIFF_NS = "urn:oasis:names:tc:xliff:document:1.2"
+STATE_SUFFIX = ".state.json"
+CACHE_VERSION = 2
+
+
+def _element_text(element: ET.Element) -> str:
+    # Same serialization as XLIFFTranslator._get_element_text, which recorded the unit state
+    text = ET.tostring(element, encoding='unicode', method='xml')
+    text = text.split('>', 1)[1].rsplit('<', 1)[0] if '>' in text else ''
+    return text.strip()
+
+
+def _file_stamp(path: Path) -> Optional[List[int]]:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def _file_hash(path: Path) -> Optional[str]:
+    try:
+        with open(path, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except OSError:
+        return None
+
+
+def scan_file(path: Path) -> dict:
+    """
+    Count total, pending, stale and broken units of a locale file.
+
+    Args:
+        path: Locale file
+
+    Returns:
+        Dictionary with 'total', 'translated', 'pending', 'stale' and 'errors' counts
+    """
+    ET.register_namespace('', XLIFF_NS)
+    state_path = path.with_name(path.name + STATE_SUFFIX)
+    try:
+        with open(state_path, encoding='utf-8') as f:
+            state = json.load(f).get('units', {})
+    except (OSError, ValueError):
+        state = {}
+
+    counts = {'total': 0, 'translated': 0, 'pending': 0, 'stale': 0, 'errors': 0}
+    unit_tag = f'{{{XLIFF_NS}}}trans-unit'
+    for _, element in ET.iterparse(path, events=('end',)):
+        if element.tag != unit_tag:
+            continue
+        source = element.find(f'{{{XLIFF_NS}}}source')
+        target = element.find(f'{{{XLIFF_NS}}}target')
+        if source is not None:
+            source_text = _element_text(source)
+            if source_text.strip():
+                counts['total'] += 1
+                # Units without a <target> (not synced from the catalog yet) are pending too
+                target_text = _element_text(target) if target is not None else ''
+                if not target_text.strip():
+                    counts['pending'] += 1
+                else:
+                    counts['translated'] += 1
+                    previous = state.get(element.get('id', ''))
+                    if previous is not None and previous.get('source') != source_text:
+                        counts['stale'] += 1
+                    if UnitValidator.check_placeholders(source_text, target_text) is not None:
+                        counts['errors'] += 1
+        # Streaming: drop the unit once it is counted
+        element.clear()
+    return counts
+
+
+class StatusCache:
+    """Content-hash manifest of locale file status"""
+
+    def __init__(self, path: Optional[Path]):
+        """
+        Load the manifest (an empty one if it is missing or unreadable).
+
+        Args:
+            path: JSON manifest file (None: no caching)
+        """
+        self.path = path
+        self.entries: Dict[str, dict] = {}
+        self._dirty = False
+        if path is not None and path.exists():
+            try:
+                with open(path, encoding='utf-8') as f:
+                    data = json.load(f)
+                if data.get('version') == CACHE_VERSION:
+                    self.entries = data.get('files', {})
+            except (OSError, ValueError):
+                pass
+
+    @staticmethod
+    def _fingerprint(path: Path) -> dict:
+        state_path = path.with_name(path.name + STATE_SUFFIX)
+        return {'stamp': _file_stamp(path), 'state_stamp': _file_stamp(state_path)}
+
+    def get(self, path: Path) -> Optional[dict]:
+        """
+        Cached counts of a file, if neither it nor its state sidecar changed.
+
+        Files are first compared by modification time and size; if those changed,
+        the content hashes decide (e.g. after a checkout that rewrote the file).
+
+        Returns:
+            Counts, or None if the file has to be scanned
+        """
+        entry = self.entries.get(str(path))
+        if entry is None:
+            return None
+        fingerprint = self._fingerprint(path)
+        if fingerprint['stamp'] == entry['stamp'] and fingerprint['state_stamp'] == entry['state_stamp']:
+            return entry['counts']
+
+        state_path = path.with_name(path.name + STATE_SUFFIX)
+        if _file_hash(path) != entry['hash'] or _file_hash(state_path) != entry['state_hash']:
+            return None
+        entry.update(fingerprint)
+        self._dirty = True
+        return entry['counts']
+
+    def put(self, path: Path, counts: dict):
+        """Remember the counts of a scanned file."""
+        entry = self._fingerprint(path)
+        entry['hash'] = _file_hash(path)
+        entry['state_hash'] = _file_hash(path.with_name(path.name + STATE_SUFFIX))
+        entry['counts'] = counts
+        self.entries[str(path)] = entry
+        self._dirty = True
+
+    def save(self):
+        """Write the manifest if it changed (atomic replace)."""
+        if self.path is None or not self._dirty:
+            return
+        tmp_path = self.path.with_name(self.path.name + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': CACHE_VERSION, 'files': self.entries}, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
+        self._dirty = False
+
+
+def collect_status(files: List[Path], cache_path: Optional[Path] = None, workers: Optional[int] = None) -> Dict[Path, dict]:
+    """
+    Status of several locale files, scanning only files that changed.
+
+    Args:
+        files: Locale files
+        cache_path: Content-hash manifest (None: scan everything)
+        workers: Worker processes for scanning (default: one per CPU, at most one per file)
+
+    Returns:
+        Locale file -> counts, with 'cached' set for files answered from the manifest
+        (missing files map to None)
+    """
+    cache = StatusCache(cache_path)
+    results: Dict[Path, dict] = {}
+    to_scan = []
+    for path in files:
+        if not path.exists():
+            results[path] = None
+            continue
+        counts = cache.get(path.resolve())
+        if counts is not None:
+            results[path] = dict(counts, cached=True)
+        else:
+            to_scan.append(path)
+
+    if len(to_scan) > 1:
+        # Imported here: multiprocessing alone takes longer to import than a cached check
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=min(len(to_scan), workers or os.cpu_count() or 1)) as pool:
+            scanned = list(pool.map(scan_file, to_scan))
+    else:
+        scanned = [scan_file(path) for path in to_scan]
+
+    for path, counts in zip(to_scan, scanned):
+        cache.put(path.resolve(), counts)
+        results[path] = dict(counts, cached=False)
+    cache.save()
+    return results
+
+
+def print_status(results: Dict[Path, dict], languages: Optional[Dict[str, str]] = None):
+    """
+    Print one line per locale file and the totals.
+
+    Args:
+        results: As returned by collect_status
+        languages: Optional file name -> language name, shown next to the file name
+    """
+    languages = languages or {}
+    print(f"{'locale file':<30} {'total':>7} {'done':>7} {'pending':>8} {'stale':>6} {'errors':>7}")
+    totals = Counter()
+    for path, counts in results.items():
+        name = path.name + (f" ({languages[path.name]})" if path.name in languages else '')
+        if counts is None:
+            print(f"{name:<30} ⚠ file not found")
+            continue
+        done = counts['translated'] / counts['total'] * 100 if counts['total'] else 100.0
+        flag = '✓' if not (counts['pending'] or counts['stale'] or counts['errors']) else ' '
+        print(f"{name:<30} {counts['total']:>7} {done:>6.1f}% {counts['pending']:>8} {counts['stale']:>6} "
+              f"{counts['errors']:>7} {flag}{' (cached)' if counts['cached'] else ''}")
+        totals.update({key: counts[key] for key in ('total', 'translated', 'pending', 'stale', 'errors')})
+    done = totals['translated'] / totals['total'] * 100 if totals['total'] else 100.0
+    print(f"{'total':<30} {totals['total']:>7} {done:>6.1f}% {totals['pending']:>8} {totals['stale']:>6} {totals['errors']:>7}")
+
+
+def add_status_arguments(parser: argparse.ArgumentParser):
+    """Add the options of the status command to a parser."""
+    parser.add_argument(
+        '--strict',
+        action='store_true',
+        help='Status: exit with status 1 if any unit is pending, stale or has broken placeholders'
+    )
+    parser.add_argument(
+        '--json',
+        action='store_true',
+        help='Status: print the counts as JSON'
+    )
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='Status: scan every file instead of using the status manifest'
+    )
+
+
+def run_status(
+    files: List[Path],
+    args: argparse.Namespace,
+    cache_path: Optional[Path],
+    languages: Optional[Dict[str, str]] = None
+) -> int:
+    """
+    Collect and print the status of locale files.
+
+    Args:
+        files: Locale files
+        args: Parsed options from add_status_arguments
+        cache_path: Content-hash manifest
+        languages: Optional file name -> language name
+
+    Returns:
+        Exit status (1 with --strict if a file is missing or has pending, stale or broken units)
+    """
+    results = collect_status(files, None if args.no_cache else cache_path)
+    if args.json:
+        print(json.dumps({str(path): counts for path, counts in results.items()}, indent=2))
+    else:
+        print_status(results, languages)
+
+    if args.strict and any(c is None or c['pending'] or c['stale'] or c['errors'] for c in results.values()):
+        return 1
+    return 0
+
+
+def main():
+    """Main entry point for CLI usage"""
+    parser = argparse.ArgumentParser(
+        description='Show the translation status of locale files',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__.split('Usage:', 1)[1]
+    )
+    parser.add_argument('files', type=Path, nargs='+', help='Locale files')
+    parser.add_argument(
+        '--cache',
+        type=Path,
+        help='Status manifest (default: .xlf-status.json in the scripts directory)'
+    )
+    add_status_arguments(parser)
+    args = parser.parse_args()
+
+    cache_path = args.cache or Path(__file__).parent / '.xlf-status.json'
+    sys.exit(run_status(args.files, args, cache_path))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+"""
+Streaming translation of JSONL records (CMS copy, bonus texts, email templates).
+
+translate_file works on XLIFF trees. StreamTranslator feeds loose records
+through the same engine instead: memory reuse, deduplication, batching,
+concurrent dispatch over the provider pool, auto-tuning, hedging, validation
+with retries and the circuit breaker. One record per line:
+
+    {"id": "bonus-12", "text": "Get <b>50</b> free spins", "languages": ["French", "German"]}
+
+Records without "languages" (or "language") are translated to the default
+languages. Each record is written out as soon as all of its languages are
+done, in completion order, with the translations added:
+
+    {"id": "bonus-12", "text": "...", "languages": [...],
+     "translations": {"French": "...", "German": "..."}}
+
+Languages that could not be translated are listed under "errors" instead.
+Other fields of the input record are copied to the result unchanged. Invalid
+records are answered with an "error", their "id" if they have one, and their
+"line" number.
+
+Memory use is bounded: records are read ahead by a reader thread into a
+bounded queue, and at most `window` records are open at a time, so exports of
+any size can be piped through. Batches are per language; a batch that is not
+full is sent once its oldest string has waited `linger` seconds, when the input
+ends, or when the window is full.
+"""
+
+import json
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from xml.etree import ElementTree as ET
+
+from tqdm import tqdm
+
+from xlf_providers import is_rate_limited
+
+_END = object()
+
+
+class _Job:
+    """A record whose translations are being collected"""
+
+    __slots__ = ('record', 'translations', 'errors', 'pending')
+
+    def __init__(self, record: dict, languages: List[str]):
+        self.record = record
+        self.translations: Dict[str, str] = {}
+        self.errors: Dict[str, str] = {}
+        self.pending = len(languages)
+
+    def result(self) -> dict:
+        result = dict(self.record, translations=self.translations)
+        if self.errors:
+            result['errors'] = self.errors
+        return result
+
+
+class StreamTranslator:
+    """Translates a stream of JSONL records through an XLIFFTranslator's engine"""
+
+    def __init__(
+        self,
+        translator,
+        languages: Optional[List[str]] = None,
+        window: int = 1000,
+        linger: float = 0.5
+    ):
+        """
+        Initialize the stream translator.
+
+        Args:
+            translator: XLIFFTranslator whose memory, provider pool, tuner, hedger,
+                validator and circuit breaker are used
+            languages: Default target languages of records without "languages"
+            window: Maximum number of records read ahead or being translated
+            linger: Seconds a string may wait for its batch to fill up
+        """
+        self.translator = translator
+        self.languages = languages or []
+        self.window = max(1, window)
+        self.linger = linger
+        self.stats = {'records': 0, 'translated': 0, 'reused': 0, 'duplicates': 0, 'errors': 0, 'units_sent': 0}
+
+    def _parse(self, item: Union[str, dict], number: int) -> Tuple[dict, List[str], Optional[str]]:
+        # Returns (record, languages, error); records without an id get their line number. Invalid
+        # records get it as "line" instead, so it cannot be taken for the id of another record
+        if isinstance(item, str):
+            try:
+                item = json.loads(item)
+            except ValueError as e:
+                return {'line': number}, [], f"invalid JSON: {e}"
+        if not isinstance(item, dict):
+            return {'line': number}, [], "record is not a JSON object"
+        languages = item.get('languages', item.get('language', self.languages))
+        if isinstance(languages, str):
+            languages = [languages]
+        if not isinstance(item.get('text'), str):
+            return dict(item, line=number), [], "record has no \"text\" string"
+        if not isinstance(languages, list) or not languages or not all(isinstance(l, str) for l in languages):
+            return dict(item, line=number), [], "record has no target languages (and no default languages are set)"
+        record = item if 'id' in item else dict(item, id=number)
+        return record, list(dict.fromkeys(languages)), None
+
+    def _read(self, records: Iterable[Union[str, dict]], inbox: queue.Queue):
+        # Reader thread: the bounded queue holds back the input while the window is full
+        try:
+            for number, item in enumerate(records, 1):
+                if isinstance(item, str) and not item.strip():
+                    continue
+                inbox.put((number, item))
+        finally:
+            inbox.put(_END)
+
+    def translate_records(self, records: Iterable[Union[str, dict]]) -> Iterator[dict]:
+        """
+        Translate records and yield the results as they complete.
+
+        Args:
+            records: JSONL lines or already parsed records, consumed lazily
+
+        Yields:
+            Result records (input fields plus "translations" and, for failed
+            languages, "errors"; invalid records get "error" and "line")
+        """
+        translator = self.translator
+        memory = translator.memory
+        inbox: queue.Queue = queue.Queue(maxsize=self.window)
+        threading.Thread(target=self._read, args=(records, inbox), daemon=True).start()
+
+        queues: Dict[str, deque] = {}  # language -> pending unit tuples
+        queued_at: Dict[str, float] = {}  # language -> when its oldest pending unit was queued
+        waiting: Dict[Tuple[str, str], List[_Job]] = {}  # (language, text) -> jobs waiting for it
+        examples: Dict[int, list] = {}
+        retries: Dict[int, int] = {}
+        in_flight = {}
+        finished: deque = deque()
+        open_jobs = 0
+        input_done = False
+        aborted = False
+        last_dispatch = None
+
+        def resolve(language: str, text: str, translation: Optional[str], error: Optional[str] = None):
+            nonlocal open_jobs
+            for job in waiting.pop((language, text), []):
+                if error is None:
+                    job.translations[language] = translation
+                else:
+                    job.errors[language] = error
+                job.pending -= 1
+                if job.pending == 0:
+                    open_jobs -= 1
+                    finished.append(job.result())
+
+        def fail(units: Iterable[tuple], language: str, error: str):
+            for unit in units:
+                self.stats['errors'] += len(waiting.get((language, unit[2]), []))
+                examples.pop(id(unit[1]), None)
+                retries.pop(id(unit[1]), None)
+                resolve(language, unit[2], None, error)
+
+        def intake(number: int, item: Union[str, dict]):
+            nonlocal open_jobs
+            record, languages, error = self._parse(item, number)
+            self.stats['records'] += 1
+            if error is not None:
+                self.stats['errors'] += 1
+                finished.append(dict(record, error=error))
+                return
+            job = _Job(record, languages)
+            open_jobs += 1
+            text = record['text']
+            for language in languages:
+                key = (language, text)
+                if key in waiting:
+                    self.stats['duplicates'] += 1
+                    waiting[key].append(job)
+                    continue
+                waiting[key] = [job]
+                if aborted:
+                    fail([(None, None, text)], language, "aborted by the circuit breaker")
+                    continue
+                if not text.strip():
+                    resolve(language, text, text)
+                    continue
+
+                translation = memory.exact(text, language)
+                matches = []
+                if translation is None:
+                    matches = memory.fuzzy(text, language, threshold=translator.fuzzy_threshold)
+                    if matches and matches[0].score >= translator.reuse_threshold:
+                        translation = memory.substitute(matches[0], text)
+                if translation is not None:
+                    self.stats['reused'] += 1
+                    resolve(language, text, translation)
+                    continue
+
+                # The same unit tuples as for XLIFF files, so batches go through the same prompt and checks
+                unit = (ET.Element('trans-unit', id=str(record['id'])), ET.Element('target'), text)
+                if matches:
+                    examples[id(unit[1])] = matches
+                if not queues.get(language):
+                    queued_at[language] = time.monotonic()
+                queues.setdefault(language, deque()).append(unit)
+
+        def ready(language: str) -> bool:
+            # A language queue is sent once a batch is full, or without waiting for more input
+            return (
+                len(queues[language]) >= translator.batch_size
+                or input_done
+                or open_jobs >= self.window
+                or time.monotonic() - queued_at[language] >= self.linger
+            )
+
+        if translator.tuner is not None:
+            max_workers = translator.tuner.max_concurrency
+        else:
+            max_workers = translator.concurrency * len(translator.pool.providers)
+        pool = ThreadPoolExecutor(max_workers=max_workers)
+        try:
+            while True:
+                # Read what is available; with nothing in flight, wait for input until a batch lingers out
+                while not input_done and open_jobs + len(finished) < self.window:
+                    timeout = 0.0
+                    if not in_flight and not finished:
+                        lingering = [queued_at[language] + self.linger for language, units in queues.items() if units]
+                        timeout = max(0.0, min(lingering) - time.monotonic()) if lingering else None
+                    try:
+                        item = inbox.get(timeout=timeout) if timeout != 0.0 else inbox.get_nowait()
+                    except queue.Empty:
+                        break
+                    if item is _END:
+                        input_done = True
+                    else:
+                        intake(*item)
+
+                while finished:
+                    yield finished.popleft()
+                if input_done and open_jobs == 0:
+                    break
+
+                # Keep up to the in-flight limit busy, spacing request starts by `delay`
+                while len(in_flight) < translator._in_flight_limit():
+                    if translator.breaker is not None and not translator.breaker.allow(len(in_flight)):
+                        break
+                    candidates = [language for language, units in queues.items() if units and ready(language)]
+                    if not candidates:
+                        break
+                    language = min(candidates, key=lambda l: queued_at[l])
+
+                    if last_dispatch is not None:
+                        time.sleep(max(0.0, last_dispatch + translator.delay - time.monotonic()))
+                    provider = translator.pool.acquire()
+                    if provider is None:
+                        break
+
+                    queue_ = queues[language]
+                    batch = translator._take_batch(queue_, provider)
+                    if translator.breaker is not None and translator.breaker.probing \
+                            and len(batch) > translator.breaker.probe_size:
+                        queue_.extendleft(reversed(batch[translator.breaker.probe_size:]))
+                        batch = batch[:translator.breaker.probe_size]
+                    queued_at[language] = time.monotonic()
+
+                    attempt = max(retries.get(id(unit[1]), 0) for unit in batch) + 1
+                    future = pool.submit(
+                        translator._run_batch, 'translate', batch, language,
+                        translator._batch_examples(batch, examples), provider, attempt
+                    )
+                    self.stats['units_sent'] += len(batch)
+                    in_flight[future] = (language, batch, provider)
+                    last_dispatch = time.monotonic()
+
+                if not in_flight:
+                    if any(units and ready(language) for language, units in queues.items()):
+                        # Every provider is cooling down, or the breaker is open
+                        pause = translator.pool.next_available_in()
+                        if translator.breaker is not None:
+                            pause = max(pause, translator.breaker.pause_remaining())
+                        time.sleep(max(0.05, pause))
+                    continue
+
+                done, _ = wait(in_flight, timeout=None if input_done else 0.05, return_when=FIRST_COMPLETED)
+                for future in done:
+                    language, batch, provider = in_flight.pop(future)
+                    try:
+                        translations, problems, mismatched, _ = future.result()
+                        if translator.breaker is not None:
+                            unusable = sum(1 for t, p in zip(translations, problems) if p or not t)
+                            translator.breaker.record(not mismatched and unusable * 2 <= len(batch))
+
+                        invalid = []
+                        for unit, translation, unit_problems in zip(batch, translations, problems):
+                            source_text = unit[2]
+                            if unit_problems:
+                                attempts = retries.get(id(unit[1]), 0) + 1
+                                if attempts <= translator.MAX_RETRIES:
+                                    retries[id(unit[1])] = attempts
+                                    invalid.append(unit)
+                                    continue
+                                fail([unit], language, f"failed validation ({'; '.join(map(str, unit_problems))})")
+                            elif translation and translation != source_text:
+                                examples.pop(id(unit[1]), None)
+                                retries.pop(id(unit[1]), None)
+                                memory.add(source_text, translation, language)
+                                self.stats['translated'] += 1
+                                resolve(language, source_text, translation)
+                            else:
+                                fail([unit], language, "no translation in the response")
+
+                        if invalid:
+                            queues[language].extendleft(reversed(invalid))
+                            tqdm.write(f"🔁 Requeued {len(invalid)} {language} strings that failed validation")
+
+                    except Exception as e:
+                        if translator.breaker is not None and not is_rate_limited(e):
+                            translator.breaker.record(False)
+                        attempts = max(retries.get(id(unit[1]), 0) for unit in batch) + 1
+                        retryable = is_rate_limited(e) or len(translator.pool.providers) > 1
+                        if retryable and attempts <= translator.MAX_RETRIES:
+                            for unit in batch:
+                                retries[id(unit[1])] = attempts
+                            queues[language].extendleft(reversed(batch))
+                            reason = 'rate limited' if is_rate_limited(e) else f'failed ({e})'
+                            tqdm.write(f"⏳ {language} batch {reason} on {provider.label}, requeued")
+                        else:
+                            tqdm.write(f"❌ Error in {language} batch: {e}")
+                            fail(batch, language, f"request failed: {e}")
+
+                if translator.breaker is not None and translator.breaker.aborted and not aborted:
+                    # Everything not yet translated fails; the rest of the input is passed through as failed
+                    aborted = True
+                    for batch_language, batch, _ in in_flight.values():
+                        fail(batch, batch_language, "aborted by the circuit breaker")
+                    for language, units in queues.items():
+                        fail(list(units), language, "aborted by the circuit breaker")
+                        units.clear()
+                    in_flight.clear()
+
+        finally:
+            # Results of batches still in flight are discarded
+            pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+Bootstrap and sync locale files from the source catalog (messages.xlf).
+
+ng extract-i18n only updates messages.xlf. Its new trans-units have no
+<target> and are not in the locale files yet, so without a sync they never
+reach the translator. LocaleSync parses messages.xlf once and rebuilds every
+locale file from it in one pass:
+
+- units of the catalog keep their existing target from the locale file
+- units new to the locale file (or without a target) get an empty <target>
+- units no longer in the catalog are dropped (with their unit state entries)
+- source text, notes and context groups come from the catalog, so a changed
+  source shows up as a stale unit (see xlf_unit_state)
+- missing locale files are created
+
+Locale files are built and written concurrently, each only if its content
+changed, so unchanged files keep their modification time (and their cached
+status, see xlf_status).
+
+Usage:
+    python xlf_sync.py ../casino-customer-f/src/locale/messages.xlf \\
+        ../casino-customer-f/src/locale/messages.*.xlf [--dry-run]
+    python translate_all_locales.py sync
+"""
+
+import argparse
+import copy
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+from xml.etree import ElementTree as ET
+
+from xlf_unit_state import UnitStateStore
+
+XLIFF_NS = "urn:oasis:names:tc:xliff:document:1.2"
+
+
+def _element_text(element: Optional[ET.Element]) -> str:
+    # Same serialization as XLIFFTranslator._get_element_text, which the unit state compares against
+    if element is None:
+        return ''
+    text = ET.tostring(element, encoding='unicode', method='xml')
+    return text.split('>', 1)[1].rsplit('<', 1)[0].strip() if '>' in text else ''
+
+
+def add_target(trans_unit: ET.Element) -> ET.Element:
+    """
+    Add an empty <target> right after the <source> of a trans-unit.
+
+    Args:
+        trans_unit: trans-unit element with a <source>
+
+    Returns:
+        The new target element
+    """
+    children = list(trans_unit)
+    source = trans_unit.find(f'{{{XLIFF_NS}}}source')
+    index = children.index(source) + 1 if source is not None else len(children)
+    target = ET.Element(f'{{{XLIFF_NS}}}target')
+    if source is not None:
+        # The target takes over what followed the source; the source gets the children's indentation
+        target.tail = source.tail
+        source.tail = trans_unit.text
+    trans_unit.insert(index, target)
+    return target
+
+
+def locale_code(path: Path) -> Optional[str]:
+    """Locale of a locale file name (messages.fr.xlf -> 'fr'), None for the catalog itself."""
+    suffixes = path.name.split('.')
+    return suffixes[-2] if len(suffixes) > 2 else None
+
+
+class LocaleSync:
+    """Rebuilds locale files from one parse of the source catalog"""
+
+    def __init__(self, catalog: Path, workers: Optional[int] = None):
+        """
+        Parse the source catalog.
+
+        Args:
+            catalog: Source catalog (messages.xlf)
+            workers: Number of locale files built and written in parallel
+                (default: one per file)
+
+        Raises:
+            OSError, ET.ParseError: If the catalog cannot be read
+        """
+        ET.register_namespace('', XLIFF_NS)
+        self.catalog = catalog
+        self.workers = workers
+        self.tree = ET.parse(catalog)
+        self.ids = [
+            unit.get('id') for unit in self.tree.getroot().iter(f'{{{XLIFF_NS}}}trans-unit') if unit.get('id')
+        ]
+
+    def sync(self, files: List[Path], dry_run: bool = False) -> Dict[Path, dict]:
+        """
+        Bring locale files in line with the catalog.
+
+        Args:
+            files: Locale files (created if missing)
+            dry_run: Only count the changes, without writing files or unit state
+
+        Returns:
+            Locale file -> counts ('units', 'added', 'removed', 'changed_source',
+            'created', 'written') and 'root' (the synced XLIFF root, which a dry run
+            does not write), or {'error': message} if the file could not be synced
+        """
+        if not files:
+            return {}
+        with ThreadPoolExecutor(max_workers=self.workers or len(files)) as pool:
+            return dict(zip(files, pool.map(lambda path: self._sync_file(path, dry_run), files)))
+
+    def _sync_file(self, path: Path, dry_run: bool) -> dict:
+        try:
+            return self.sync_file(path, dry_run)
+        except (OSError, ET.ParseError) as e:
+            return {'error': str(e)}
+
+    def sync_file(self, path: Path, dry_run: bool = False) -> dict:
+        """
+        Bring one locale file in line with the catalog.
+
+        Args:
+            path: Locale file (created if missing)
+            dry_run: Only count the changes ('written' tells whether the file would be written)
+
+        Returns:
+            Counts as described in sync()
+        """
+        existing: Dict[str, ET.Element] = {}
+        target_language = locale_code(path)
+        created = not path.exists()
+        if not created:
+            old_root = ET.parse(path).getroot()
+            for unit in old_root.iter(f'{{{XLIFF_NS}}}trans-unit'):
+                existing.setdefault(unit.get('id'), unit)
+            old_file = old_root.find(f'{{{XLIFF_NS}}}file')
+            if old_file is not None and old_file.get('target-language'):
+                target_language = old_file.get('target-language')
+
+        root = copy.deepcopy(self.tree.getroot())
+        for file_elem in root.iter(f'{{{XLIFF_NS}}}file'):
+            if target_language:
+                file_elem.set('target-language', target_language)
+
+        counts = {'units': len(self.ids), 'added': 0, 'removed': 0, 'changed_source': 0,
+                  'created': created, 'written': False, 'root': root}
+        for unit in root.iter(f'{{{XLIFF_NS}}}trans-unit'):
+            for target in unit.findall(f'{{{XLIFF_NS}}}target'):
+                unit.remove(target)
+            new_target = add_target(unit)
+
+            old = existing.pop(unit.get('id'), None)
+            old_target = old.find(f'{{{XLIFF_NS}}}target') if old is not None else None
+            if old_target is None:
+                counts['added'] += 1
+                continue
+            new_target.text = old_target.text
+            new_target.extend(old_target)
+            new_target.attrib.update(old_target.attrib)
+            if _element_text(old.find(f'{{{XLIFF_NS}}}source')) != _element_text(unit.find(f'{{{XLIFF_NS}}}source')):
+                counts['changed_source'] += 1
+
+        counts['removed'] = len(existing)
+        if existing and not dry_run:
+            state = UnitStateStore.for_xliff(path)
+            for unit_id in existing:
+                state.discard(unit_id)
+            state.save()
+
+        content = ET.tostring(root, encoding='UTF-8', xml_declaration=True, method='xml')
+        try:
+            with open(path, 'rb') as f:
+                unchanged = f.read() == content
+        except OSError:
+            unchanged = False
+        if not unchanged and dry_run:
+            counts['written'] = True
+        elif not unchanged:
+            tmp_path = path.with_name(path.name + '.tmp')
+            with open(tmp_path, 'wb') as f:
+                f.write(content)
+            os.replace(tmp_path, path)
+            counts['written'] = True
+        return counts
+
+
+def print_sync(results: Dict[Path, dict], dry_run: bool = False):
+    """
+    Print the changes of a sync, one line per locale file.
+
+    Args:
+        results: Locale file -> counts as returned by LocaleSync.sync
+        dry_run: The results are of a dry run (changes are reported as pending)
+    """
+    for path, counts in results.items():
+        if 'error' in counts:
+            print(f"❌ {path.name}: {counts['error']}")
+            continue
+        if counts['created']:
+            status = 'to be created' if dry_run else 'created'
+        elif counts['written']:
+            status = 'to be updated' if dry_run else 'updated'
+        else:
+            status = 'up to date'
+        details = ', '.join(
+            f"{counts[key]} {label}" for key, label in
+            (('added', 'new'), ('removed', 'obsolete'), ('changed_source', 'changed source'))
+            if counts[key]
+        )
+        print(f"{'✓' if not counts['written'] else '🔄'} {path.name}: {counts['units']} units, {status}"
+              f"{f' ({details})' if details else ''}")
+
+
+def sync_locales(catalog: Path, files: List[Path], dry_run: bool = False) -> Optional[Dict[Path, ET.Element]]:
+    """
+    Sync locale files with the catalog and print the changes (used by the batch scripts).
+
+    Args:
+        catalog: Source catalog (messages.xlf); without one nothing is synced
+        files: Locale files (created if missing)
+        dry_run: Only report what the sync would change
+
+    Returns:
+        Locale file -> synced XLIFF root (empty without a catalog), so a dry run can
+        be planned as if it had been written; None if the catalog or a locale file
+        could not be read
+    """
+    if not catalog.exists():
+        print(f"⚠ No source catalog {catalog.name}, locale files are not synced")
+        return {}
+    try:
+        syncer = LocaleSync(catalog)
+    except (OSError, ET.ParseError) as e:
+        print(f"Error: Could not read {catalog.name}: {e}")
+        return None
+    print(f"{'Changes from syncing' if dry_run else 'Syncing'} locale files with {catalog.name} "
+          f"({len(syncer.ids)} units)")
+    results = syncer.sync(files, dry_run)
+    print_sync(results, dry_run)
+    removed = sum(counts.get('removed', 0) for counts in results.values())
+    if dry_run and removed:
+        print(f"⚠ {removed} trans-units of the locale files are not in {catalog.name} and will be removed with "
+              f"their translations; run ng extract-i18n first if {catalog.name} is out of date")
+    if any('error' in counts for counts in results.values()):
+        return None
+    return {path: counts['root'] for path, counts in results.items()}
+
+
+def main():
+    """Main entry point for CLI usage"""
+    parser = argparse.ArgumentParser(
+        description='Add new and drop obsolete trans-units of locale files from the source catalog',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__.split('Usage:', 1)[1]
+    )
+    parser.add_argument('catalog', type=Path, help='Source catalog (messages.xlf)')
+    parser.add_argument('files', type=Path, nargs='+', help='Locale files (created if missing)')
+    parser.add_argument('--dry-run', action='store_true', help='Only report what the sync would change')
+    args = parser.parse_args()
+
+    try:
+        syncer = LocaleSync(args.catalog)
+    except (OSError, ET.ParseError) as e:
+        print(f"Error: Could not read {args.catalog}: {e}")
+        sys.exit(1)
+    results = syncer.sync([path for path in args.files if path.resolve() != args.catalog.resolve()], args.dry_run)
+    print_sync(results, args.dry_run)
+    sys.exit(1 if any('error' in counts for counts in results.values()) else 0)
+
+
+if __name__ == '__main__':
+    main()
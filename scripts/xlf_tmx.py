@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+TMX import and export for the translation memory.
+
+Human-approved translations from earlier vendors or other apps usually come
+as TMX (Translation Memory eXchange) files. Importing them seeds the
+translation memory, so their source strings are reused as exact matches and
+never sent to a model; exporting shares a memory with CAT tools or another
+environment. Both directions are streamed: imports are parsed one <tu> at a
+time with iterparse, exports are written one <tu> at a time.
+
+Inline markup is kept in the XLIFF form the translator uses. Placeholders are
+exported as <ph> elements holding the escaped XLIFF code, e.g.
+
+    <seg>Hello <ph>&lt;x id="INTERPOLATION" /&gt;</ph>!</seg>
+
+and the native code of <ph>, <bpt>, <ept> and <it> elements is restored on
+import. The memory stores languages by name (French) and TMX by code (fr-FR):
+known languages are mapped with LANGUAGE_CODES, others keep their code.
+
+Usage:
+    python xlf_tmx.py import vendor.tmx admin-app.tmx --memory tm.json
+    python xlf_tmx.py export approved.tmx --memory tm.json
+    python xlf_tmx.py export approved.tmx --memory tm.json --language French --language German
+"""
+
+import argparse
+import sys
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+from xml.etree import ElementTree as ET
+from xml.sax.saxutils import escape, quoteattr
+
+from xlf_memory import TranslationMemory
+
+XML_LANG = '{http://www.w3.org/XML/1998/namespace}lang'
+
+# Memory language names -> TMX language codes
+LANGUAGE_CODES = {
+    'English': 'en',
+    'French': 'fr',
+    'Spanish': 'es',
+    'German': 'de',
+    'Italian': 'it',
+    'Portuguese': 'pt',
+    'Polish': 'pl',
+    'Swedish': 'sv',
+    'Norwegian': 'no',
+    'Finnish': 'fi',
+}
+
+# Primary language subtags -> memory language names (Bokmål and Nynorsk count as Norwegian)
+LANGUAGE_NAMES = dict({code: name for name, code in LANGUAGE_CODES.items()}, nb='Norwegian', nn='Norwegian')
+
+# Inline elements whose content is native code rather than translatable text
+_NATIVE_CODE_TAGS = ('ph', 'bpt', 'ept', 'it')
+
+
+def language_code(language: str) -> str:
+    """TMX code of a memory language (names that are not in LANGUAGE_CODES are used as they are)."""
+    return LANGUAGE_CODES.get(language, language)
+
+
+def language_name(code: str) -> str:
+    """Memory language of a TMX code (fr-FR -> French; unknown codes are kept)."""
+    return LANGUAGE_NAMES.get(code.split('-')[0].split('_')[0].lower(), code)
+
+
+def _canonical(inner_xml: str) -> str:
+    # Serialize inline markup the way XLIFFTranslator._get_element_text does, so exact lookups match
+    try:
+        wrapper = ET.fromstring(f'<temp>{inner_xml}</temp>')
+    except ET.ParseError:
+        return inner_xml.strip()
+    text = ET.tostring(wrapper, encoding='unicode', method='xml')
+    text = text.split('>', 1)[1].rsplit('<', 1)[0] if not text.endswith('/>') else ''
+    return text.strip()
+
+
+def segment_text(seg: ET.Element) -> str:
+    """
+    Convert a TMX <seg> to the memory's inner-XML form.
+
+    Args:
+        seg: <seg> element
+
+    Returns:
+        Text with escaped characters and the native code of inline elements
+    """
+    parts = [escape(seg.text or '')]
+    for child in seg:
+        tag = child.tag.rsplit('}', 1)[-1]
+        if tag in _NATIVE_CODE_TAGS:
+            # The element's text is the (unescaped) native code, e.g. <x id="INTERPOLATION"/>
+            parts.append(''.join(child.itertext()))
+        else:
+            # <hi> and <sub> hold translatable text
+            parts.append(segment_text(child))
+        parts.append(escape(child.tail or ''))
+    return _canonical(''.join(parts))
+
+
+def _segment_xml(text: str) -> str:
+    # Inner XML of the memory -> <seg> content with the markup as <ph> native code
+    try:
+        wrapper = ET.fromstring(f'<temp>{text}</temp>')
+    except ET.ParseError:
+        return escape(text)
+    parts = [escape(wrapper.text or '')]
+    for child in wrapper:
+        tail, child.tail = child.tail, None
+        parts.append(f"<ph>{escape(ET.tostring(child, encoding='unicode'))}</ph>")
+        parts.append(escape(tail or ''))
+    return ''.join(parts)
+
+
+def import_tmx(
+    memory: TranslationMemory,
+    path: Path,
+    source_language: str = 'en',
+    languages: Optional[Iterable[str]] = None
+) -> Dict[str, int]:
+    """
+    Add the translation pairs of a TMX file to a translation memory.
+
+    Args:
+        memory: Memory to extend (entries are stored with origin 'tmx')
+        path: TMX file
+        source_language: Code of the source language, used if the header has no
+            srclang (or srclang is *all*)
+        languages: Only import these memory languages (default: all)
+
+    Returns:
+        Memory language -> number of pairs imported
+
+    Raises:
+        ET.ParseError: If the file is not well-formed XML
+    """
+    wanted = set(languages) if languages is not None else None
+    counts: Dict[str, int] = {}
+    srclang = source_language
+
+    context = ET.iterparse(path, events=('start', 'end'))
+    for event, element in context:
+        tag = element.tag.rsplit('}', 1)[-1]
+        if event == 'start':
+            if tag == 'header' and element.get('srclang', '*all*') != '*all*':
+                srclang = element.get('srclang')
+            continue
+        if tag != 'tu':
+            continue
+
+        # Translation unit: one <tuv> per language
+        segments = {}
+        for tuv in element:
+            if tuv.tag.rsplit('}', 1)[-1] != 'tuv':
+                continue
+            seg = next((child for child in tuv if child.tag.rsplit('}', 1)[-1] == 'seg'), None)
+            if seg is not None:
+                code = tuv.get(XML_LANG) or tuv.get('lang') or ''
+                segments[code.lower()] = segment_text(seg)
+        tu_srclang = (element.get('srclang') or srclang).lower()
+        source = segments.pop(tu_srclang, None)
+        if source is None:
+            # Fall back to the primary subtag (en matches en-US)
+            primary = tu_srclang.split('-')[0]
+            code = next((c for c in segments if c.split('-')[0] == primary), None)
+            source = segments.pop(code) if code is not None else None
+        if source:
+            for code, target in segments.items():
+                language = language_name(code)
+                if (wanted is None or language in wanted) and target:
+                    memory.add(source, target, language, 'tmx')
+                    counts[language] = counts.get(language, 0) + 1
+
+        # Streaming: drop the unit once it is stored
+        element.clear()
+    return counts
+
+
+def export_tmx(
+    memory: TranslationMemory,
+    path: Path,
+    source_language: str = 'en',
+    languages: Optional[Iterable[str]] = None
+) -> int:
+    """
+    Write the entries of a translation memory as a TMX 1.4 file.
+
+    Translations of the same source string into several languages share one <tu>.
+
+    Args:
+        memory: Memory to export
+        path: TMX file to write
+        source_language: Code of the source language
+        languages: Only export these memory languages (default: all)
+
+    Returns:
+        Number of translation units written
+    """
+    selected = [language for language in memory.languages() if languages is None or language in languages]
+    by_source: Dict[str, List[tuple]] = {}
+    for language in selected:
+        for source, target, origin in memory.entries(language):
+            by_source.setdefault(source, []).append((language, target, origin))
+
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n<tmx version="1.4">\n')
+        f.write(f'  <header creationtool="xlf_tmx" creationtoolversion="1" datatype="xml" segtype="sentence" '
+                f'adminlang="en" srclang={quoteattr(source_language)} o-tmf="xlf-memory"/>\n  <body>\n')
+        for source in sorted(by_source):
+            f.write(f'    <tu>\n      <tuv xml:lang={quoteattr(source_language)}><seg>{_segment_xml(source)}</seg></tuv>\n')
+            for language, target, origin in by_source[source]:
+                f.write(f'      <tuv xml:lang={quoteattr(language_code(language))}>'
+                        f'<prop type="x-origin">{escape(origin)}</prop>'
+                        f'<seg>{_segment_xml(target)}</seg></tuv>\n')
+            f.write('    </tu>\n')
+        f.write('  </body>\n</tmx>\n')
+    tmp_path.replace(path)
+    return len(by_source)
+
+
+def format_counts(counts: Dict[str, int]) -> str:
+    """Per-language counts as shown after an import (e.g. '1200 French, 980 German')."""
+    return ', '.join(f"{count} {language}" for language, count in sorted(counts.items())) or 'nothing'
+
+
+def main():
+    """Main entry point for CLI usage"""
+    parser = argparse.ArgumentParser(
+        description='Import TMX files into a translation memory, or export a memory as TMX',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__.split('Usage:', 1)[1]
+    )
+    parser.add_argument('command', choices=['import', 'export'], help='import or export')
+    parser.add_argument('files', type=Path, nargs='+', help='TMX files to import, or the TMX file to export to')
+    parser.add_argument(
+        '--memory',
+        type=Path,
+        required=True,
+        help='Translation memory JSON file (as used with translate_xlf.py --memory)'
+    )
+    parser.add_argument(
+        '--language',
+        action='append',
+        help='Only import/export this language, e.g. French (repeatable; default: all)'
+    )
+    parser.add_argument(
+        '--source-language',
+        default='en',
+        help='Source language code if a TMX header has none, and for exports (default: en)'
+    )
+    args = parser.parse_args()
+
+    memory = TranslationMemory(args.memory)
+    if args.command == 'import':
+        for path in args.files:
+            try:
+                counts = import_tmx(memory, path, args.source_language, args.language)
+            except (OSError, ET.ParseError) as e:
+                print(f"Error: Could not import {path}: {e}")
+                sys.exit(1)
+            print(f"📥 Imported {format_counts(counts)} from {path.name}")
+        memory.save()
+        print(f"✓ Translation memory {args.memory} has {len(memory)} entries")
+    else:
+        if len(args.files) != 1:
+            parser.error('export takes exactly one TMX file')
+        units = export_tmx(memory, args.files[0], args.source_language, args.language)
+        print(f"📤 Exported {units} translation units to {args.files[0]}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Per-unit state sidecar for XLIFF translation runs.
+
+XLIFF only stores the current <source> and <target> of a trans-unit, so once a
+product string changes there is no way to tell which source text the existing
+target was translated from. This module keeps that information in a small JSON
+file next to the locale file:
+
+    messages.fr.xlf  ->  messages.fr.xlf.state.json
+
+Each entry is keyed by trans-unit id and records the source text and target
+text as of the last successful translation, and where that target came from
+(see xlf_provenance).
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Dict, Optional
+
+
+class UnitStateStore:
+    """JSON-backed store of per-unit translation state"""
+
+    SUFFIX = ".state.json"
+    VERSION = 1
+
+    def __init__(self, path: Path):
+        """
+        Load the state store from disk (an empty store if the file is missing).
+
+        Args:
+            path: Path to the JSON sidecar file
+        """
+        self.path = path
+        self.units: Dict[str, dict] = {}
+        self._dirty = False
+
+        if path.exists():
+            try:
+                with open(path, encoding='utf-8') as f:
+                    data = json.load(f)
+                self.units = data.get('units', {})
+            except (OSError, ValueError) as e:
+                print(f"Warning: Could not read unit state {path.name}: {e}")
+
+    @classmethod
+    def for_xliff(cls, xliff_path: Path) -> 'UnitStateStore':
+        """
+        Open the state sidecar that belongs to an XLIFF file.
+
+        Args:
+            xliff_path: Path to the XLIFF file
+
+        Returns:
+            UnitStateStore for <xliff_path>.state.json
+        """
+        return cls(xliff_path.with_name(xliff_path.name + cls.SUFFIX))
+
+    def get(self, unit_id: str) -> Optional[dict]:
+        """
+        Get the stored state for a trans-unit.
+
+        Args:
+            unit_id: trans-unit id attribute
+
+        Returns:
+            Dictionary with at least 'source' and 'target', or None
+        """
+        return self.units.get(unit_id)
+
+    def record(self, unit_id: str, source: str, target: str, **extra):
+        """
+        Record the source a target was produced from.
+
+        Args:
+            unit_id: trans-unit id attribute
+            source: Source text the target corresponds to
+            target: Target text
+            **extra: Additional fields to store with the entry
+        """
+        entry = {'source': source, 'target': target}
+        entry.update(extra)
+        if self.units.get(unit_id) != entry:
+            self.units[unit_id] = entry
+            self._dirty = True
+
+    def discard(self, unit_id: str):
+        """
+        Forget a trans-unit (e.g. one removed from the source catalog).
+
+        Args:
+            unit_id: trans-unit id attribute
+        """
+        if self.units.pop(unit_id, None) is not None:
+            self._dirty = True
+
+    def save(self):
+        """Write the store to disk if it changed (atomic replace)."""
+        if not self._dirty:
+            return
+
+        tmp_path = self.path.with_name(self.path.name + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(
+                {'version': self.VERSION, 'units': self.units},
+                f,
+                ensure_ascii=False,
+                indent=1,
+                sort_keys=True
+            )
+        os.replace(tmp_path, self.path)
+        self._dirty = False
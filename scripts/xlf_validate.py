@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+Validation of translated trans-units against their source.
+
+A translation that loses a placeholder, breaks an inline tag or drops an ICU
+branch is still written to the locale file (a target that is not well-formed
+XML is stored as plain text), and the problem only shows up in the frontend
+build. UnitValidator checks every translation before it is applied:
+
+- placeholders: the same multiset of <x id="..."/> placeholders as the source
+- tags:         the translation is well-formed XML with the same inline tags
+- icu:          the same plural/select expressions; select cases must match,
+                plural cases must keep the source's =N cases and `other`
+                (languages may add their own categories such as few/many)
+- length:       the translation is not more than max_length_ratio times longer
+                or shorter than the source (sources under MIN_LENGTH characters
+                are not checked)
+
+In ICU messages the placeholders and tags are compared as sets and the length
+is not checked, since plural categories added by the target language repeat
+the text of a case.
+
+Checks run on the worker threads that send the batches, so validation overlaps
+with the requests still in flight. Units that fail are requeued on their own.
+"""
+
+import re
+from collections import Counter, defaultdict
+from typing import List, NamedTuple, Optional, Tuple
+from xml.etree import ElementTree as ET
+
+_PLACEHOLDER_RE = re.compile(r'<x\b[^>]*\bid="([^"]*)"')
+_TAG_RE = re.compile(r'<[^>]*>')
+_ICU_HEAD_RE = re.compile(r'\s*([\w.]+)\s*,\s*(plural|select|selectordinal)\s*,')
+_ICU_CASE_RE = re.compile(r'\s*(offset:\s*\d+\s*)?(=?[\w-]+)\s*\{')
+_ICU_END_RE = re.compile(r'\s*\}')
+
+# Sources shorter than this (in visible characters) are not length-checked
+MIN_LENGTH = 8
+
+
+class Problem(NamedTuple):
+    """A failed check of one translation"""
+    check: str  # 'placeholders', 'tags', 'icu' or 'length'
+    message: str
+
+    def __str__(self) -> str:
+        return f"{self.check}: {self.message}"
+
+
+class IcuExpression(NamedTuple):
+    """A plural/select expression of a message"""
+    variable: str
+    kind: str
+    cases: Tuple[str, ...]
+
+
+def _parse_text(text: str, pos: int, found: List[IcuExpression]) -> int:
+    # Message text up to an unmatched '}' (returned) or the end of the text
+    while pos < len(text):
+        if text[pos] == '{':
+            pos = _parse_argument(text, pos + 1, found)
+        elif text[pos] == '}':
+            return pos
+        else:
+            pos += 1
+    return pos
+
+
+def _parse_argument(text: str, pos: int, found: List[IcuExpression]) -> int:
+    # Argument after a '{'; returns the position after its closing '}'
+    head = _ICU_HEAD_RE.match(text, pos)
+    if head is None:
+        end = _parse_text(text, pos, found)
+        if end >= len(text):
+            raise ValueError("unbalanced braces")
+        return end + 1
+
+    variable, kind = head.groups()
+    pos = head.end()
+    cases = []
+    while True:
+        case = _ICU_CASE_RE.match(text, pos)
+        if case is None:
+            end = _ICU_END_RE.match(text, pos)
+            if end is None:
+                raise ValueError(f"malformed {kind} expression for {variable}")
+            found.append(IcuExpression(variable, kind, tuple(cases)))
+            return end.end()
+        cases.append(case.group(2))
+        end = _parse_text(text, case.end(), found)
+        if end >= len(text):
+            raise ValueError("unbalanced braces")
+        pos = end + 1
+
+
+def icu_expressions(text: str) -> List[IcuExpression]:
+    """
+    Find the ICU plural/select expressions of a message (including nested ones).
+
+    Args:
+        text: Message text; inline tags are ignored
+
+    Returns:
+        List of expressions
+
+    Raises:
+        ValueError: If the braces are unbalanced or an expression is malformed
+    """
+    text = _TAG_RE.sub('', text)
+    found: List[IcuExpression] = []
+    end = _parse_text(text, 0, found)
+    if end < len(text):
+        raise ValueError("unbalanced braces")
+    return found
+
+
+def _inline_tags(text: str) -> Optional[Counter]:
+    # Tag names of the inline elements other than <x> placeholders (None if the text is not well-formed XML)
+    try:
+        wrapper = ET.fromstring(f'<temp>{text}</temp>')
+    except ET.ParseError:
+        return None
+    tags = (element.tag.rsplit('}', 1)[-1] for element in wrapper.iter() if element is not wrapper)
+    return Counter(tag for tag in tags if tag != 'x')
+
+
+def _has_icu(text: str) -> bool:
+    # Whether a message has plural/select expressions
+    if '{' not in text:
+        return False
+    try:
+        return bool(icu_expressions(text))
+    except ValueError:
+        return False
+
+
+class UnitValidator:
+    """Checks translations against their source text"""
+
+    def __init__(self, max_length_ratio: float = 3.0):
+        """
+        Initialize the validator.
+
+        Args:
+            max_length_ratio: Maximum ratio between the visible lengths of translation
+                and source, in either direction (0 disables the length check)
+        """
+        self.max_length_ratio = max_length_ratio
+
+    def check(self, source: str, translation: str) -> List[Problem]:
+        """
+        Check one translation.
+
+        Args:
+            source: Source text (inner XML of <source>)
+            translation: Translated text (inner XML for <target>)
+
+        Returns:
+            Problems found (empty if the translation is valid)
+        """
+        problems = []
+        # Plural categories the target language adds repeat the placeholders and tags of their case
+        plural = _has_icu(source)
+
+        problem = self.check_placeholders(source, translation, plural)
+        if problem is not None:
+            problems.append(problem)
+
+        source_tags = _inline_tags(source)
+        if source_tags is not None:
+            tags = _inline_tags(translation)
+            if tags is None:
+                problems.append(Problem('tags', "not well-formed XML"))
+            elif (set(tags) != set(source_tags)) if plural else (tags != source_tags):
+                problems.append(Problem('tags', f"inline tags {dict(tags)} instead of {dict(source_tags)}"))
+
+        problems.extend(self._check_icu(source, translation))
+
+        if self.max_length_ratio and not plural:
+            source_length = len(_TAG_RE.sub('', source).strip())
+            length = len(_TAG_RE.sub('', translation).strip())
+            if source_length >= MIN_LENGTH:
+                ratio = length / source_length
+                if ratio > self.max_length_ratio or ratio < 1 / self.max_length_ratio:
+                    problems.append(Problem('length', f"{length} characters for a source of {source_length}"))
+
+        return problems
+
+    @staticmethod
+    def check_placeholders(source: str, translation: str, plural: Optional[bool] = None) -> Optional[Problem]:
+        """
+        Compare the <x id="..."/> placeholders of a translation with its source.
+
+        Args:
+            source: Source text (inner XML of <source>)
+            translation: Translated text (inner XML for <target>)
+            plural: Whether the source has ICU expressions, in which case the placeholders
+                are compared as sets (None: find out from the source)
+
+        Returns:
+            The problem, or None if the placeholders match
+        """
+        if plural is None:
+            plural = _has_icu(source)
+        expected = Counter(_PLACEHOLDER_RE.findall(source))
+        actual = Counter(_PLACEHOLDER_RE.findall(translation))
+        if plural:
+            expected, actual = Counter(set(expected)), Counter(set(actual))
+        if expected == actual:
+            return None
+        missing = ', '.join(sorted((expected - actual).elements()))
+        extra = ', '.join(sorted((actual - expected).elements()))
+        return Problem('placeholders', '; '.join(filter(None, [
+            f"missing {missing}" if missing else '',
+            f"unexpected {extra}" if extra else '',
+        ])))
+
+    @staticmethod
+    def _check_icu(source: str, translation: str) -> List[Problem]:
+        try:
+            source_expressions = icu_expressions(source)
+        except ValueError:
+            # Nothing to compare against
+            return []
+        try:
+            expressions = icu_expressions(translation)
+        except ValueError as e:
+            return [Problem('icu', str(e))]
+
+        by_variable = defaultdict(list)
+        for expression in expressions:
+            by_variable[expression.variable, expression.kind].append(expression)
+        problems = []
+        for expected in source_expressions:
+            candidates = by_variable[expected.variable, expected.kind]
+            if not candidates:
+                problems.append(Problem('icu', f"{expected.kind} expression for {expected.variable} is missing"))
+                continue
+            actual = candidates.pop(0)
+            if expected.kind == 'select':
+                if set(actual.cases) != set(expected.cases):
+                    problems.append(Problem('icu', f"select cases {', '.join(actual.cases)} instead of "
+                                                   f"{', '.join(expected.cases)} for {expected.variable}"))
+            else:
+                required = {case for case in expected.cases if case.startswith('=')} | {'other'}
+                missing = required - set(actual.cases)
+                if missing:
+                    problems.append(Problem('icu', f"{expected.kind} cases {', '.join(sorted(missing))} "
+                                                   f"missing for {expected.variable}"))
+        for (variable, kind), extra in by_variable.items():
+            if extra:
+                problems.append(Problem('icu', f"unexpected {kind} expression for {variable}"))
+        return problems
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Watch mode for the locale files.
+
+Keeps one translator (API client, translation memory, auto-tuner) warm and
+polls the locale files for changes, e.g. after `ng extract-i18n` and a merge
+into the locale files. Changes are debounced until a file has been quiet for a
+moment, then the file's trans-units are diffed against an in-memory index and
+only files with new, changed or untranslated units are translated.
+
+With a source catalog (messages.xlf), a settled change of the catalog first
+syncs the locale files with it (see xlf_sync), then translates what the sync
+added; locale file changes wait while the catalog is still changing.
+
+The watcher's own writes are indexed right after saving, so they do not
+trigger another round.
+
+Polling uses only the standard library, so it works the same on every
+platform and inside containers with bind-mounted source directories.
+"""
+
+import os
+import time
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+from xml.etree import ElementTree as ET
+
+from xlf_sync import sync_locales
+
+
+class LocaleWatcher:
+    """Translates new and changed trans-units of locale files as they change"""
+
+    def __init__(
+        self,
+        translator,
+        files: Dict[Path, str],
+        interval: float = 1.0,
+        debounce: float = 2.0,
+        log: Optional[Callable[[str], None]] = None,
+        catalog: Optional[Path] = None
+    ):
+        """
+        Initialize the watcher.
+
+        Args:
+            translator: XLIFFTranslator (or subclass) reused for every change
+            files: Locale file -> target language name
+            interval: Seconds between polls
+            debounce: Seconds a changed file must stay unchanged before it is processed
+            log: Function used for status messages (default: print)
+            catalog: Source catalog (messages.xlf) to watch; its changes are synced
+                into the locale files before they are translated
+        """
+        self.translator = translator
+        self.files = files
+        self.interval = interval
+        self.debounce = debounce
+        self.log = log or print
+        self.catalog = catalog
+
+        # Per file: unit id (or source text) -> (source, target)
+        self.index: Dict[Path, Dict[str, Tuple[str, str]]] = {}
+        self._stamps: Dict[Path, Optional[Tuple[int, int]]] = {}
+        self._changed_at: Dict[Path, float] = {}
+
+    @staticmethod
+    def _stamp(path: Path) -> Optional[Tuple[int, int]]:
+        """Modification time and size of a file (None if it does not exist)."""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _scan(self, path: Path) -> Dict[str, Tuple[str, str]]:
+        """
+        Read the trans-units of a locale file.
+
+        Returns:
+            Dictionary unit id (or source text) -> (source, target)
+        """
+        root = ET.parse(path).getroot()
+        units = {}
+        for trans_unit, target_elem, source_text in self.translator.extract_translations(root):
+            key = trans_unit.get('id') or source_text
+            units[key] = (source_text, self.translator._get_element_text(target_elem))
+        return units
+
+    def _pending(self, path: Path, units: Dict[str, Tuple[str, str]]) -> int:
+        """Number of units that are new, have a changed source, or have no translation."""
+        known = self.index.get(path, {})
+        pending = 0
+        for key, (source, target) in units.items():
+            previous = known.get(key)
+            if not target.strip() or previous is None or previous[0] != source:
+                pending += 1
+        return pending
+
+    def _index(self, path: Path):
+        """Re-read a file into the index after it was processed."""
+        self.index[path] = self._scan(path)
+        self._stamps[path] = self._stamp(path)
+
+    def process(self, path: Path) -> bool:
+        """
+        Translate a changed file if it has new, changed or untranslated units.
+
+        Args:
+            path: Locale file
+
+        Returns:
+            True if the file was translated
+        """
+        try:
+            units = self._scan(path)
+        except ET.ParseError as e:
+            # Most likely still being written; the next change will bring it back
+            self.log(f"⚠ Could not parse {path.name} ({e}), waiting for the next change")
+            self._stamps[path] = self._stamp(path)
+            return False
+
+        pending = self._pending(path, units)
+        if not pending:
+            self.index[path] = units
+            self._stamps[path] = self._stamp(path)
+            return False
+
+        self.log(f"✏️  {path.name}: {pending} new or changed units")
+        started = time.monotonic()
+        try:
+            self.translator.translate_file(path, self.files[path])
+        except Exception as e:
+            # A failed file (write error, exhausted providers) must not end the watch; the index keeps
+            # the units as pending, so the next change of the file retries them
+            self.log(f"❌ {path.name}: translation failed ({type(e).__name__}: {e}), waiting for the next change")
+            self._stamps[path] = self._stamp(path)
+            return False
+        self._index(path)
+        self.log(f"✓ {path.name} updated in {time.monotonic() - started:.1f}s")
+        return True
+
+    def _settled(self, path: Path, now: float) -> bool:
+        """Whether a file changed and has stayed unchanged for the debounce time since."""
+        stamp = self._stamp(path)
+        if stamp != self._stamps.get(path):
+            # Still changing: restart the debounce timer
+            self._stamps[path] = stamp
+            self._changed_at[path] = now
+            return False
+        changed_at = self._changed_at.get(path)
+        if changed_at is not None and stamp is not None and now - changed_at >= self.debounce:
+            del self._changed_at[path]
+            return True
+        return False
+
+    def sync(self) -> int:
+        """
+        Sync the locale files with the changed catalog, then translate what it added.
+
+        Returns:
+            Number of files translated
+        """
+        self.log(f"📚 {self.catalog.name} changed, syncing the locale files")
+        if sync_locales(self.catalog, list(self.files)) is None:
+            self.log(f"⚠ Sync failed, waiting for the next change of {self.catalog.name}")
+            return 0
+        # Every locale file may have new units now; files without any are only re-indexed
+        translated = 0
+        for path in self.files:
+            self._changed_at.pop(path, None)
+            if self._stamp(path) is not None:
+                translated += self.process(path)
+        return translated
+
+    def poll(self) -> int:
+        """
+        Check every file once and process those whose changes have settled.
+
+        Returns:
+            Number of files translated
+        """
+        now = time.monotonic()
+        if self.catalog is not None:
+            if self._settled(self.catalog, now):
+                return self.sync()
+            if self.catalog in self._changed_at:
+                # Translating now would miss (or later redo) what the catalog change brings in
+                return 0
+        translated = 0
+        for path in self.files:
+            if self._settled(path, now):
+                translated += self.process(path)
+        return translated
+
+    def run(self):
+        """Catch up on untranslated units, then watch until interrupted (Ctrl+C)."""
+        if self.catalog is not None:
+            self._stamps[self.catalog] = self._stamp(self.catalog)
+        for path in self.files:
+            if self._stamp(path) is None:
+                self.log(f"⚠ Warning: File not found, waiting for it: {path.name}")
+                self._stamps[path] = None
+                continue
+            try:
+                self.index[path] = self._scan(path)
+            except ET.ParseError as e:
+                self.log(f"⚠ Could not parse {path.name} ({e}), waiting for the next change")
+                self._stamps[path] = self._stamp(path)
+                continue
+            # Only units without a translation are pending right after indexing
+            self.process(path)
+
+        self.log(f"👀 Watching {len(self.files)} locale files"
+                 f"{f' and {self.catalog.name}' if self.catalog is not None else ''} (Ctrl+C to stop)")
+        try:
+            while True:
+                time.sleep(self.interval)
+                self.poll()
+        except KeyboardInterrupt:
+            self.log("\nStopped watching.")